@@ -133,6 +133,11 @@ file_path:
 - If a file is listed here, it exists, and you can list files in this case.
 """
 
+REPO_MAP_PARTIAL_NOTE = """
+PARTIAL MAP: indexing is still running, so some definitions are missing from this map.
+Use search or file reading tools when something you need is not listed.
+"""
+
 ACTIVE_CONTEXT_DESCRIPTION = """
 This section contains the FULL CONTENT of the files currently active in the session.
 You do not need to use tools to read a file. They are already loaded in your context.
@@ -57,6 +57,7 @@ async def build_agent(
     turn_id: str | None = None,
     *,
     settings_snapshot: AgentSettingsSnapshot,
+    user_message: str | None = None,
 ):
     """Build an agent for a specific turn using an explicit settings snapshot.
 
@@ -67,4 +68,5 @@ async def build_agent(
         session_id=session_id,
         turn_id=turn_id,
         settings_snapshot=settings_snapshot,
+        user_message=user_message,
     )
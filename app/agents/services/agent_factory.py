@@ -31,6 +31,7 @@ class AgentFactoryService:
         *,
         turn_id: str | None = None,
         settings_snapshot: AgentSettingsSnapshot,
+        user_message: str | None = None,
     ) -> CoderAgent:
 
         # todo: same here.. this should be a snapshot.. I (((we))) have great plans for settings scopes \o/
@@ -85,6 +86,7 @@ class AgentFactoryService:
             session_id,
             operational_mode=operational_mode,
             settings_snapshot=settings_snapshot,
+            user_message=user_message,
         )
 
         return CoderAgent(tools=tools, llm=llm, system_prompt=system_prompt)
@@ -7,11 +7,13 @@ from app.agents.constants import (
     PLANNER_IDENTITY,
     PROMPT_STRUCTURE_GUIDE,
     REPO_MAP_DESCRIPTION,
+    REPO_MAP_PARTIAL_NOTE,
     SINGLE_SHOT_IDENTITY,
     TOOL_USAGE_RULES,
 )
 from app.context.schemas import FileStatus
 from app.context.services import CodebaseService, RepoMapService, WorkspaceService
+from app.core.config import settings
 from app.core.enums import OperationalMode
 from app.projects.exceptions import ActiveProjectRequiredException
 from app.projects.models import Project
@@ -46,6 +48,7 @@ class AgentContextService:
         operational_mode: OperationalMode = OperationalMode.CODING,
         *,
         settings_snapshot: AgentSettingsSnapshot,
+        user_message: str | None = None,
     ) -> str:
         project = await self.project_service.get_active_project()
         if not project:
@@ -90,13 +93,15 @@ class AgentContextService:
         # For other modes, fetch context
         custom_prompts_xml = await self._build_prompts_xml(project.id)
 
-        # fetch repo map (semi-stable)
-        repo_map = await self.repo_map_service.generate_repo_map(
+        # fetch repo map (semi-stable); paths and names in the message boost ranking
+        repo_map_result = await self.repo_map_service.generate_repo_map(
             session_id=session_id,
+            mention_text=user_message,
             include_active_content=False,
             mode=settings_snapshot.repomap_mode,
             ignore_patterns_str=settings_snapshot.repomap_ignore_patterns,
             token_limit=settings_snapshot.ast_token_limit,
+            time_budget=settings.REPOMAP_TIME_BUDGET,
         )
 
         # fetch active context (volatile)
@@ -123,9 +128,12 @@ class AgentContextService:
                 f"<ACTIVE_CONTEXT>\n<!-- {ACTIVE_CONTEXT_DESCRIPTION} -->\n{active_context_xml}\n</ACTIVE_CONTEXT>"
             )
 
-        if repo_map:
+        if repo_map_result.content:
+            description = REPO_MAP_DESCRIPTION
+            if not repo_map_result.complete:
+                description += REPO_MAP_PARTIAL_NOTE
             parts.append(
-                f"<REPOSITORY_MAP>\n<!-- {REPO_MAP_DESCRIPTION} -->\n{repo_map}\n</REPOSITORY_MAP>"
+                f"<REPOSITORY_MAP>\n<!-- {description} -->\n{repo_map_result.content}\n</REPOSITORY_MAP>"
             )
 
         return "\n\n".join(parts)
@@ -347,6 +347,13 @@ class WebSocketOrchestrator:
         ).render(context)
         await self.ws_manager.send_html(template)
 
+    async def render_warm_up_progress(self, message: str, is_error: bool) -> None:
+        await self._handle_workflow_log(
+            WorkflowLogEvent(
+                message=message, level=LogLevel.ERROR if is_error else LogLevel.INFO
+            )
+        )
+
     async def _handle_workflow_log(self, event: WorkflowLogEvent, **kwargs):  # noqa
         color_map = {"info": "gray", "error": "red"}
         color = color_map.get(event.level, "gray")
@@ -14,6 +14,7 @@ from app.coder.services.coder import CoderService
 from app.coder.services.execution_registry import TurnExecutionRegistry
 from app.commons.fastapi_htmx import htmx
 from app.commons.websockets import WebSocketConnectionManager
+from app.context.warmup import get_repo_map_warmer
 from app.core.templating import templates
 from app.projects.exceptions import ActiveProjectRequiredException
 from app.sessions.dependencies import get_session_service
@@ -48,7 +49,8 @@ async def read_session(
     session_service: SessionService = Depends(get_session_service),
 ):
     try:
-        await session_service.set_active_session(session_id=session_id)
+        session = await session_service.set_active_session(session_id=session_id)
+        get_repo_map_warmer().schedule(session.project_id)
         page_data = await page_service.get_main_page_data(session_id=session_id)
         return templates.TemplateResponse(
             "chat/pages/main.html", {"request": request, **page_data}
@@ -86,4 +88,11 @@ async def conversation_websocket(
     orchestrator = WebSocketOrchestrator(
         ws_manager=ws_manager, session_id=session_id, coder_service=coder_service
     )
-    await orchestrator.handle_connection()
+    # Repo map warm-up progress goes to this session's logs panel.
+    warmer = get_repo_map_warmer()
+    listener = orchestrator.render_warm_up_progress
+    await warmer.add_listener(listener)
+    try:
+        await orchestrator.handle_connection()
+    finally:
+        warmer.remove_listener(listener)
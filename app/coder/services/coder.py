@@ -90,6 +90,7 @@ class CoderService:
                         session_id=session_id,
                         turn_id=turn.turn_id,
                         settings_snapshot=turn.settings_snapshot,
+                        user_message=user_message,
                     )
                     ctx = await self._get_workflow_context(
                         session_id=session_id, workflow=workflow
@@ -193,6 +194,7 @@ class CoderService:
         session_id: int,
         turn_id: str,
         settings_snapshot: AgentSettingsSnapshot,
+        user_message: str | None = None,
     ) -> Any:
         async with self.db.session() as session:
             return await self.agent_factory(
@@ -200,6 +202,7 @@ class CoderService:
                 session_id,
                 turn_id,
                 settings_snapshot=settings_snapshot,
+                user_message=user_message,
             )
 
     async def _get_workflow_context(self, *, session_id: int, workflow: Any) -> Any:
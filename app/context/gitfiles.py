@@ -0,0 +1,72 @@
+import logging
+import os
+import subprocess
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+GIT_TIMEOUT = 30.0
+
+MODE_SYMLINK = "120000"
+MODE_GITLINK = "160000"  # submodule checkout, a directory in the work tree
+
+
+class GitFile(NamedTuple):
+    path: str  # relative to the work tree root, "/"-separated
+    mode: str  # octal mode from the index, "" for untracked files
+
+
+def is_git_checkout(project_root: str) -> bool:
+    """True if the project root is the top of a git work tree (`.git` dir or file)."""
+    return os.path.exists(os.path.join(project_root, ".git"))
+
+
+def list_git_files(project_root: str) -> list[GitFile] | None:
+    """
+    Lists the work tree's tracked and untracked, non-ignored files from the local
+    index, honoring every .gitignore, .git/info/exclude and the global excludes.
+    Tracked files deleted from the work tree are left out.
+
+    Returns None when git is unavailable or fails, so callers fall back to walking
+    the tree. Blocking: run it in a worker thread.
+    """
+    try:
+        completed = subprocess.run(
+            [
+                "git",
+                "-C",
+                project_root,
+                "ls-files",
+                "-z",
+                "-t",
+                "--stage",
+                "--cached",
+                "--deleted",
+                "--others",
+                "--exclude-standard",
+            ],
+            capture_output=True,
+            timeout=GIT_TIMEOUT,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"git ls-files failed in {project_root}: {e}")
+        return None
+
+    files: dict[str, str] = {}
+    deleted: set[str] = set()
+    for record in completed.stdout.decode("utf-8", "surrogateescape").split("\0"):
+        if not record:
+            continue
+        # "<tag> <mode> <oid> <stage>\t<path>" for index entries, "? <path>" otherwise
+        tag, _, rest = record.partition(" ")
+        if tag == "?":
+            files[rest] = ""
+            continue
+        info, _, path = rest.partition("\t")
+        if tag == "R":
+            deleted.add(path)
+        else:
+            files[path] = info.partition(" ")[0]
+
+    return [GitFile(path, mode) for path, mode in files.items() if path not in deleted]
@@ -1,3 +1,17 @@
+from .cache import TagCache, get_tag_cache
+from .graph import RepoGraph, get_repo_graph
+from .languages import LanguageRegistry, get_language_registry
 from .repomap import RepoMap
+from .tokens import TokenCounter, get_token_counter
 
-__all__ = ["RepoMap"]
+__all__ = [
+    "RepoMap",
+    "TagCache",
+    "get_tag_cache",
+    "RepoGraph",
+    "get_repo_graph",
+    "LanguageRegistry",
+    "get_language_registry",
+    "TokenCounter",
+    "get_token_counter",
+]
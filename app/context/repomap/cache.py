@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.context.repomap.extraction import RawTag
+from app.context.repomap.generated import GeneratedFileDetector
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes (queries, Tag shape) so old rows are dropped.
+TAG_CACHE_VERSION = 3
+
+
+class TagCache:
+    """
+    Persistent, per-project store of extracted tags backed by SQLite.
+
+    Rows are keyed by project-relative path and validated against the file's size,
+    mtime and content hash, so files that did not change are never re-parsed.
+    Generated files are stored without tags, so rows also record the generated-file
+    detector's fingerprint: rows written under other thresholds are misses.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != TAG_CACHE_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS tags")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tags (
+                rel_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                detector TEXT NOT NULL,
+                tags TEXT NOT NULL
+            )
+            """)
+        self._conn.execute(f"PRAGMA user_version = {TAG_CACHE_VERSION}")
+        self._conn.commit()
+
+    def get(
+        self,
+        rel_path: str,
+        size: int,
+        mtime_ns: int,
+        content_hash: str | None = None,
+    ) -> list[RawTag] | None:
+        """
+        Returns cached tags if the entry is still valid, otherwise None.
+
+        A (size, mtime) match is trusted as-is. When it does not match but the caller
+        provides the content hash and it is unchanged (e.g. the file was touched or
+        checked out again), the entry is refreshed with the new stat and reused.
+        """
+        detector = _detector_fingerprint()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, detector, tags FROM tags "
+                "WHERE rel_path = ?",
+                (rel_path,),
+            ).fetchone()
+            if not row or row[3] != detector:
+                return None
+
+            cached_size, cached_mtime_ns, cached_hash, _, payload = row
+            if cached_size != size or cached_mtime_ns != mtime_ns:
+                if content_hash is None or content_hash != cached_hash:
+                    return None
+                self._conn.execute(
+                    "UPDATE tags SET size = ?, mtime_ns = ? WHERE rel_path = ?",
+                    (size, mtime_ns, rel_path),
+                )
+
+        return [(name, kind, line) for name, kind, line in json.loads(payload)]
+
+    def get_hash(self, rel_path: str) -> str | None:
+        """Returns the content hash of the cached entry, if any (and still valid)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, detector FROM tags WHERE rel_path = ?",
+                (rel_path,),
+            ).fetchone()
+        return row[0] if row and row[1] == _detector_fingerprint() else None
+
+    def set(
+        self,
+        rel_path: str,
+        size: int,
+        mtime_ns: int,
+        content_hash: str,
+        tags: list[RawTag],
+    ) -> None:
+        self.set_many([(rel_path, size, mtime_ns, content_hash, tags)])
+
+    def set_many(self, rows: list[tuple[str, int, int, str, list[RawTag]]]) -> None:
+        """Stores (rel_path, size, mtime_ns, content_hash, tags) rows in one go."""
+        detector = _detector_fingerprint()
+        params = [
+            (rel_path, size, mtime_ns, content_hash, detector, json.dumps(tags))
+            for rel_path, size, mtime_ns, content_hash, tags in rows
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tags "
+                "(rel_path, size, mtime_ns, content_hash, detector, tags) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                params,
+            )
+
+    def commit(self) -> None:
+        """Flushes pending writes. Called once per extraction pass instead of per file."""
+        with self._lock:
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+def _detector_fingerprint() -> str:
+    # Extraction builds its detector from settings too (see extract_batch).
+    return GeneratedFileDetector.from_settings().fingerprint
+
+
+_caches: dict[str, TagCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_tag_cache(project_root: str) -> TagCache:
+    """
+    Returns the process-wide TagCache for a project, shared by all sessions.
+    """
+    root = str(Path(project_root).resolve())
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            digest = hashlib.sha1(root.encode("utf-8")).hexdigest()
+            db_path = os.path.join(settings.REPOMAP_CACHE_DIR, f"{digest}.sqlite3")
+            logger.debug(f"RepoMap: Opening tag cache for {root} at {db_path}")
+            cache = TagCache(db_path)
+            _caches[root] = cache
+        return cache
+
+
+def clear_tag_caches() -> None:
+    """Closes and forgets every open TagCache (used on shutdown and by tests)."""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import heapq
+import logging
+import multiprocessing
+import os
+import threading
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from grep_ast import filename_to_lang
+from tree_sitter import Query, QueryCursor, Tree
+
+from app.context.repomap.generated import GeneratedFileDetector
+from app.context.repomap.languages import LanguageRegistry, get_language_registry
+from app.context.repomap.trees import ParseTreeCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (name, kind, line): compact tag representation that is cheap to pickle across processes.
+RawTag = tuple[str, str, int]
+
+
+@dataclass(slots=True)
+class PendingFile:
+    """A file that missed the tag cache and has to be (re)read."""
+
+    path: str
+    size: int
+    cached_hash: str | None = None
+
+
+@dataclass(slots=True)
+class ExtractedFile:
+    """
+    Result of extracting a single file.
+    `tags` is None when the content hash matched `PendingFile.cached_hash`,
+    meaning the cached tags are still valid and nothing was parsed.
+    """
+
+    path: str
+    size: int = 0
+    mtime_ns: int = 0
+    content_hash: str = ""
+    tags: list[RawTag] | None = None
+    error: str | None = None
+
+
+def hash_content(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def parse_tags(
+    registry: LanguageRegistry,
+    lang: str,
+    code: str,
+    path: str | None = None,
+    trees: ParseTreeCache | None = None,
+) -> list[RawTag]:
+    """
+    Parses code with the shared parser and compiled query for its language.
+    Hot files (see ParseTreeCache) are reparsed incrementally from their last tree.
+    """
+    parser = registry.get_parser(lang)
+    source = bytes(code, "utf8")
+    if trees is not None and path is not None and trees.is_hot(path):
+        tree = trees.parse(parser, path, source)
+    else:
+        tree = parser.parse(source)
+    return tags_from_tree(registry.get_query(lang), tree)
+
+
+def tags_from_tree(query: Query, tree: Tree) -> list[RawTag]:
+    captures = QueryCursor(query).captures(tree.root_node)
+
+    tags = []
+    for tag_name, nodes in captures.items():
+        if tag_name.startswith("name.definition"):
+            kind = "def"
+        elif tag_name.startswith("name.reference"):
+            kind = "ref"
+        else:
+            continue
+
+        for node in nodes:
+            tags.append((node.text.decode("utf8"), kind, node.start_point[0]))
+
+    # Capture order is not stable across runs; sort so cached and fresh results agree.
+    tags.sort(key=lambda t: (t[2], t[1], t[0]))
+    return tags
+
+
+def extract_file(
+    registry: LanguageRegistry,
+    pending: PendingFile,
+    trees: ParseTreeCache | None = None,
+    detector: GeneratedFileDetector | None = None,
+) -> ExtractedFile:
+    """
+    Reads, hashes and parses a single file. Never raises; errors are reported in the result.
+    Generated and minified files are not parsed: they get no tags (name-only entries),
+    which the tag cache then remembers like any other result.
+    """
+    try:
+        lang = filename_to_lang(pending.path)
+        stat = os.stat(pending.path)
+        with open(pending.path, encoding="utf-8") as f:
+            code = f.read()
+
+        result = ExtractedFile(
+            path=pending.path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=hash_content(code),
+        )
+        if result.content_hash != pending.cached_hash:
+            if not code or (
+                detector and detector.is_generated(pending.path, code, stat.st_size)
+            ):
+                result.tags = []
+            else:
+                result.tags = parse_tags(registry, lang, code, pending.path, trees)
+        return result
+    except Exception as e:
+        return ExtractedFile(path=pending.path, error=str(e))
+
+
+def extract_batch(
+    queries_dir: str,
+    batch: list[PendingFile],
+    trees: ParseTreeCache | None = None,
+    detector: GeneratedFileDetector | None = None,
+) -> list[ExtractedFile]:
+    """
+    Extracts a batch of files. Entry point for extraction worker processes.
+    `detector` defaults to the thresholds from settings.
+    """
+    registry = get_language_registry(queries_dir)
+    detector = detector or GeneratedFileDetector.from_settings()
+    return [extract_file(registry, pending, trees, detector) for pending in batch]
+
+
+def make_batches(
+    pending: list[PendingFile], num_batches: int
+) -> list[list[PendingFile]]:
+    """
+    Splits files into at most `num_batches` batches of roughly equal total size,
+    assigning the largest files first to the currently lightest batch.
+    """
+    num_batches = max(1, min(num_batches, len(pending)))
+    heap = [(0, i) for i in range(num_batches)]
+    batches: list[list[PendingFile]] = [[] for _ in range(num_batches)]
+
+    for item in sorted(pending, key=lambda p: p.size, reverse=True):
+        load, i = heapq.heappop(heap)
+        batches[i].append(item)
+        heapq.heappush(heap, (load + item.size, i))
+
+    return [b for b in batches if b]
+
+
+class TagExtractionPool:
+    """
+    Fans tag extraction out to worker processes so that Tree-sitter parsing
+    scales across cores and never runs on the event loop.
+    """
+
+    # More batches than workers so one slow batch does not leave the others idle.
+    BATCHES_PER_WORKER = 4
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def extract(
+        self, queries_dir: str, pending: list[PendingFile]
+    ) -> list[ExtractedFile]:
+        results = []
+        async for batch_results in self.extract_iter(queries_dir, pending):
+            results.extend(batch_results)
+        return results
+
+    async def extract_iter(
+        self, queries_dir: str, pending: list[PendingFile]
+    ) -> AsyncIterator[list[ExtractedFile]]:
+        """Yields the results of each batch as soon as it completes."""
+        if not pending:
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        batches = make_batches(pending, self.max_workers * self.BATCHES_PER_WORKER)
+        futures = [
+            loop.run_in_executor(executor, extract_batch, queries_dir, batch)
+            for batch in batches
+        ]
+        remaining = dict(zip(futures, batches, strict=True))
+
+        try:
+            async for future in asyncio.as_completed(futures):
+                batch_results = future.result()
+                del remaining[future]
+                yield batch_results
+        except BrokenProcessPool:
+            logger.error("RepoMap: Extraction pool crashed, extracting in-process.")
+            self.shutdown()
+            rest = [p for batch in remaining.values() for p in batch]
+            yield await asyncio.to_thread(extract_batch, queries_dir, rest)
+        finally:
+            for future in remaining:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_pool: TagExtractionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> TagExtractionPool | None:
+    """
+    Returns the shared extraction pool, or None when parallel extraction is disabled
+    (REPOMAP_EXTRACTION_WORKERS=0).
+    """
+    global _pool
+    workers = settings.REPOMAP_EXTRACTION_WORKERS
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool.max_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = TagExtractionPool(max_workers=workers)
+        return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+GENERATED_NAME_SUFFIXES = (
+    ".min.js",
+    ".min.css",
+    ".bundle.js",
+    "_pb2.py",
+    "_pb2_grpc.py",
+    ".pb.go",
+    ".pb.cc",
+    ".pb.h",
+    ".g.dart",
+    ".designer.cs",
+)
+
+# Looked for (lowercased) in the first lines of a file.
+GENERATED_MARKERS = (
+    "@generated",
+    "do not edit",
+    "code generated by",
+    "autogenerated",
+    "auto-generated",
+    "generated by the protocol buffer compiler",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class GeneratedFileDetector:
+    """
+    Flags generated and minified files with cheap checks: well-known file name
+    suffixes, size, average line length and generated-code headers.
+
+    Such files are slow to parse and only add noise to rankings and search results,
+    so callers keep their names but skip their content. Picklable, so extraction
+    worker processes use the same thresholds.
+    """
+
+    max_file_size: int = 1_000_000
+    max_avg_line_length: int = 250
+    header_chars: int = 1024
+    # Average line length is measured on a prefix, enough to spot minified code.
+    sample_chars: int = 64 * 1024
+
+    @classmethod
+    def from_settings(cls) -> "GeneratedFileDetector":
+        return cls(
+            max_file_size=settings.GENERATED_FILE_MAX_SIZE,
+            max_avg_line_length=settings.GENERATED_FILE_MAX_AVG_LINE_LENGTH,
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the thresholds and rules, so persisted verdicts can be checked."""
+        rules = repr((self, GENERATED_NAME_SUFFIXES, GENERATED_MARKERS))
+        return hashlib.sha1(rules.encode("utf-8")).hexdigest()[:16]
+
+    def is_generated(self, path: str, content: str, size: int | None = None) -> bool:
+        """`size` is the file size in bytes, defaulting to the content length."""
+        if os.path.basename(path).lower().endswith(GENERATED_NAME_SUFFIXES):
+            return True
+        if (size if size is not None else len(content)) > self.max_file_size:
+            return True
+
+        sample = content[: self.sample_chars]
+        if sample and len(sample) / (sample.count("\n") + 1) > self.max_avg_line_length:
+            return True
+
+        header = content[: self.header_chars].lower()
+        return any(marker in header for marker in GENERATED_MARKERS)
+
+
+class GeneratedFileCache:
+    """
+    LRU of `GeneratedFileDetector` verdicts.
+
+    Entries are keyed by absolute path and checked against the file's (mtime_ns,
+    size) and the detector's thresholds on every lookup, like the tag cache, so
+    repeated greps over an unchanged tree classify each file once.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        # abs path -> ((mtime_ns, size), detector, generated)
+        self._entries: OrderedDict[
+            str, tuple[tuple[int, int], GeneratedFileDetector, bool]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, path: str, version: tuple[int, int], detector: GeneratedFileDetector
+    ) -> bool | None:
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is None or cached[:2] != (version, detector):
+                return None
+            self._entries.move_to_end(path)
+            return cached[2]
+
+    def put(
+        self,
+        path: str,
+        version: tuple[int, int],
+        detector: GeneratedFileDetector,
+        generated: bool,
+    ) -> None:
+        with self._lock:
+            self._entries[path] = (version, detector, generated)
+            self._entries.move_to_end(path)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_verdicts = GeneratedFileCache()
+
+
+def get_generated_file_cache() -> GeneratedFileCache:
+    """Returns the process-wide cache of generated-file verdicts."""
+    return _verdicts
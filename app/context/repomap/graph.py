@@ -0,0 +1,396 @@
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from app.context.repomap.extraction import RawTag
+from app.context.repomap.ranking import PageRanker
+from app.context.repomap.snippets import SnippetCache
+from app.context.repomap.tags import FileTags, IdentTable
+from app.context.schemas import Tag
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SELF_EDGE_WEIGHT = 0.1
+PRIVATE_IDENT_MULTIPLIER = 0.1
+MENTIONED_IDENT_MULTIPLIER = 10.0
+
+FileStat = tuple[int, int]  # (size, mtime_ns)
+
+
+class BaseEdges(NamedTuple):
+    """
+    Edges between file ids before the per-call IDF and mention weighting:
+    definer self-edges first, then edges from every referencer to every definer.
+    """
+
+    sources: np.ndarray
+    targets: np.ndarray
+    weights: np.ndarray
+    idents: np.ndarray  # identifier of each reference edge, -1 for self-edges
+    doc_freq: np.ndarray  # files using the edge's identifier, 0 for self-edges
+
+
+class RepoGraph:
+    """
+    Long-lived definition/reference graph of a project.
+
+    Files are tracked by their last seen (size, mtime). Each turn only files whose stat
+    changed are re-extracted and applied as deltas: their old definitions and
+    references are replaced, and the edge arrays are rebuilt in one vectorized pass
+    the next time edges are asked for. An unchanged repository costs one stat per
+    file plus PageRank.
+
+    Identifiers are interned to integer ids and each file's tags are kept as compact
+    columns (see FileTags); names are only looked up again for the private-name
+    multiplier and for mentioned identifiers.
+
+    `lock` serializes refreshes (diff, extraction, apply) across turns. The data
+    itself is guarded by an internal thread lock, so `apply`, `edges` and friends
+    can run in worker threads while other turns read the graph.
+    """
+
+    def __init__(self, max_definers: int | None = None) -> None:
+        self.lock = asyncio.Lock()
+        self.max_definers = (
+            max_definers
+            if max_definers is not None
+            else settings.REPOMAP_MAX_DEFINERS_PER_IDENT
+        )
+        self.ranker = PageRanker()
+        self.snippets = SnippetCache()
+
+        # Extraction left running by a turn that hit its deadline, and its files.
+        self.background_extraction: asyncio.Task | None = None
+        self.background_paths: set[str] = set()
+
+        self._data_lock = threading.Lock()
+        self._stats: dict[str, FileStat] = {}
+        self.idents = IdentTable()
+        self._file_tags: dict[str, FileTags] = {}
+        # rel_path -> sorted definition lines, the lines of interest for snippets
+        self._def_lines: dict[str, list[int]] = {}
+
+        # Stable integer ids for files, reused after removal.
+        self._file_ids: dict[str, int] = {}
+        self._id_files: list[str | None] = []
+        self._free_ids: list[int] = []
+
+        # file id -> distinct defined identifiers / (referenced identifiers, counts)
+        self._defined: dict[int, np.ndarray] = {}
+        self._referenced: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        # per identifier id: does its name start with "_"
+        self._private = np.zeros(0, dtype=bool)
+
+        # Rebuilt lazily after changes
+        self._edges: BaseEdges | None = None
+        # Names of defined identifiers
+        self._vocabulary: frozenset[str] | None = None
+
+    @property
+    def files(self) -> set[str]:
+        with self._data_lock:
+            return set(self._file_tags)
+
+    def get_tags(self, rel_path: str) -> list[Tag]:
+        with self._data_lock:
+            tags = self._file_tags.get(rel_path)
+        return tags.to_tags(self.idents) if tags is not None else []
+
+    def get_stat(self, rel_path: str) -> FileStat | None:
+        """The (size, mtime_ns) the file's tags were extracted at."""
+        with self._data_lock:
+            return self._stats.get(rel_path)
+
+    def track_background_extraction(
+        self, task: asyncio.Task, rel_paths: set[str]
+    ) -> None:
+        self.background_extraction = task
+        self.background_paths = rel_paths
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        if self.background_extraction is task:
+            self.background_extraction = None
+            self.background_paths = set()
+        if not task.cancelled() and (error := task.exception()):
+            logger.error(f"RepoMap: Background extraction failed: {error}")
+
+    def diff(self, files: dict[str, str]) -> tuple[dict[str, FileStat], set[str]]:
+        """
+        Compares `files` (relative -> absolute path) with the graph.
+        Returns (new or modified files with their current stat, removed files).
+        Blocking: stats every file, run it in a worker thread.
+        """
+        with self._data_lock:
+            known = dict(self._stats)
+            tracked = set(self._file_tags)
+
+        changed: dict[str, FileStat] = {}
+        missing: set[str] = set()
+        for rel_path, abs_path in files.items():
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                missing.add(rel_path)
+                continue
+            stat = (st.st_size, st.st_mtime_ns)
+            if known.get(rel_path) != stat:
+                changed[rel_path] = stat
+
+        removed = {f for f in tracked if f not in files or f in missing}
+        return changed, removed
+
+    def apply(
+        self,
+        file_tags: dict[str, list[RawTag]],
+        stats: dict[str, FileStat],
+        removed: Iterable[str] = (),
+    ) -> None:
+        """
+        Applies deltas: inserts or replaces the tags of `file_tags` (recording their
+        stat from `stats`) and retracts every file in `removed`.
+        Blocking for large deltas, run it in a worker thread.
+        """
+        with self._data_lock:
+            for rel_path in removed:
+                self._retract(rel_path)
+                self._stats.pop(rel_path, None)
+                self._file_tags.pop(rel_path, None)
+                self._def_lines.pop(rel_path, None)
+                self._release_id(rel_path)
+
+            for rel_path, raw_tags in file_tags.items():
+                if stat := stats.get(rel_path):
+                    self._stats[rel_path] = stat
+                tags = FileTags.from_raw(raw_tags, self.idents)
+                if rel_path in self._file_tags and self._file_tags[rel_path] == tags:
+                    continue
+                self._retract(rel_path)
+                self._file_tags[rel_path] = tags
+                self._insert(rel_path)
+
+                if def_lines := tags.definition_lines():
+                    self._def_lines[rel_path] = def_lines
+                else:
+                    self._def_lines.pop(rel_path, None)
+
+    def _file_id(self, rel_path: str) -> int:
+        file_id = self._file_ids.get(rel_path)
+        if file_id is None:
+            if self._free_ids:
+                file_id = self._free_ids.pop()
+                self._id_files[file_id] = rel_path
+            else:
+                file_id = len(self._id_files)
+                self._id_files.append(rel_path)
+            self._file_ids[rel_path] = file_id
+        return file_id
+
+    def _release_id(self, rel_path: str) -> None:
+        file_id = self._file_ids.pop(rel_path, None)
+        if file_id is not None:
+            self._id_files[file_id] = None
+            self._free_ids.append(file_id)
+
+    def _insert(self, rel_path: str) -> None:
+        file_id = self._file_id(rel_path)
+        tags = self._file_tags[rel_path]
+        defined = tags.defined()
+        if len(defined):
+            self._defined[file_id] = defined
+            self._vocabulary = None
+        referenced = tags.referenced()
+        if len(referenced[0]):
+            self._referenced[file_id] = referenced
+        self._edges = None
+
+    def _retract(self, rel_path: str) -> None:
+        file_id = self._file_ids.get(rel_path)
+        if file_id is None:
+            return
+        if self._defined.pop(file_id, None) is not None:
+            self._vocabulary = None
+        self._referenced.pop(file_id, None)
+        self._edges = None
+
+    def _private_mask(self) -> np.ndarray:
+        """Per identifier id, True for private names (leading underscore)."""
+        known = len(self._private)
+        if known < len(self.idents):
+            new = [
+                self.idents.name(i).startswith("_")
+                for i in range(known, len(self.idents))
+            ]
+            self._private = np.concatenate([self._private, np.array(new, dtype=bool)])
+        return self._private
+
+    def _base_edges(self) -> BaseEdges:
+        """
+        Builds every edge in one vectorized pass over the per-file identifier arrays.
+
+        Every defining file gets a self-edge of SELF_EDGE_WEIGHT per identifier it
+        defines, so definitions carry some weight even without inbound refs. Each
+        referencer then links to every definer of the identifiers it references,
+        except identifiers defined in more than `max_definers` files: names defined
+        everywhere (get, run, __init__) say little about how files relate and would
+        add referencers x definers edges.
+        """
+        if self._edges is not None:
+            return self._edges
+
+        def_files, def_idents = _flatten(self._defined)
+        all_ref_files, all_ref_idents = _flatten(
+            {file_id: refs[0] for file_id, refs in self._referenced.items()}
+        )
+        _, all_ref_counts = _flatten(
+            {file_id: refs[1] for file_id, refs in self._referenced.items()}
+        )
+
+        num_idents = len(self.idents)
+        num_definers = np.bincount(def_idents, minlength=num_idents)
+
+        self_files, self_counts = np.unique(def_files, return_counts=True)
+
+        fanout = num_definers[all_ref_idents]
+        linked = (fanout > 0) & (fanout <= self.max_definers)
+        ref_files = all_ref_files[linked]
+        ref_idents = all_ref_idents[linked]
+        ref_counts = all_ref_counts[linked]
+        fanout = fanout[linked]
+        # Definers grouped by identifier; an identifier's group starts at the
+        # number of definitions of all lower identifiers.
+        definers = def_files[np.argsort(def_idents, kind="stable")]
+        group_start = np.cumsum(num_definers) - num_definers
+        ends = np.cumsum(fanout)
+        within = np.arange(ends[-1] if len(ends) else 0) - np.repeat(
+            ends - fanout, fanout
+        )
+        targets = definers[np.repeat(group_start[ref_idents], fanout) + within]
+        sources = np.repeat(ref_files, fanout)
+        edge_idents = np.repeat(ref_idents, fanout)
+
+        private = self._private_mask()[ref_idents]
+        mul = np.where(private, PRIVATE_IDENT_MULTIPLIER, 1.0)
+        weights = np.repeat(ref_counts * mul, fanout)
+
+        # Document frequency: files defining or referencing the identifier.
+        num_file_ids = max(len(self._id_files), 1)
+        pairs = np.unique(
+            np.concatenate(
+                [
+                    def_idents * num_file_ids + def_files,
+                    all_ref_idents * num_file_ids + all_ref_files,
+                ]
+            )
+        )
+        doc_freq = np.bincount(pairs // num_file_ids, minlength=num_idents)
+
+        self._edges = BaseEdges(
+            sources=np.concatenate([self_files, sources]),
+            targets=np.concatenate([self_files, targets]),
+            weights=np.concatenate([self_counts * SELF_EDGE_WEIGHT, weights]),
+            idents=np.concatenate(
+                [np.full(len(self_files), -1, dtype=np.int64), edge_idents]
+            ),
+            doc_freq=np.concatenate(
+                [np.zeros(len(self_files), dtype=np.int64), doc_freq[edge_idents]]
+            ),
+        )
+        return self._edges
+
+    def edges(
+        self, mentioned_idents: set[str] | None = None
+    ) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns (nodes, sources, targets, weights) with edges as indices into nodes.
+        Nodes are the files that take part in at least one edge.
+
+        Reference edges are weighted by the smoothed inverse document frequency of
+        their identifier, ln((1 + files) / (1 + files using it)) + 1, so rare names
+        link files more strongly than common ones. The factor depends on the file
+        count, so it is applied here rather than baked into the cached arrays.
+        Blocking after changes, run it in a worker thread.
+        """
+        with self._data_lock:
+            base = self._base_edges()
+            n_files = len(self._file_tags)
+            mentioned = [
+                ident
+                for name in mentioned_idents or ()
+                if (ident := self.idents.get(name)) is not None
+            ]
+            if len(base.sources) == 0:
+                return [], base.sources, base.targets, base.weights
+
+            idf = np.log((1.0 + n_files) / (1.0 + base.doc_freq)) + 1.0
+            weights = np.where(base.doc_freq > 0, base.weights * idf, base.weights)
+            if mentioned:
+                # self-edges (ident -1) keep their base weight
+                boosted = np.isin(base.idents, mentioned)
+                weights = np.where(
+                    boosted, weights * MENTIONED_IDENT_MULTIPLIER, weights
+                )
+
+            file_ids, inverse = np.unique(
+                np.concatenate([base.sources, base.targets]), return_inverse=True
+            )
+            nodes = [self._id_files[i] for i in file_ids.tolist()]
+        n_edges = len(base.sources)
+        return nodes, inverse[:n_edges], inverse[n_edges:], weights
+
+    def vocabulary(self) -> frozenset[str]:
+        """
+        Names of the identifiers defined in the project. The same object is returned
+        until definitions change, so callers can cache on its identity.
+        """
+        with self._data_lock:
+            if self._vocabulary is None:
+                _, def_idents = _flatten(self._defined)
+                self._vocabulary = frozenset(
+                    self.idents.name(i) for i in np.unique(def_idents).tolist()
+                )
+            return self._vocabulary
+
+    def definition_lines(self) -> dict[str, list[int]]:
+        """Returns rel_path -> sorted definition lines for files defining anything."""
+        with self._data_lock:
+            return dict(self._def_lines)
+
+
+def _flatten(columns: dict[int, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """{file id: values} -> (file id per value, values), both int64."""
+    if not columns:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    values = list(columns.values())
+    files = np.repeat(
+        np.fromiter(columns.keys(), dtype=np.int64, count=len(columns)),
+        [len(v) for v in values],
+    )
+    return files, np.concatenate(values).astype(np.int64, copy=False)
+
+
+_graphs: dict[str, RepoGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_repo_graph(project_root: str) -> RepoGraph:
+    """Returns the process-wide RepoGraph of a project, shared by all sessions."""
+    root = str(Path(project_root).resolve())
+    with _graphs_lock:
+        graph = _graphs.get(root)
+        if graph is None:
+            graph = _graphs[root] = RepoGraph()
+        return graph
+
+
+def clear_repo_graphs() -> None:
+    with _graphs_lock:
+        _graphs.clear()
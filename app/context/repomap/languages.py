@@ -0,0 +1,91 @@
+import logging
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+from grep_ast import filename_to_lang
+from grep_ast.tsl import get_language, get_parser
+from tree_sitter import Language, Parser, Query
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LanguageRegistry:
+    """
+    Process-wide registry of compiled Tree-sitter tag queries and parsers.
+
+    Queries are loaded lazily from `<lang>-tags.scm` and compiled once per language.
+    Parsers are not thread-safe, so each thread gets its own parser per language.
+    """
+
+    def __init__(self, queries_dir: Path):
+        self.queries_dir = queries_dir
+        self._languages: dict[str, Language] = {}
+        self._queries: dict[str, Query | None] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get_language(self, lang: str) -> Language:
+        language = self._languages.get(lang)
+        if language is None:
+            language = get_language(lang)
+            self._languages[lang] = language
+        return language
+
+    def get_query(self, lang: str) -> Query | None:
+        """Returns the compiled tag query for a language, or None if there is no .scm for it."""
+        if lang in self._queries:
+            return self._queries[lang]
+
+        with self._lock:
+            if lang in self._queries:
+                return self._queries[lang]
+
+            scm_path = self.queries_dir / f"{lang}-tags.scm"
+            query = None
+            if scm_path.exists():
+                query = Query(self.get_language(lang), scm_path.read_text())
+            self._queries[lang] = query
+            return query
+
+    def get_parser(self, lang: str) -> Parser:
+        parsers = getattr(self._local, "parsers", None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+
+        parser = parsers.get(lang)
+        if parser is None:
+            parser = get_parser(lang)
+            parsers[lang] = parser
+        return parser
+
+    def warm(self, file_paths: Iterable[str]) -> list[str]:
+        """
+        Pre-compiles queries for every language found in the given files.
+        Returns the languages that have a usable tag query.
+        """
+        langs = {lang for path in file_paths if (lang := filename_to_lang(path))}
+        warmed = []
+        for lang in sorted(langs):
+            try:
+                if self.get_query(lang) is not None:
+                    warmed.append(lang)
+            except Exception as e:
+                logger.warning(f"RepoMap: Could not compile tag query for {lang}: {e}")
+        return warmed
+
+
+_registries: dict[str, LanguageRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_language_registry(queries_dir: str | Path | None = None) -> LanguageRegistry:
+    """Returns the shared registry for a queries directory (defaults to the bundled one)."""
+    key = str(queries_dir or settings.queries_dir)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(key, LanguageRegistry(Path(key)))
+    return registry
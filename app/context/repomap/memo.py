@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def project_fingerprint(file_paths: Iterable[str]) -> str:
+    """
+    Cheap digest of a file set: paths, sizes and mtimes, no content.
+    Blocking: stats every file, run it in a worker thread.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(set(file_paths)):
+        try:
+            st = os.stat(path)
+            digest.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        except OSError:
+            digest.update(f"{path}\0-\n".encode())
+    return digest.hexdigest()
+
+
+class RepoMapMemo:
+    """
+    LRU of generated repo map strings.
+
+    Keys combine the project fingerprint with every generation input, so an
+    unchanged repository and request returns the exact same string without
+    touching the graph.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight task.
+
+    The first caller starts the work, later callers await the same task. The task is
+    shielded, so a caller that goes away (e.g. a closed tab) does not cancel the
+    build for the others.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller went away.
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+_memo = RepoMapMemo()
+_flights = SingleFlight()
+
+
+def get_repo_map_memo() -> RepoMapMemo:
+    return _memo
+
+
+def get_repo_map_flights() -> SingleFlight:
+    return _flights
+
+
+def clear_repo_map_memo() -> None:
+    _memo.clear()
@@ -0,0 +1,82 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+
+IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+PATH_RE = re.compile(r"[\w.\-/\\]+")
+
+# Shorter names are mostly loop variables and English words that happen to be defined.
+MIN_IDENT_LENGTH = 3
+# A basename shared by more files (__init__.py, index.ts) does not say which one is meant.
+MAX_BASENAME_MATCHES = 3
+
+
+class MentionExtractor:
+    """
+    Finds the project's identifiers and file paths mentioned in free text.
+
+    Identifiers and paths are matched as whole tokens: the text is split once with a
+    regex and every token is a hash lookup into the vocabulary, so matching is linear
+    in the text and independent of the vocabulary size. This gives the same results
+    as a multi-pattern automaton restricted to token boundaries, without the build
+    cost of one. Paths match by project-relative path or by a distinctive basename.
+    """
+
+    def __init__(self, idents: Iterable[str], rel_paths: Iterable[str]):
+        self.idents = frozenset(i for i in idents if len(i) >= MIN_IDENT_LENGTH)
+        self.paths: dict[str, set[str]] = defaultdict(set)
+        for rel_path in rel_paths:
+            normalized = rel_path.replace(os.sep, "/")
+            self.paths[normalized].add(rel_path)
+            self.paths[os.path.basename(normalized)].add(rel_path)
+        self.paths = {
+            token: matches
+            for token, matches in self.paths.items()
+            if len(matches) <= MAX_BASENAME_MATCHES
+        }
+
+    def extract(self, text: str) -> tuple[set[str], set[str]]:
+        """Returns (mentioned relative paths, mentioned identifiers)."""
+        if not text:
+            return set(), set()
+
+        filenames: set[str] = set()
+        for token in set(PATH_RE.findall(text)):
+            token = token.replace("\\", "/").rstrip(".-/")
+            if token.startswith("./"):
+                token = token[2:]
+            if matches := self.paths.get(token):
+                filenames.update(matches)
+
+        idents = self.idents.intersection(IDENT_RE.findall(text))
+        return filenames, idents
+
+
+_extractors: dict[str, tuple[frozenset[str], tuple[str, ...], MentionExtractor]] = {}
+_extractors_lock = threading.Lock()
+
+
+def get_mention_extractor(
+    project_root: str, idents: frozenset[str], rel_paths: list[str]
+) -> MentionExtractor:
+    """
+    Returns the project's extractor, rebuilt only when its identifier or path
+    vocabulary changed since the last call.
+    """
+    paths = tuple(rel_paths)
+    with _extractors_lock:
+        cached = _extractors.get(project_root)
+        if cached is not None and cached[0] is idents and cached[1] == paths:
+            return cached[2]
+
+    extractor = MentionExtractor(idents, paths)
+    with _extractors_lock:
+        _extractors[project_root] = (idents, paths, extractor)
+    return extractor
+
+
+def clear_mention_extractors() -> None:
+    with _extractors_lock:
+        _extractors.clear()
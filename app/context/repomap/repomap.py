@@ -1,15 +1,28 @@
+import asyncio
 import logging
 import os
-from collections import Counter, defaultdict
+from collections.abc import AsyncIterator
 from pathlib import Path
 
 import aiofiles
-import networkx as nx
-from grep_ast import TreeContext, filename_to_lang
-from grep_ast.tsl import get_language, get_parser
-from tree_sitter import Query, QueryCursor
+from grep_ast import filename_to_lang
 
 from app.context.exceptions import RepoMapExtractionException
+from app.context.repomap.cache import TagCache
+from app.context.repomap.extraction import (
+    ExtractedFile,
+    PendingFile,
+    RawTag,
+    extract_batch,
+    get_extraction_pool,
+)
+from app.context.repomap.graph import FileStat, RepoGraph
+from app.context.repomap.languages import LanguageRegistry, get_language_registry
+from app.context.repomap.ranking import PageRanker
+from app.context.repomap.snippets import SnippetCache, render_snippet
+from app.context.repomap.structure import FileStructureRenderer
+from app.context.repomap.tokens import TokenCounter, get_token_counter
+from app.context.repomap.trees import get_parse_tree_cache
 from app.context.schemas import Tag
 from app.core.config import settings
 
@@ -25,6 +38,15 @@ class RepoMap:
     to aid the LLM in understanding the codebase structure.
     """
 
+    # Files per worker-thread hop when extracting without the process pool, so results
+    # arrive incrementally and a deadline can cut in between chunks.
+    THREAD_EXTRACTION_CHUNK = 64
+    # Snippet packing gives up after this many consecutive snippets that did not fit.
+    MAX_PACKING_MISSES = 16
+    DEFINITIONS_TRUNCATED_NOTICE = (
+        "\n... (remaining definitions truncated due to token limit)\n"
+    )
+
     def __init__(
         self,
         all_files: list[str],
@@ -34,6 +56,10 @@ class RepoMap:
         token_limit: int = 4096,
         include_definitions: bool = True,
         root: str | None = None,
+        tag_cache: TagCache | None = None,
+        graph: RepoGraph | None = None,
+        token_counter: TokenCounter | None = None,
+        deadline: float | None = None,
     ):
         self.root = root
         self.all_files = sorted(all_files)
@@ -42,8 +68,19 @@ class RepoMap:
         self.mentioned_idents = mentioned_idents or set()
         self.token_limit = token_limit
         self.include_definitions = include_definitions
+        self.tag_cache = tag_cache
+        self.graph = graph or RepoGraph()
+        self.token_counter = token_counter or get_token_counter()
+        # Event loop time after which generation returns what it has so far.
+        self.deadline = deadline
+        # False when the deadline cut generation short.
+        self.complete = True
         self.queries_dir = Path(settings.queries_dir)
 
+    @property
+    def languages(self) -> LanguageRegistry:
+        return get_language_registry(self.queries_dir)
+
     async def generate(self, include_active_content: bool = True) -> str:
         """
         Generates the repository map string.
@@ -53,7 +90,8 @@ class RepoMap:
 
         header = "### Repository Map\n"
         output_parts.append(header)
-        current_tokens += self._estimate_token_count(header)
+        # Loads the encoding in a worker thread on first use, later counts are inline.
+        current_tokens += await self.token_counter.acount(header)
 
         current_tokens = self._add_file_structure(output_parts, current_tokens)
 
@@ -67,32 +105,25 @@ class RepoMap:
 
         return "".join(output_parts)
 
-    @staticmethod
-    def _estimate_token_count(text: str) -> int:
-        """Approximation of token count."""
-        # todo it is a mock
-        return len(text) // 4
+    def _count_tokens(self, text: str) -> int:
+        return self.token_counter.count(text)
 
     def _add_file_structure(self, output_parts: list[str], current_tokens: int) -> int:
         """
-        Adds a flat list of files to ensure structure is visible even if ranking fails.
+        Adds the file structure to ensure it is visible even if ranking fails.
+        Deep folders are collapsed to summaries when the full list exceeds the budget.
         """
         header = "#### File Structure\n"
-        temp_parts = [header]
-        temp_tokens = self._estimate_token_count(header)
-
-        for file_path in self.all_files:
-            rel_path = self._get_rel_path(file_path)
-            line = f"{rel_path}\n"
-            line_tokens = self._estimate_token_count(line)
-
-            temp_parts.append(line)
-            temp_tokens += line_tokens
+        used = self._count_tokens(header) + 1
+        renderer = FileStructureRenderer(
+            [self._get_rel_path(f) for f in self.all_files], self._count_tokens
+        )
+        lines, tokens = renderer.render(self.token_limit - current_tokens - used)
 
-        # Ensures the text is actually added to the output
-        output_parts.extend(temp_parts)
+        output_parts.append(header)
+        output_parts.extend(lines)
         output_parts.append("\n")
-        return current_tokens + temp_tokens + 1
+        return current_tokens + used + tokens
 
     def _get_rel_path(self, file_path: str) -> str:
         """
@@ -123,132 +154,319 @@ class RepoMap:
         Extracts definitions and references from a file using Tree-sitter.
         Raises RepoMapExtractionException on failure.
         """
-        lang = filename_to_lang(file_path)
-        if not lang:
-            return []
+        file_tags, errors = await self._extract_files([file_path])
+        if errors:
+            raise RepoMapExtractionException(
+                f"Failed to extract tags from {file_path}: {errors[file_path]}"
+            )
+        return [
+            Tag(name=name, kind=kind, line=line)
+            for name, kind, line in file_tags.get(self._get_rel_path(file_path), [])
+        ]
+
+    async def _extract_files(
+        self, file_paths: list[str]
+    ) -> tuple[dict[str, list[RawTag]], dict[str, str]]:
+        """
+        Extracts tags for many files, returning (tags by relative path, errors by path).
 
-        scm_path = self.queries_dir / f"{lang}-tags.scm"
-        if not scm_path.exists():
-            # logger.warning(f"RepoMap: Tag query file not found for {lang} at {scm_path}")
-            return []
+        Files are first checked against the tag cache; only misses are read and parsed.
+        Large batches of misses go to the extraction process pool, smaller ones are
+        parsed in a worker thread, so Tree-sitter never blocks the event loop.
+        """
+        file_tags, pending, errors = await asyncio.to_thread(
+            self._lookup_cached, file_paths
+        )
+        await self._extract_pending(pending, file_tags, errors)
+        return file_tags, errors
+
+    async def _iter_extraction(
+        self, pending: list[PendingFile]
+    ) -> AsyncIterator[list[ExtractedFile]]:
+        """Yields extraction results batch by batch as they complete."""
+        queries_dir = str(self.queries_dir)
+        trees = get_parse_tree_cache()
+        pool = get_extraction_pool()
+        if pool and len(pending) >= settings.REPOMAP_PARALLEL_MIN_FILES:
+            # Hot files are parsed in-process, where their previous trees live.
+            hot = [p for p in pending if trees.is_hot(p.path)]
+            if hot:
+                yield await asyncio.to_thread(extract_batch, queries_dir, hot, trees)
+                hot_paths = {p.path for p in hot}
+                pending = [p for p in pending if p.path not in hot_paths]
+            async for results in pool.extract_iter(queries_dir, pending):
+                yield results
+            return
 
-        try:
-            async with aiofiles.open(file_path, encoding="utf-8") as f:
-                code = await f.read()
+        for i in range(0, len(pending), self.THREAD_EXTRACTION_CHUNK):
+            chunk = pending[i : i + self.THREAD_EXTRACTION_CHUNK]
+            yield await asyncio.to_thread(extract_batch, queries_dir, chunk, trees)
 
-            if not code:
-                return []
+    async def _extract_pending(
+        self,
+        pending: list[PendingFile],
+        file_tags: dict[str, list[RawTag]],
+        errors: dict[str, str],
+        stats: dict[str, FileStat] | None = None,
+    ) -> None:
+        """
+        Extracts cache misses into `file_tags` / `errors` as batches complete,
+        persisting new tags to the tag cache after every batch.
 
-            language = get_language(lang)
-            parser = get_parser(lang)
-            tree = parser.parse(bytes(code, "utf8"))
+        With `stats` (current stat by relative path), every batch is also applied
+        to the graph, so rankings made before extraction ends (a turn that hit its
+        deadline) already use the files processed so far.
+        """
+        async for results in self._iter_extraction(pending):
+            if not results:
+                continue
+            batch_tags, batch_errors = await asyncio.to_thread(
+                self._collect_batch, results, stats
+            )
+            file_tags.update(batch_tags)
+            errors.update(batch_errors)
 
-            query_scm = scm_path.read_text()
+    def _collect_batch(
+        self,
+        results: list[ExtractedFile],
+        stats: dict[str, FileStat] | None = None,
+    ) -> tuple[dict[str, list[RawTag]], dict[str, str]]:
+        """
+        Turns one extraction batch into (tags by relative path, errors by path),
+        writing new tags to the tag cache and committing once, then applying the
+        batch to the graph when `stats` is given.
+        Blocking (JSON encoding, SQLite writes, graph updates), run it in a worker
+        thread.
+        """
+        file_tags: dict[str, list[RawTag]] = {}
+        errors: dict[str, str] = {}
+        rows = []
+        for result in results:
+            if result.error is not None:
+                errors[result.path] = result.error
+                continue
 
-            query = Query(language, query_scm)
+            rel_path = self._get_rel_path(result.path)
+            if result.tags is None:
+                # Content unchanged since it was cached, only the stat differs.
+                tags = self.tag_cache.get(
+                    rel_path,
+                    result.size,
+                    result.mtime_ns,
+                    content_hash=result.content_hash,
+                )
+                if tags is None:
+                    continue
+            else:
+                tags = result.tags
+                rows.append(
+                    (rel_path, result.size, result.mtime_ns, result.content_hash, tags)
+                )
+            file_tags[rel_path] = tags
+
+        if self.tag_cache:
+            self.tag_cache.set_many(rows)
+            self.tag_cache.commit()
+        if stats is not None:
+            self._apply_to_graph(file_tags, errors, stats)
+        return file_tags, errors
+
+    def _apply_to_graph(
+        self,
+        file_tags: dict[str, list[RawTag]],
+        errors: dict[str, str],
+        stats: dict[str, FileStat],
+        removed: set[str] | None = None,
+    ) -> None:
+        """
+        Records processed files in the graph. Files that failed extraction stay
+        out of the graph until they change again. Blocking.
+        """
+        processed = {
+            **{self._get_rel_path(path): [] for path in errors},
+            **file_tags,
+        }
+        self.graph.apply(processed, stats, removed or ())
+
+    def _lookup_cached(
+        self, file_paths: list[str]
+    ) -> tuple[dict[str, list[RawTag]], list[PendingFile], dict[str, str]]:
+        """
+        Splits files into cache hits and files that need extraction.
+        Files without a tag query for their language are skipped.
+        """
+        file_tags: dict[str, list[RawTag]] = {}
+        pending: list[PendingFile] = []
+        errors: dict[str, str] = {}
 
-            captures = QueryCursor(query).captures(tree.root_node)
+        for file_path in file_paths:
+            lang = filename_to_lang(file_path)
+            if not lang:
+                continue
 
-            all_nodes = []
-            for tag, nodes in captures.items():
-                all_nodes.extend([(node, tag) for node in nodes])
+            try:
+                if self.languages.get_query(lang) is None:
+                    continue
+                stat = os.stat(file_path)
+            except Exception as e:
+                errors[file_path] = str(e)
+                continue
 
-            tags = []
-            for node, tag_name in all_nodes:
-                kind = None
-                if tag_name.startswith("name.definition"):
-                    kind = "def"
-                elif tag_name.startswith("name.reference"):
-                    kind = "ref"
+            if not self.tag_cache:
+                pending.append(PendingFile(path=file_path, size=stat.st_size))
+                continue
 
-                if kind:
-                    tags.append(
-                        Tag(
-                            name=node.text.decode("utf8"),
-                            kind=kind,
-                            line=node.start_point[0],
-                        )
+            rel_path = self._get_rel_path(file_path)
+            cached = self.tag_cache.get(rel_path, stat.st_size, stat.st_mtime_ns)
+            if cached is not None:
+                file_tags[rel_path] = cached
+            else:
+                pending.append(
+                    PendingFile(
+                        path=file_path,
+                        size=stat.st_size,
+                        cached_hash=self.tag_cache.get_hash(rel_path),
                     )
+                )
 
-            return tags
-
-        except Exception as e:
-            raise RepoMapExtractionException(
-                f"Failed to extract tags from {file_path}: {str(e)}"
-            ) from e
+        return file_tags, pending, errors
 
-    async def _rank_files(
-        self,
-    ) -> tuple[dict[str, float], dict[tuple[str, str], list[Tag]]]:
-        """
-        Builds a dependency graph and runs PageRank to identify important files and definitions.
+    def _has_tag_query(self, file_path: str) -> bool:
+        lang = filename_to_lang(file_path)
+        if not lang:
+            return False
+        try:
+            return self.languages.get_query(lang) is not None
+        except Exception:
+            # Let extraction surface the compile error for this file.
+            return True
+
+    def _time_left(self) -> float | None:
+        """Seconds until the deadline (never negative), None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - asyncio.get_running_loop().time())
+
+    async def _refresh_graph(self) -> None:
         """
-        defines = defaultdict(set)
-        references = defaultdict(list)
-        definitions = defaultdict(list)
-
-        # collect Tags
-        for file_path in self.all_files:
-            rel_path = self._get_rel_path(file_path)
-            try:
-                tags = await self.extract_tags(file_path)
-            except RepoMapExtractionException as e:
-                logger.warning(str(e))
-                continue
-            for tag in tags:
-                if tag.kind == "def":
-                    defines[tag.name].add(rel_path)
-                    definitions[(rel_path, tag.name)].append(tag)
-                elif tag.kind == "ref":
-                    references[tag.name].append(rel_path)
-
-        # build Graph
-        graph = nx.MultiDiGraph()
+        Brings the graph in line with `all_files`: only new or modified files are
+        extracted, removed files are retracted.
 
-        # Add self-edges for definitions (ensures they have some weight even without refs)
-        for name, definers in defines.items():
-            for definer in definers:
-                graph.add_edge(definer, definer, weight=0.1, ident=name)
+        Extracted files are applied batch by batch. With a deadline, files whose
+        extraction has not finished in time are left out of this turn's ranking (the
+        map is marked incomplete). Their extraction keeps running in the background
+        and fills the graph and the tag cache for the next turn.
+        """
+        files = {
+            self._get_rel_path(f): f for f in self.all_files if self._has_tag_query(f)
+        }
+        changed, removed = await asyncio.to_thread(self.graph.diff, files)
+        # Files being worked on get re-tagged often; keep their parse trees.
+        get_parse_tree_cache().mark_hot(self.active_context_files)
+
+        busy: set[str] = set()
+        if background := self.graph.background_extraction:
+            # A previous turn's extraction is still running: join it, do not redo it.
+            await asyncio.wait({background}, timeout=self._time_left())
+            if not background.done():
+                busy = self.graph.background_paths & changed.keys()
+
+        to_extract = [files[f] for f in changed if f not in busy]
+        file_tags, pending, errors = await asyncio.to_thread(
+            self._lookup_cached, to_extract
+        )
+        # Cache hits and removals first, then extraction results as they arrive.
+        # Unprocessed files are not recorded, so the next turn picks them up.
+        await asyncio.to_thread(
+            self._apply_to_graph, file_tags, errors, changed, removed
+        )
+
+        extraction = asyncio.ensure_future(
+            self._extract_pending(pending, file_tags, errors, stats=changed)
+        )
+        await asyncio.wait({extraction}, timeout=self._time_left())
+
+        if extraction.done():
+            extraction.result()
+        else:
+            self.graph.track_background_extraction(
+                extraction, {self._get_rel_path(p.path) for p in pending}
+            )
+            logger.info(
+                f"RepoMap: Deadline reached with {len(pending)} files pending "
+                f"extraction, continuing in the background."
+            )
 
-        # Add edges from referencer's to definers
-        idents = set(defines.keys()).intersection(set(references.keys()))
+        if busy or not extraction.done():
+            self.complete = False
 
-        active_rel_paths = {self._get_rel_path(f) for f in self.active_context_files}
-        mentioned_rel_paths = {self._get_rel_path(f) for f in self.mentioned_filenames}
+        for file_path, error in list(errors.items()):
+            logger.warning(f"Failed to extract tags from {file_path}: {error}")
 
-        for ident in idents:
-            definers = defines[ident]
+    async def _acquire_graph(self) -> bool:
+        """
+        Takes the graph lock, waiting no longer than the deadline: another generation
+        (e.g. a warm-up) may hold it for a while. Returns False on timeout.
+        """
+        lock = self.graph.lock
+        if lock.locked():
+            try:
+                await asyncio.wait_for(lock.acquire(), self._time_left())
+            except TimeoutError:
+                return False
+        else:
+            await lock.acquire()
+        return True
 
-            # Weight boosting heuristics
-            mul = 1.0
-            if ident.startswith("_"):
-                mul *= 0.1  # Downweight private members
+    async def _rank_files(
+        self,
+    ) -> tuple[dict[str, float], dict[str, list[int]]]:
+        """
+        Updates the dependency graph and runs PageRank to identify important files and definitions.
+        Returns (rank per file, sorted definition lines per file).
+        """
+        if not await self._acquire_graph():
+            # Another generation (e.g. a warm-up) is still refreshing the graph. It
+            # applies extraction batches as they complete, so rank what it has so far.
+            logger.info(
+                "RepoMap: Deadline reached waiting for the repo graph, "
+                "ranking the files processed so far."
+            )
+            self.complete = False
+            return await asyncio.to_thread(self._rank_graph)
 
-            if ident in self.mentioned_idents:
-                mul *= 10.0
+        try:
+            await self._refresh_graph()
+            # Building edges and PageRank over a large graph takes a while.
+            return await asyncio.to_thread(self._rank_graph)
+        finally:
+            self.graph.lock.release()
 
-            # Distribute references
-            for referencer, num_refs in Counter(references[ident]).items():
-                for definer in definers:
-                    # Boost if referenced by active context
-                    weight = mul * num_refs
-                    if referencer in active_rel_paths:
-                        weight *= 10.0
-                    if referencer in mentioned_rel_paths:
-                        weight *= 10.0
+    def _rank_graph(self) -> tuple[dict[str, float], dict[str, list[int]]]:
+        """Blocking part of `_rank_files`: edges, definition lines and PageRank."""
+        nodes, sources, targets, weights = self.graph.edges(self.mentioned_idents)
+        def_lines = self.graph.definition_lines()
 
-                    graph.add_edge(referencer, definer, weight=weight, ident=ident)
+        if not nodes:
+            return {}, def_lines
 
-        if not graph.nodes:
-            return {}, definitions
+        # Active and mentioned files steer the random walk via personalization
+        boosted = [self._get_rel_path(f) for f in self.active_context_files]
+        boosted += [self._get_rel_path(f) for f in self.mentioned_filenames]
 
         try:
-            ranked = nx.pagerank(graph, weight="weight")
+            ranked = self.graph.ranker.rank(
+                nodes,
+                sources,
+                targets,
+                weights,
+                personalization=PageRanker.personalization(nodes, boosted),
+            )
         except Exception as e:
             logger.error(f"RepoMap: PageRank calculation failed: {e}")
-            return {}, definitions
+            return {}, def_lines
 
-        return ranked, definitions
+        return ranked, def_lines
 
     async def _add_active_files_content(
         self, output_parts: list[str], current_tokens: int
@@ -260,11 +478,11 @@ class RepoMap:
             return current_tokens
 
         header = "#### Active Context\n"
-        if current_tokens + self._estimate_token_count(header) >= self.token_limit:
+        if current_tokens + self._count_tokens(header) >= self.token_limit:
             return current_tokens
 
         output_parts.append(header)
-        current_tokens += self._estimate_token_count(header)
+        current_tokens += self._count_tokens(header)
 
         for file_path in sorted(self.active_context_files):
             rel_path = self._get_rel_path(file_path)
@@ -276,7 +494,7 @@ class RepoMap:
                 ext = Path(rel_path).suffix.lstrip(".")
                 block = f"```{ext}\n{content}\n```\n"
 
-                tokens = self._estimate_token_count(header + block)
+                tokens = await self.token_counter.acount(header + block)
                 if current_tokens + tokens > self.token_limit:
                     continue
 
@@ -288,21 +506,44 @@ class RepoMap:
 
         return current_tokens
 
+    async def _render_entry(self, rel_path: str, lois: list[int]) -> tuple[str, int]:
+        """
+        Returns a ranked definitions entry for a file and its token count,
+        served from the graph's snippet cache when the file and its lines of
+        interest did not change.
+        """
+        stat = self.graph.get_stat(rel_path)
+        key = SnippetCache.key(rel_path, stat, lois) if stat else None
+        if key and (cached := self.graph.snippets.get(key)):
+            return cached
+
+        abs_path = os.path.join(self.root, rel_path)
+        async with aiofiles.open(abs_path, encoding="utf-8") as f:
+            code = await f.read()
+
+        snippet = await asyncio.to_thread(render_snippet, rel_path, code, lois)
+        entry = f"{rel_path}:\n{snippet}\n"
+        entry_tokens = await self.token_counter.acount(entry)
+
+        if key:
+            self.graph.snippets.set(key, entry, entry_tokens)
+        return entry, entry_tokens
+
     async def _add_ranked_definitions(
         self, output_parts: list[str], current_tokens: int
     ) -> None:
         """
         Adds ranked snippets from the repository.
         """
-        ranked_files, definitions = await self._rank_files()
+        ranked_files, def_lines = await self._rank_files()
         if not ranked_files:
             return
 
         header = "#### Ranked Definitions\n"
-        if current_tokens + self._estimate_token_count(header) > self.token_limit:
+        if current_tokens + self._count_tokens(header) > self.token_limit:
             return
         output_parts.append(header)
-        current_tokens += self._estimate_token_count(header)
+        current_tokens += self._count_tokens(header)
 
         # Sort files by rank
         sorted_files = sorted(ranked_files.items(), key=lambda x: x[1], reverse=True)
@@ -310,42 +551,50 @@ class RepoMap:
         # Active files are already added in full, so we skip them here
         active_rel_paths = {self._get_rel_path(f) for f in self.active_context_files}
 
+        # Snippets are packed greedily in rank order: one that does not fit is skipped
+        # and cheaper, lower ranked ones are tried instead. Room for the truncation
+        # notice is reserved so the map never exceeds the budget.
+        notice = self.DEFINITIONS_TRUNCATED_NOTICE
+        budget = self.token_limit - current_tokens - self._count_tokens(notice)
+        truncated = False
+        misses = 0
+        rendered = 0
+
         for rel_path, _rank in sorted_files:
             if rel_path in active_rel_paths:
                 continue
 
-            # Get all tags for this file
-            file_tags = []
-            for (f, _name), tags in definitions.items():
-                if f == rel_path:
-                    file_tags.extend(tags)
-
-            if not file_tags:
+            # Lines of interest (definitions)
+            lois = def_lines.get(rel_path)
+            if not lois:
                 continue
 
-            # Identify lines of interest (definitions)
-            lois = sorted({tag.line for tag in file_tags})
+            if budget <= 0 or misses >= self.MAX_PACKING_MISSES:
+                truncated = True
+                break
 
-            try:
-                abs_path = os.path.join(self.root, rel_path)
-                async with aiofiles.open(abs_path, encoding="utf-8") as f:
-                    code = await f.read()
+            # At least the top entry is rendered, even past the deadline (e.g. after
+            # waiting out a busy graph), so a ranking never goes unused.
+            if self._time_left() == 0 and rendered:
+                self.complete = False
+                truncated = True
+                break
 
-                tc = TreeContext(rel_path, code)
-                tc.add_lines_of_interest(lois)
-                tc.add_context()
-                snippet = tc.format()
+            try:
+                entry, entry_tokens = await self._render_entry(rel_path, lois)
+            except Exception as e:
+                logger.error(f"RepoMap: Error generating snippet for {rel_path}: {e}")
+                continue
 
-                entry = f"{rel_path}:\n{snippet}\n"
-                entry_tokens = self._estimate_token_count(entry)
+            if entry_tokens > budget:
+                truncated = True
+                misses += 1
+                continue
 
-                if current_tokens + entry_tokens > self.token_limit:
-                    output_parts.append(
-                        "\n... (remaining definitions truncated due to token limit)\n"
-                    )
-                    return
+            output_parts.append(entry)
+            budget -= entry_tokens
+            misses = 0
+            rendered += 1
 
-                output_parts.append(entry)
-                current_tokens += entry_tokens
-            except Exception as e:
-                logger.error(f"RepoMap: Error generating snippet for {rel_path}: {e}")
+        if truncated:
+            output_parts.append(notice)
@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+from grep_ast import TreeContext
+
+from app.context.repomap.extraction import hash_content
+
+# (rel_path, size, mtime_ns, hash of the lines of interest)
+SnippetKey = tuple[str, int, int, str]
+
+
+def render_snippet(rel_path: str, code: str, lois: list[int]) -> str:
+    """Renders the lines of interest of a file with their enclosing scopes."""
+    tc = TreeContext(rel_path, code)
+    tc.add_lines_of_interest(lois)
+    tc.add_context()
+    return tc.format()
+
+
+class SnippetCache:
+    """
+    In-memory LRU of rendered ranked-definition entries and their token counts.
+
+    Entries are keyed by the file's stat and the lines of interest, so a file that
+    did not change (and whose definitions did not move) is never re-read or
+    re-parsed by TreeContext.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[SnippetKey, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(rel_path: str, stat: tuple[int, int], lois: list[int]) -> SnippetKey:
+        size, mtime_ns = stat
+        return rel_path, size, mtime_ns, hash_content(",".join(map(str, lois)))
+
+    def get(self, key: SnippetKey) -> tuple[str, int] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: SnippetKey, entry: str, tokens: int) -> None:
+        with self._lock:
+            self._entries[key] = (entry, tokens)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
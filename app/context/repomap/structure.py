@@ -0,0 +1,117 @@
+import os
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class DirNode:
+    path: str  # relative path with a trailing "/", "" for the root
+    dirs: dict[str, "DirNode"] = field(default_factory=dict)
+    files: list[str] = field(default_factory=list)
+    total_files: int = 0
+
+    @property
+    def summary(self) -> str:
+        noun = "file" if self.total_files == 1 else "files"
+        return f"{self.path} ({self.total_files} {noun})\n"
+
+
+def build_tree(rel_paths: list[str]) -> DirNode:
+    root = DirNode(path="")
+    for rel_path in rel_paths:
+        node = root
+        node.total_files += 1
+        for part in rel_path.split(os.sep)[:-1]:
+            child = node.dirs.get(part)
+            if child is None:
+                child = node.dirs[part] = DirNode(path=f"{node.path}{part}/")
+            node = child
+            node.total_files += 1
+        node.files.append(rel_path)
+    return root
+
+
+def file_list_notice(omitted: int) -> str:
+    return f"... (file list truncated, {omitted} more files)\n"
+
+
+class FileStructureRenderer:
+    """
+    Renders the project's file list within a token budget.
+
+    Paths are listed in full, directories before files. When the whole list does not
+    fit, directories are collapsed to `dir/ (N files)` summaries and expanded
+    breadth-first while the budget allows, so the top level is always visible and
+    deeper levels fill whatever budget is left.
+    """
+
+    def __init__(self, rel_paths: list[str], count_tokens: Callable[[str], int]):
+        self.root = build_tree(rel_paths)
+        self.count_tokens = count_tokens
+
+    def render(self, budget: int) -> tuple[list[str], int]:
+        """Returns (lines, tokens used)."""
+        full = self._render(self.root, expanded=None)
+        full_tokens = self.count_tokens("".join(full))
+        if full_tokens <= budget:
+            return full, full_tokens
+
+        root_cost = self._expansion_cost(self.root)
+        if root_cost > budget:
+            return self._render_truncated_root(budget)
+
+        expanded = {self.root.path}
+        remaining = budget - root_cost
+        queue = deque(self._subdirs(self.root))
+        # Breadth-first: a directory that does not fit stays collapsed, but its
+        # siblings and cousins are still tried.
+        while queue:
+            node = queue.popleft()
+            cost = self._expansion_cost(node) - self.count_tokens(node.summary)
+            if cost <= remaining:
+                expanded.add(node.path)
+                remaining -= cost
+                queue.extend(self._subdirs(node))
+
+        return self._render(self.root, expanded), budget - remaining
+
+    @staticmethod
+    def _subdirs(node: DirNode) -> list[DirNode]:
+        return [node.dirs[name] for name in sorted(node.dirs)]
+
+    def _expansion_cost(self, node: DirNode) -> int:
+        """Tokens of a directory's direct children when it is expanded."""
+        cost = sum(self.count_tokens(sub.summary) for sub in node.dirs.values())
+        return cost + sum(self.count_tokens(f"{f}\n") for f in node.files)
+
+    def _render(self, node: DirNode, expanded: set[str] | None) -> list[str]:
+        lines = []
+        for sub in self._subdirs(node):
+            if expanded is None or sub.path in expanded:
+                lines.extend(self._render(sub, expanded))
+            else:
+                lines.append(sub.summary)
+        lines.extend(f"{f}\n" for f in sorted(node.files))
+        return lines
+
+    def _render_truncated_root(self, budget: int) -> tuple[list[str], int]:
+        """Top-level directories stay visible; top-level files fill the rest."""
+        lines = [sub.summary for sub in self._subdirs(self.root)]
+        used = sum(self.count_tokens(line) for line in lines)
+        files = sorted(self.root.files)
+        remaining = budget - used - self.count_tokens(file_list_notice(len(files)))
+
+        shown = 0
+        for rel_path in files:
+            line_tokens = self.count_tokens(f"{rel_path}\n")
+            if line_tokens > remaining:
+                break
+            lines.append(f"{rel_path}\n")
+            remaining -= line_tokens
+            used += line_tokens
+            shown += 1
+
+        notice = file_list_notice(len(files) - shown)
+        lines.append(notice)
+        return lines, used + self.count_tokens(notice)
@@ -0,0 +1,103 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.context.repomap.extraction import RawTag
+from app.context.schemas import Tag
+
+KIND_DEF = 0
+KIND_REF = 1
+KIND_CODES = {"def": KIND_DEF, "ref": KIND_REF}
+KIND_NAMES = ("def", "ref")
+
+
+class IdentTable:
+    """
+    Interns identifier names to dense integer ids.
+
+    Ids are never reused, so they stay valid for as long as the table lives. The
+    table only grows with the project's vocabulary, not with its number of tags.
+    Not thread-safe: it is owned by a RepoGraph and used under its lock.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+
+    def intern(self, name: str) -> int:
+        ident_id = self._ids.get(name)
+        if ident_id is None:
+            ident_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return ident_id
+
+    def get(self, name: str) -> int | None:
+        return self._ids.get(name)
+
+    def name(self, ident_id: int) -> str:
+        return self._names[ident_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+@dataclass(slots=True, eq=False)
+class FileTags:
+    """
+    Tags of one file as parallel columns: interned identifier, kind code and line.
+    """
+
+    idents: np.ndarray  # int32 ids into an IdentTable
+    kinds: np.ndarray  # int8, KIND_DEF or KIND_REF
+    lines: np.ndarray  # int32, 0-based
+
+    @classmethod
+    def from_raw(cls, raw_tags: Sequence[RawTag], table: IdentTable) -> "FileTags":
+        if not raw_tags:
+            return cls(
+                idents=np.empty(0, dtype=np.int32),
+                kinds=np.empty(0, dtype=np.int8),
+                lines=np.empty(0, dtype=np.int32),
+            )
+        names, kinds, lines = zip(*raw_tags, strict=True)
+        return cls(
+            idents=np.fromiter(map(table.intern, names), np.int32, len(names)),
+            kinds=np.fromiter(map(KIND_CODES.__getitem__, kinds), np.int8, len(kinds)),
+            lines=np.array(lines, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.idents)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FileTags):
+            return NotImplemented
+        return (
+            np.array_equal(self.idents, other.idents)
+            and np.array_equal(self.kinds, other.kinds)
+            and np.array_equal(self.lines, other.lines)
+        )
+
+    def defined(self) -> np.ndarray:
+        """Distinct identifiers this file defines."""
+        return np.unique(self.idents[self.kinds == KIND_DEF])
+
+    def referenced(self) -> tuple[np.ndarray, np.ndarray]:
+        """Distinct identifiers this file references, and how often each."""
+        return np.unique(self.idents[self.kinds == KIND_REF], return_counts=True)
+
+    def definition_lines(self) -> list[int]:
+        """Sorted distinct lines holding a definition."""
+        return np.unique(self.lines[self.kinds == KIND_DEF]).tolist()
+
+    def to_tags(self, table: IdentTable) -> list[Tag]:
+        return [
+            Tag(name=table.name(ident), kind=KIND_NAMES[kind], line=line)
+            for ident, kind, line in zip(
+                self.idents.tolist(),
+                self.kinds.tolist(),
+                self.lines.tolist(),
+                strict=True,
+            )
+        ]
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import tiktoken
+
+from app.context.repomap.extraction import hash_content
+
+logger = logging.getLogger(__name__)
+
+TOKEN_ENCODING = "cl100k_base"
+# Texts up to this many characters are encoded inline by `acount`, larger ones in a
+# worker thread.
+INLINE_COUNT_CHARS = 4096
+
+
+class TokenCounter:
+    """
+    Tokenizer-backed token counts for repo map sections.
+
+    Counts are cached by content hash (LRU), so the file list, active files and
+    snippets that did not change between turns are never re-encoded. If the encoding
+    cannot be loaded (e.g. offline without a cached BPE file) it falls back to a
+    characters / 4 estimate, rounded up so that summed counts stay an upper bound.
+
+    Loading the encoding may download its BPE file: async callers use `acount`, which
+    loads it and encodes large texts in a worker thread.
+    """
+
+    def __init__(
+        self,
+        encoding_name: str = TOKEN_ENCODING,
+        max_entries: int = 50_000,
+        encoding: Any | None = None,
+    ):
+        self.encoding_name = encoding_name
+        self.max_entries = max_entries
+        self._encoding = encoding
+        self._encoding_failed = False
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the encoding is loaded, or failed to load."""
+        return self._encoding is not None or self._encoding_failed
+
+    def load(self) -> None:
+        """Loads the encoding ahead of the first count. Blocking."""
+        self._get_encoding()
+
+    def _get_encoding(self) -> Any | None:
+        if self.loaded:
+            return self._encoding
+        with self._load_lock:
+            if self._encoding is None and not self._encoding_failed:
+                try:
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+                except Exception as e:
+                    self._encoding_failed = True
+                    logger.warning(
+                        f"RepoMap: Could not load {self.encoding_name} encoding, "
+                        f"estimating tokens from length: {e}"
+                    )
+        return self._encoding
+
+    def _encode_count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return math.ceil(len(text) / 4)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+
+        key = hash_content(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        return self._store(key, self._encode_count(text))
+
+    async def acount(self, text: str) -> int:
+        """
+        Like `count`, but loads the encoding and encodes texts over
+        INLINE_COUNT_CHARS in a worker thread.
+        """
+        if not text:
+            return 0
+
+        key = hash_content(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        if self.loaded and len(text) <= INLINE_COUNT_CHARS:
+            tokens = self._encode_count(text)
+        else:
+            tokens = await asyncio.to_thread(self._encode_count, text)
+        return self._store(key, tokens)
+
+    def _lookup(self, key: str) -> int | None:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+            return cached
+
+    def _store(self, key: str, tokens: int) -> int:
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+_counter: TokenCounter | None = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Returns the process-wide token counter shared by all repo maps."""
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = TokenCounter()
+        return _counter
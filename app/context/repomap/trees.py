@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from tree_sitter import Parser, Point, Tree
+
+
+@dataclass(slots=True, frozen=True)
+class SourceEdit:
+    """A single contiguous replacement turning one source into another."""
+
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: Point
+    old_end_point: Point
+    new_end_point: Point
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    # Binary search over slice comparisons: O(n log n) in C instead of a Python loop.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: bytes, b: bytes, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid :] == b[len(b) - mid :]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point(source: bytes, offset: int) -> Point:
+    row = source.count(b"\n", 0, offset)
+    return Point(row, offset - (source.rfind(b"\n", 0, offset) + 1))
+
+
+def compute_edit(old: bytes, new: bytes) -> SourceEdit | None:
+    """
+    Returns the smallest single edit turning `old` into `new`, None if they are
+    equal. Several hunks collapse into one edit spanning all of them, which is
+    still far cheaper to reparse than the whole file when the hunks are close.
+    """
+    if old == new:
+        return None
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+    old_end, new_end = len(old) - suffix, len(new) - suffix
+    return SourceEdit(
+        start_byte=prefix,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point(old, prefix),
+        old_end_point=_point(old, old_end),
+        new_end_point=_point(new, new_end),
+    )
+
+
+class ParseTreeCache:
+    """
+    Keeps the Tree-sitter trees of hot files (active context and recently patched
+    files) so re-tagging them after an edit is an incremental reparse.
+
+    Files are marked hot up front; their first parse is a full one and keeps the
+    tree, later parses diff the old source against the new one, apply the edit to
+    the old tree and let Tree-sitter reuse every unchanged subtree. Bounded LRU;
+    only the in-process extraction path uses it.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        # abs path -> (source, tree) of the last parse, None until first parsed
+        self._entries: OrderedDict[str, tuple[bytes, Tree] | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark_hot(self, file_paths: Iterable[str]) -> None:
+        with self._lock:
+            for file_path in file_paths:
+                key = os.path.abspath(file_path)
+                self._entries.setdefault(key, None)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_hot(self, file_path: str) -> bool:
+        with self._lock:
+            return os.path.abspath(file_path) in self._entries
+
+    def parse(self, parser: Parser, file_path: str, source: bytes) -> Tree:
+        """
+        Parses `source`, reusing the file's previous tree when there is one.
+        The tree is kept only if the file is still hot.
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            # Taken out while in use: tree.edit() mutates it in place.
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._entries[key] = None
+
+        if previous is not None:
+            old_source, old_tree = previous
+            edit = compute_edit(old_source, source)
+            if edit is None:
+                tree = old_tree
+            else:
+                old_tree.edit(
+                    start_byte=edit.start_byte,
+                    old_end_byte=edit.old_end_byte,
+                    new_end_byte=edit.new_end_byte,
+                    start_point=edit.start_point,
+                    old_end_point=edit.old_end_point,
+                    new_end_point=edit.new_end_point,
+                )
+                tree = parser.parse(source, old_tree)
+        else:
+            tree = parser.parse(source)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (source, tree)
+                self._entries.move_to_end(key)
+        return tree
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_trees = ParseTreeCache()
+
+
+def get_parse_tree_cache() -> ParseTreeCache:
+    """Returns the process-wide cache of hot files' parse trees."""
+    return _trees
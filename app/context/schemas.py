@@ -44,6 +44,12 @@ class FileReadResult(BaseModel):
     error_message: str | None = None
 
 
+class RepoMapResult(BaseModel):
+    content: str
+    # False when the time budget cut generation short (partial map).
+    complete: bool = True
+
+
 class FileTreeNode(BaseModel):
     """
     Represents a node in the file system (File or Folder).
@@ -1,13 +1,145 @@
+import asyncio
+import bisect
 import glob
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import NamedTuple
 
 import aiofiles
 import aiofiles.os
 from pathspec import PathSpec
-
+from pathspec.util import normalize_file
+
+from app.context.gitfiles import (
+    MODE_GITLINK,
+    MODE_SYMLINK,
+    GitFile,
+    is_git_checkout,
+    list_git_files,
+)
 from app.context.schemas import FileReadResult, FileStatus, FileTreeNode
+from app.core.config import settings
 
 SCAN_ALL_PATTERN = ["."]
+# Files read at once by read_files; each read holds a worker thread.
+MAX_CONCURRENT_READS = 16
+
+# (project root, extra patterns) -> (.gitignore (mtime_ns, size) or None, spec)
+_SpecKey = tuple[str, tuple[str, ...]]
+_spec_cache: OrderedDict[_SpecKey, tuple[tuple[int, int] | None, "IgnoreSpec"]] = (
+    OrderedDict()
+)
+_spec_cache_lock = threading.Lock()
+_SPEC_CACHE_MAX_ENTRIES = 64
+
+
+def clear_ignore_specs() -> None:
+    with _spec_cache_lock:
+        _spec_cache.clear()
+
+
+# Shapes of compiled gitignore patterns that match a single path segment anywhere
+# in the path (pattern without a slash): `name`, `name/`, `*.ext` and `*.ext/`.
+_ANY_DEPTH = "^(?:.+/)?"
+_LITERAL = r"(?:\\.|[^\\\[\]().*+?{}|^$/])+"
+_END = r"(?P<end>\(\?:/\|\$\)|/)"
+_NAME_RE = re.compile(rf"(?P<lit>{_LITERAL}){_END}")
+_SUFFIX_RE = re.compile(rf"\[\^/\]\*(?P<lit>{_LITERAL}){_END}")
+
+
+def _unescape(literal: str) -> str:
+    return re.sub(r"\\(.)", r"\1", literal)
+
+
+class IgnoreSpec:
+    """
+    gitignore patterns compiled for fast per-path checks.
+
+    Most patterns name a single path segment at any depth (`node_modules/`, `.env`,
+    `*.pyc`). Those go into hash tables keyed by segment name or extension, so a
+    path is checked with one lookup per segment however many patterns there are.
+    The remaining patterns (anchored or multi-segment) are joined into one regex,
+    in reverse order and each in its own group: the engine stops at the first
+    alternative that matches, i.e. the last one in file order.
+
+    As in gitignore the last matching pattern wins (a later `!pattern`
+    re-includes), so every table stores pattern indexes and the highest matching
+    index decides.
+    """
+
+    def __init__(self, lines: list[str]):
+        self.spec = PathSpec.from_lines("gitignore", lines)
+        patterns = [p for p in self.spec.patterns if p.include is not None and p.regex]
+        self._includes = [p.include for p in patterns]
+        # segment -> (last index matching it as a file, last index matching it as
+        # a directory, i.e. followed by "/"); `name/` patterns only match the latter
+        self._segments: dict[str, tuple[int, int]] = {}
+        # last extension -> [(suffix, pattern index, dir only)]
+        self._suffixes: dict[str, list[tuple[str, int, bool]]] = {}
+        rest: list[tuple[int, str]] = []
+
+        for index, pattern in enumerate(patterns):
+            source = pattern.regex.pattern
+            if source.startswith(_ANY_DEPTH):
+                body = source[len(_ANY_DEPTH) :]
+                if match := _NAME_RE.fullmatch(body):
+                    segment = _unescape(match["lit"])
+                    as_file = self._segments.get(segment, (-1, -1))[0]
+                    if match["end"] != "/":
+                        as_file = index
+                    # Indexes only grow, so this pattern is the last one for dirs.
+                    self._segments[segment] = (as_file, index)
+                    continue
+                match = _SUFFIX_RE.fullmatch(body)
+                if match and (suffix := _unescape(match["lit"])).startswith("."):
+                    extension = suffix[suffix.rfind(".") :]
+                    self._suffixes.setdefault(extension, []).append(
+                        (suffix, index, match["end"] == "/")
+                    )
+                    continue
+            rest.append((index, source))
+
+        self._rest_indexes = [index for index, _ in reversed(rest)]
+        self._regex = None
+        if rest:
+            # Named groups repeat across patterns; only the outer groups are needed.
+            self._regex = re.compile(
+                "|".join(
+                    "(" + re.sub(r"\(\?P<\w+>", "(?:", source) + ")"
+                    for _, source in reversed(rest)
+                )
+            )
+
+    def match_file(self, path: str) -> bool:
+        path = normalize_file(path)
+        best = -1
+        if self._regex is not None and (match := self._regex.match(path)):
+            best = self._rest_indexes[match.lastindex - 1]
+
+        *parents, name = path.split("/")
+        for segment in parents:
+            best = self._match_segment(segment, best, is_dir=True)
+        best = self._match_segment(name, best, is_dir=False)
+        return best >= 0 and self._includes[best]
+
+    def _match_segment(self, segment: str, best: int, is_dir: bool) -> int:
+        if (hit := self._segments.get(segment)) is not None:
+            best = max(best, hit[is_dir])
+        dot = segment.rfind(".")
+        if dot >= 0 and (candidates := self._suffixes.get(segment[dot:])):
+            for suffix, index, dir_only in candidates:
+                if (
+                    index > best
+                    and segment.endswith(suffix)
+                    and (is_dir or not dir_only)
+                ):
+                    best = index
+        return best
 
 
 class _IgnoreMatcher:
@@ -37,26 +169,441 @@ class _IgnoreMatcher:
     ]
 
     @staticmethod
-    def matches(spec: PathSpec, path: str, is_dir: bool = False) -> bool:
+    def matches(spec: IgnoreSpec, path: str, is_dir: bool = False) -> bool:
         check_path = f"{path}/" if is_dir else path
         return spec.match_file(check_path)
 
     async def get_spec(
         self, project_root: str, extra_patterns: list[str] | None = None
-    ) -> PathSpec:
+    ) -> IgnoreSpec:
+        """
+        Returns the compiled spec for a project, shared process-wide. It is only
+        rebuilt when the project's .gitignore changes (mtime or size), so per-file
+        checks cost one stat plus a match instead of a read and a compile.
+        """
         root = Path(project_root)
         gitignore_path = root / ".gitignore"
-        lines = self.DEFAULT_PATTERNS[:]
+        key = (os.path.abspath(project_root), tuple(extra_patterns or ()))
+
+        try:
+            st = await aiofiles.os.stat(gitignore_path)
+            version = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            version = None
+
+        with _spec_cache_lock:
+            cached = _spec_cache.get(key)
+            if cached is not None and cached[0] == version:
+                _spec_cache.move_to_end(key)
+                return cached[1]
 
-        if await aiofiles.os.path.exists(gitignore_path):
-            async with aiofiles.open(gitignore_path) as f:
-                content = await f.read()
-                lines.extend(content.splitlines())
+        lines = self.DEFAULT_PATTERNS[:]
+        if version is not None:
+            try:
+                async with aiofiles.open(gitignore_path) as f:
+                    content = await f.read()
+                    lines.extend(content.splitlines())
+            except OSError:
+                version = None
 
         if extra_patterns:
             lines.extend(p for p in extra_patterns if p.strip())
 
-        return PathSpec.from_lines("gitignore", lines)
+        spec = IgnoreSpec(lines)
+        with _spec_cache_lock:
+            _spec_cache[key] = (version, spec)
+            _spec_cache.move_to_end(key)
+            if len(_spec_cache) > _SPEC_CACHE_MAX_ENTRIES:
+                _spec_cache.popitem(last=False)
+        return spec
+
+
+class ScanEntry(NamedTuple):
+    path: str  # relative to the project root, "/"-separated
+    is_dir: bool
+    is_symlink: bool
+
+
+def _scan_dir(
+    dir_path: str, prefix: str, spec: IgnoreSpec
+) -> list[tuple[ScanEntry, str]]:
+    """Non-ignored children of a directory, with their absolute paths."""
+    children = []
+    with os.scandir(dir_path) as it:
+        for child in it:
+            rel_path = prefix + child.name
+            try:
+                is_dir = child.is_dir()
+                is_symlink = child.is_symlink()
+            except OSError:
+                continue
+            if spec.match_file(f"{rel_path}/" if is_dir else rel_path):
+                continue
+            children.append((ScanEntry(rel_path, is_dir, is_symlink), child.path))
+    return children
+
+
+def _rel_prefix(project_root: str | Path, path: str | Path) -> str:
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(project_root))
+    return "" if rel == "." else rel.replace(os.sep, "/") + "/"
+
+
+def scan_project(
+    project_root: str | Path,
+    start: str | Path,
+    spec: IgnoreSpec,
+    recursive: bool = True,
+) -> list[ScanEntry]:
+    """
+    Lists the non-ignored entries under `start` with a single os.scandir traversal.
+
+    Blocking: callers run it in one worker thread (asyncio.to_thread) instead of
+    paying an executor hop per listdir/isdir/islink call. Entry types come from
+    the DirEntry (no extra stat on most filesystems), ignored directories are
+    pruned before descending and symlinked directories are listed but not
+    followed. Unreadable subdirectories are skipped; an unreadable `start`
+    raises OSError.
+    """
+    start = os.path.abspath(start)
+    entries: list[ScanEntry] = []
+    stack = [(start, _rel_prefix(project_root, start))]
+    while stack:
+        dir_path, prefix = stack.pop()
+        try:
+            children = _scan_dir(dir_path, prefix, spec)
+        except OSError:
+            if dir_path == start:
+                raise
+            continue
+
+        for entry, abs_path in children:
+            entries.append(entry)
+            if recursive and entry.is_dir and not entry.is_symlink:
+                stack.append((abs_path, f"{entry.path}/"))
+
+    return entries
+
+
+class FileIndex:
+    """
+    In-memory listing of a project's non-ignored entries, kept current without
+    rescanning the tree.
+
+    Each indexed directory is stored with its mtime. Adding, removing or renaming
+    an entry changes its parent directory's mtime, so revalidating is one stat per
+    directory and only the directories that changed are rescanned. Queries trust
+    the index for `max_age` seconds after a revalidation; `mark_stale` (called on
+    our own writes) forces the next query to revalidate, so patches show up at
+    once. Blocking and thread-safe: callers use it from a worker thread.
+
+    With `use_git`, listings come from the git index (`git ls-files`) instead of a
+    walk, and any directory change triggers one relisting. git then also honors
+    nested .gitignore files and the repository excludes, and the listing is the
+    authority on what is ignored (see `excludes`). The walker is the fallback
+    when git fails.
+    """
+
+    def __init__(
+        self,
+        project_root: str,
+        spec: IgnoreSpec,
+        max_age: float = 1.0,
+        use_git: bool = False,
+    ):
+        self.root = os.path.abspath(project_root)
+        self.spec = spec
+        self.max_age = max_age
+        self.use_git = use_git
+        # True when the current listing came from git rather than the walker
+        self._git_listed = False
+        # rel dir prefix ("" for the root, else "a/b/") -> (mtime_ns, children)
+        self._dirs: dict[str, tuple[int, list[ScanEntry]]] = {}
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self._checked_at = None
+
+    def entries(self, start: str | Path, recursive: bool = True) -> list[ScanEntry]:
+        """
+        Same as scan_project(root, start, spec, recursive). Starts outside the index
+        (ignored or symlinked directories) fall back to a direct scan.
+        """
+        prefix = _rel_prefix(self.root, start)
+        with self._lock:
+            self._revalidate()
+            if prefix not in self._dirs:
+                if self._excludes(prefix.rstrip("/")):
+                    return []
+                return scan_project(self.root, start, self.spec, recursive)
+
+            entries: list[ScanEntry] = []
+            stack = [prefix]
+            while stack:
+                for entry in self._dirs[stack.pop()][1]:
+                    entries.append(entry)
+                    if recursive and f"{entry.path}/" in self._dirs:
+                        stack.append(f"{entry.path}/")
+            return entries
+
+    def excludes(self, rel_path: str) -> bool:
+        """
+        True when git listed the project and left out this existing path: it is
+        ignored by rules the spec does not know (nested .gitignore files, the
+        repository excludes). Always False for walker listings, where the spec
+        alone decides, and for paths that do not exist yet.
+        """
+        with self._lock:
+            self._revalidate()
+            return self._excludes(rel_path)
+
+    def _excludes(self, rel_path: str) -> bool:
+        if not self._git_listed or rel_path in ("", "."):
+            return False
+        if not os.path.lexists(self._abs(rel_path)):
+            return False
+
+        prefix = ""
+        parts = rel_path.split("/")
+        for depth in range(1, len(parts) + 1):
+            path = "/".join(parts[:depth])
+            children = self._dirs.get(prefix, (0, []))[1]
+            entry = next((e for e in children if e.path == path), None)
+            if entry is None:
+                return True
+            if entry.is_symlink:
+                # listed by git; the spec decides for what lies behind it
+                return False
+            prefix = f"{path}/"
+        return False
+
+    def _revalidate(self) -> None:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.max_age:
+            return
+        if not self._dirs:
+            self._build()
+            self._checked_at = now
+            return
+
+        changed = []
+        for prefix, (mtime_ns, _) in self._dirs.items():
+            try:
+                if os.stat(self._abs(prefix)).st_mtime_ns != mtime_ns:
+                    changed.append(prefix)
+            except OSError:
+                changed.append(prefix)
+
+        if changed and self.use_git:
+            self._build()
+        else:
+            for prefix in changed:
+                # skips directories dropped with a parent rescanned before them
+                if prefix in self._dirs:
+                    self._index(prefix)
+        self._checked_at = now
+
+    def _build(self) -> None:
+        files = list_git_files(self.root) if self.use_git else None
+        self._dirs.clear()
+        self._git_listed = files is not None
+        if files is None:
+            self._index("")
+        else:
+            self._index_git_files(files)
+
+    def _index_git_files(self, files: list[GitFile]) -> None:
+        """Builds the index from `git ls-files` output, filtered through the spec."""
+        dirs: dict[str, list[ScanEntry]] = {"": []}
+        allowed: dict[str, bool] = {"": True}
+
+        def dir_allowed(prefix: str) -> bool:
+            if (ok := allowed.get(prefix)) is None:
+                parent = prefix[:-1].rpartition("/")[0]
+                ok = dir_allowed(f"{parent}/" if parent else "")
+                ok = allowed[prefix] = ok and not self.spec.match_file(prefix)
+            return ok
+
+        submodules = []
+        for path, mode in files:
+            parent = path.rpartition("/")[0]
+            prefix = f"{parent}/" if parent else ""
+            if not dir_allowed(prefix) or self.spec.match_file(path):
+                continue
+
+            created = []
+            missing = prefix
+            while missing not in dirs:
+                dirs[missing] = []
+                created.append(missing[:-1])
+                grandparent = missing[:-1].rpartition("/")[0]
+                missing = f"{grandparent}/" if grandparent else ""
+            for name in created:
+                grandparent = name.rpartition("/")[0]
+                dirs[f"{grandparent}/" if grandparent else ""].append(
+                    ScanEntry(name, True, False)
+                )
+
+            if mode == MODE_GITLINK:
+                submodules.append(f"{path}/")
+                entry = ScanEntry(path, True, False)
+            elif mode == MODE_SYMLINK:
+                entry = ScanEntry(path, os.path.isdir(self._abs(path)), True)
+            else:
+                entry = ScanEntry(path, False, False)
+            dirs[prefix].append(entry)
+
+        for prefix, children in dirs.items():
+            try:
+                mtime_ns = os.stat(self._abs(prefix)).st_mtime_ns
+            except OSError:
+                mtime_ns = -1  # relisted on the next revalidation
+            self._dirs[prefix] = (mtime_ns, children)
+
+        # Submodule contents are not in the superproject's index.
+        for prefix in submodules:
+            self._index(prefix)
+
+    def _index(self, prefix: str) -> None:
+        """(Re)scans a directory, dropping removed subtrees and indexing new ones."""
+        stack = [prefix]
+        while stack:
+            current = stack.pop()
+            previous = self._dirs.pop(current, None)
+            try:
+                mtime_ns = os.stat(self._abs(current)).st_mtime_ns
+                children = [
+                    entry
+                    for entry, _ in _scan_dir(self._abs(current), current, self.spec)
+                ]
+            except OSError:
+                if current == "":
+                    raise
+                self._drop(current)
+                continue
+
+            self._dirs[current] = (mtime_ns, children)
+            subdirs = {
+                f"{entry.path}/"
+                for entry in children
+                if entry.is_dir and not entry.is_symlink
+            }
+            for entry in previous[1] if previous else ():
+                if f"{entry.path}/" not in subdirs:
+                    self._drop(f"{entry.path}/")
+            stack.extend(subdir for subdir in subdirs if subdir not in self._dirs)
+
+    def _drop(self, prefix: str) -> None:
+        for key in [k for k in self._dirs if k.startswith(prefix)]:
+            del self._dirs[key]
+
+    def _abs(self, prefix: str) -> str:
+        return os.path.join(self.root, prefix) if prefix else self.root
+
+
+_file_indexes: OrderedDict[tuple[str, IgnoreSpec], FileIndex] = OrderedDict()
+_file_indexes_lock = threading.Lock()
+_FILE_INDEX_MAX_ENTRIES = 16
+
+
+def get_file_index(project_root: str | Path, spec: IgnoreSpec) -> FileIndex:
+    """
+    Returns the process-wide index of a project's files under `spec`. A changed
+    .gitignore yields a new spec, hence a fresh index.
+    """
+    key = (os.path.abspath(project_root), spec)
+    with _file_indexes_lock:
+        index = _file_indexes.get(key)
+        if index is None:
+            index = _file_indexes[key] = FileIndex(
+                key[0],
+                spec,
+                max_age=settings.FILE_INDEX_MAX_AGE,
+                use_git=settings.FILE_INDEX_USE_GIT and is_git_checkout(key[0]),
+            )
+        _file_indexes.move_to_end(key)
+        if len(_file_indexes) > _FILE_INDEX_MAX_ENTRIES:
+            _file_indexes.popitem(last=False)
+        return index
+
+
+def mark_file_indexes_stale(project_root: str | Path) -> None:
+    root = os.path.abspath(project_root)
+    with _file_indexes_lock:
+        indexes = [index for (r, _), index in _file_indexes.items() if r == root]
+    for index in indexes:
+        index.mark_stale()
+
+
+def clear_file_indexes() -> None:
+    with _file_indexes_lock:
+        _file_indexes.clear()
+
+
+class FileContentCache:
+    """
+    LRU of decoded file contents, bounded by the memory their strings take
+    (sys.getsizeof, which can be several times the size on disk: a single non-Latin-1
+    character stores the whole string with 2 or 4 bytes per character).
+
+    Entries are keyed by absolute path and checked against the file's (mtime_ns,
+    size) on every lookup, so edited files are re-read while a file read several
+    times in a turn (context XML, grep, read tool calls) is read from disk once.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # abs path -> ((mtime_ns, size), content, bytes in memory)
+        self._entries: OrderedDict[str, tuple[tuple[int, int], str, int]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, path: str, version: tuple[int, int]) -> str | None:
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is None or cached[0] != version:
+                return None
+            self._entries.move_to_end(path)
+            return cached[1]
+
+    def put(self, path: str, version: tuple[int, int], content: str) -> None:
+        size = sys.getsizeof(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(path)
+            self._entries[path] = (version, content, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._pop(path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _pop(self, path: str) -> None:
+        if (cached := self._entries.pop(path, None)) is not None:
+            self.total_bytes -= cached[2]
+
+
+_contents = FileContentCache(settings.FILE_CONTENT_CACHE_MAX_BYTES)
+
+
+def get_file_content_cache() -> FileContentCache:
+    """Returns the process-wide cache of file contents read by CodebaseService."""
+    return _contents
 
 
 class CodebaseService:
@@ -97,11 +644,17 @@ class CodebaseService:
         return root, abs_path
 
     async def is_ignored(
-        self, project_root: str | Path, path: str | Path, is_dir: bool = False
+        self,
+        project_root: str | Path,
+        path: str | Path,
+        is_dir: bool = False,
+        *,
+        spec: IgnoreSpec | None = None,
     ) -> bool:
         """
         Checks if a path is ignored by gitignore patterns.
-        Accepts both strings and Path objects.
+        Accepts both strings and Path objects. Batch callers may pass the project's
+        `spec` to skip the lookup.
         """
         root = Path(project_root).resolve()
         target = Path(path)
@@ -116,11 +669,23 @@ class CodebaseService:
         except ValueError:
             return False
 
-        spec = await self.matcher.get_spec(str(root))
-        return self.matcher.matches(spec, str(rel_path), is_dir=is_dir)
+        if spec is None:
+            spec = await self.matcher.get_spec(str(root))
+        if self.matcher.matches(spec, str(rel_path), is_dir=is_dir):
+            return True
+        if not settings.FILE_INDEX_USE_GIT:
+            return False
+        # git-backed indexes also apply nested .gitignore files and excludes
+        index = get_file_index(root, spec)
+        return await asyncio.to_thread(index.excludes, rel_path.as_posix())
 
     async def validate_file_path(
-        self, project_root: str, file_path: str, must_exist: bool = True
+        self,
+        project_root: str,
+        file_path: str,
+        must_exist: bool = True,
+        *,
+        spec: IgnoreSpec | None = None,
     ) -> Path:
         """
         Validates that a file is safe to access (inside root) and not ignored.
@@ -135,7 +700,7 @@ class CodebaseService:
             if not abs_path.is_file():
                 raise ValueError(f"Path is not a file: '{file_path}'")
 
-        if await self.is_ignored(root, abs_path, is_dir=False):
+        if await self.is_ignored(root, abs_path, is_dir=False, spec=spec):
             raise ValueError(
                 f"Access denied: '{abs_path.relative_to(root)}' is ignored by project configuration."
             )
@@ -161,45 +726,91 @@ class CodebaseService:
             )
         return abs_path
 
-    async def _collect_files(
-        self, project_root: Path, path: Path, spec: PathSpec
-    ) -> set[str]:
+    @staticmethod
+    def _collect_files(index: FileIndex, files: list[str], rel_path: str) -> list[str]:
         """
-        Collects valid files from a path (file or directory), respecting ignores.
+        Collects valid files at or under a project-relative path (file or
+        directory), respecting ignores. `files` is the index's sorted file list.
         """
-        files = set()
-
-        async def _scan_dir(current_dir: Path):
+        if not rel_path:
+            return files
+        # "0" sorts right after "/": the slice holds exactly the paths under rel_path/
+        start = bisect.bisect_left(files, f"{rel_path}/")
+        under = files[start : bisect.bisect_left(files, f"{rel_path}0", start)]
+        if under:
+            return under
+        position = bisect.bisect_left(files, rel_path)
+        if position < len(files) and files[position] == rel_path:
+            return [rel_path]
+
+        # Not indexed: an empty or ignored directory, or a file only a later
+        # negation pattern re-includes. A git listing already applied every
+        # ignore rule, so paths it left out stay out.
+        if index.excludes(rel_path):
+            return []
+        abs_path = os.path.join(index.root, rel_path)
+        if os.path.isfile(abs_path):
+            return [] if index.spec.match_file(rel_path) else [rel_path]
+        if os.path.isdir(abs_path):
             try:
-                entries = await aiofiles.os.listdir(current_dir)
+                return [e.path for e in index.entries(abs_path) if not e.is_dir]
             except OSError:
-                return
-
-            for entry in entries:
-                full_path = current_dir / entry
-                try:
-                    rel_path = full_path.relative_to(project_root)
-                    is_dir = await aiofiles.os.path.isdir(full_path)
-
-                    if self.matcher.matches(spec, str(rel_path), is_dir=is_dir):
-                        continue
-
-                    if is_dir:
-                        if not await aiofiles.os.path.islink(full_path):
-                            await _scan_dir(full_path)
-                    else:
-                        files.add(str(rel_path))
-                except ValueError:
-                    continue
+                return []
+        return []
+
+    def _match_patterns(self, index: FileIndex, rel_patterns: list[str]) -> set[str]:
+        """
+        Resolves project-relative patterns in one pass over the index. Literal paths
+        are looked up directly; globs are compiled into a single regex with
+        glob.glob semantics (`**` spans directories, wildcards skip hidden names)
+        and every matched directory expands to all the files below it.
+
+        Globs only see indexed entries. Unlike glob.glob, they never enter ignored
+        directories, so a negation cannot re-include a file below an excluded
+        directory (`logs/` then `!logs/app.log`), as in git. Literal paths still
+        reach such files.
+        """
+        entries = index.entries(index.root)
+        files = sorted(entry.path for entry in entries if not entry.is_dir)
+        results: set[str] = set()
+
+        globs = []
+        for rel_pattern in rel_patterns:
+            if glob.has_magic(rel_pattern):
+                globs.append(rel_pattern)
+            else:
+                results.update(self._collect_files(index, files, rel_pattern))
+        if not globs:
+            return results
+
+        regex = re.compile(
+            "|".join(
+                glob.translate(p, recursive=True, include_hidden=False, seps="/")
+                for p in globs
+            )
+        )
+        if regex.match(""):
+            return set(files)
 
-        if path.is_file():
-            file_rel_path = path.relative_to(project_root)
-            if not self.matcher.matches(spec, str(file_rel_path), is_dir=False):
-                files.add(str(file_rel_path))
-        elif path.is_dir():
-            await _scan_dir(path)
+        for entry in entries:
+            if not (
+                regex.match(entry.path)
+                or (entry.is_dir and regex.match(f"{entry.path}/"))
+            ):
+                continue
+            rel_path = entry.path
+            if entry.is_symlink:
+                # Symlinks count as their target, like resolved glob matches.
+                real_path = os.path.realpath(os.path.join(index.root, rel_path))
+                if not self._is_subpath(Path(index.root), Path(real_path)):
+                    continue
+                rel_path = _rel_prefix(index.root, real_path).rstrip("/")
+            if entry.is_dir or entry.is_symlink:
+                results.update(self._collect_files(index, files, rel_path))
+            else:
+                results.add(rel_path)
 
-        return files
+        return results
 
     async def list_dir(self, project_root: str, dir_path: str = ".") -> list[str]:
         """
@@ -213,45 +824,58 @@ class CodebaseService:
             raise ValueError(f"Directory not found: '{dir_path}'")
 
         try:
-            entries = sorted(await aiofiles.os.listdir(target_path))
+            index = get_file_index(root, spec)
+            entries = await asyncio.to_thread(
+                index.entries, target_path, recursive=False
+            )
         except OSError as e:
             raise ValueError(f"Error reading directory: {e}")
 
         results = []
-        for entry in entries:
-            full_path = target_path / entry
-            rel_path = full_path.relative_to(root)
-            is_dir = await aiofiles.os.path.isdir(full_path)
-
-            if not self.matcher.matches(spec, str(rel_path), is_dir=is_dir):
-                suffix = "/" if is_dir else ""
-                results.append(f"{entry}{suffix}")
-
+        for entry in sorted(entries):
+            name = entry.path.rpartition("/")[2]
+            results.append(f"{name}/" if entry.is_dir else name)
         return results
 
     async def read_file(
-        self, project_root: str, file_path: str, must_exist: bool = True
+        self,
+        project_root: str,
+        file_path: str,
+        must_exist: bool = True,
+        *,
+        spec: IgnoreSpec | None = None,
     ) -> FileReadResult:
         """
         Reads content of a single file returning structured result.
+        Unchanged files are served from the shared content cache.
         """
         try:
             abs_path = await self.validate_file_path(
-                project_root, file_path, must_exist=must_exist
+                project_root, file_path, must_exist=must_exist, spec=spec
             )
 
-            if not abs_path.exists():
+            try:
+                st = await aiofiles.os.stat(abs_path)
+            except FileNotFoundError:
+                if must_exist:
+                    raise
                 # If we are here, must_exist=False (otherwise validate would have raised)
                 # In case file doesn't exist, we just return empty as success in order for it to be created
                 return FileReadResult(
                     file_path=file_path, content="", status=FileStatus.SUCCESS
                 )
 
-            async with aiofiles.open(abs_path, encoding="utf-8") as f:
-                content = await f.read()
-                return FileReadResult(
-                    file_path=file_path, content=content, status=FileStatus.SUCCESS
-                )
+            cache = get_file_content_cache()
+            version = (st.st_mtime_ns, st.st_size)
+            content = cache.get(str(abs_path), version)
+            if content is None:
+                async with aiofiles.open(abs_path, encoding="utf-8") as f:
+                    content = await f.read()
+                cache.put(str(abs_path), version, content)
+
+            return FileReadResult(
+                file_path=file_path, content=content, status=FileStatus.SUCCESS
+            )
         except UnicodeDecodeError:
             return FileReadResult(file_path=file_path, status=FileStatus.BINARY)
         except ValueError as e:
@@ -268,12 +892,18 @@ class CodebaseService:
         self, project_root: str, file_paths: list[str]
     ) -> list[FileReadResult]:
         """
-        Reads content of multiple files returning structured results.
+        Reads content of multiple files returning structured results, in the order
+        of `file_paths`. Paths are validated against one spec lookup and up to
+        MAX_CONCURRENT_READS files are read at a time.
         """
-        results = []
-        for fp in file_paths:
-            results.append(await self.read_file(project_root, fp))
-        return results
+        spec = await self.matcher.get_spec(str(Path(project_root).resolve()))
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_READS)
+
+        async def _read(fp: str) -> FileReadResult:
+            async with semaphore:
+                return await self.read_file(project_root, fp, spec=spec)
+
+        return list(await asyncio.gather(*(_read(fp) for fp in file_paths)))
 
     async def resolve_file_patterns(
         self,
@@ -285,24 +915,20 @@ class CodebaseService:
         """Resolves globs to relative file paths."""
         root = Path(project_root).resolve()
         spec = await self.matcher.get_spec(project_root, extra_patterns=ignore_patterns)
-        results = set()
 
         if not patterns:
             patterns = SCAN_ALL_PATTERN
 
+        rel_patterns = []
         for pattern in patterns:
             _, safe_pattern_base = await self._resolve_safe_path(project_root, pattern)
-            full_pattern = str(safe_pattern_base)
-
-            matched_paths = glob.glob(full_pattern, recursive=True)
-
-            for p in matched_paths:
-                _, abs_match = await self._resolve_safe_path(project_root, p)
-                path_obj = Path(abs_match)
-
-                files = await self._collect_files(root, path_obj, spec)
-                results.update(files)
+            rel_patterns.append(_rel_prefix(root, safe_pattern_base).rstrip("/"))
 
+        index = get_file_index(root, spec)
+        try:
+            results = await asyncio.to_thread(self._match_patterns, index, rel_patterns)
+        except OSError:
+            return []
         return sorted(results)
 
     async def build_file_tree(self, project_root: str) -> list[FileTreeNode]:
@@ -313,29 +939,27 @@ class CodebaseService:
         root = Path(project_root).resolve()
         spec = await self.matcher.get_spec(project_root)
 
-        async def _recurse(current_path: Path) -> list[FileTreeNode]:
-            try:
-                entries = sorted(await aiofiles.os.listdir(current_path))
-            except PermissionError:
-                return []
-
-            nodes = []
-            for entry in entries:
-                full_path = current_path / entry
-                rel_path = full_path.relative_to(root)
-                rel_path_str = str(rel_path.as_posix())
+        try:
+            index = get_file_index(root, spec)
+            entries = await asyncio.to_thread(index.entries, root)
+        except PermissionError:
+            return []
 
-                is_dir = await aiofiles.os.path.isdir(full_path)
-                if self.matcher.matches(spec, rel_path_str, is_dir=is_dir):
-                    continue
+        children: dict[str, list[ScanEntry]] = {}
+        for entry in entries:
+            children.setdefault(entry.path.rpartition("/")[0], []).append(entry)
 
-                node = FileTreeNode(name=entry, path=rel_path_str, is_dir=is_dir)
+        def _build(dir_path: str) -> list[FileTreeNode]:
+            nodes = []
+            for entry in children.get(dir_path, ()):
+                name = entry.path.rpartition("/")[2]
+                node = FileTreeNode(name=name, path=entry.path, is_dir=entry.is_dir)
 
-                if is_dir and not await aiofiles.os.path.islink(full_path):
-                    children = await _recurse(full_path)
+                if entry.is_dir and not entry.is_symlink:
+                    subtree = _build(entry.path)
                     # Only add directories if they are not empty (optional preference)
-                    if children:
-                        node.children = children
+                    if subtree:
+                        node.children = subtree
                         nodes.append(node)
                 else:
                     nodes.append(node)
@@ -343,7 +967,7 @@ class CodebaseService:
             # Sort folders first, then files
             return sorted(nodes, key=lambda x: (not x.is_dir, x.name.lower()))
 
-        return await _recurse(root)
+        return _build("")
 
     async def filter_and_resolve_paths(
         self, project_root: str, file_paths: list[str]
@@ -354,12 +978,13 @@ class CodebaseService:
         Returns a set of absolute resolved paths.
         """
         valid_abs_paths = set()
+        spec = await self.matcher.get_spec(str(Path(project_root).resolve()))
 
         for fp in file_paths:
             try:
                 # Reuse the strict validator, but catch the error to skip
                 abs_path = await self.validate_file_path(
-                    project_root, fp, must_exist=True
+                    project_root, fp, must_exist=True, spec=spec
                 )
                 valid_abs_paths.add(str(abs_path))
             except ValueError:
@@ -378,3 +1003,6 @@ class CodebaseService:
         await aiofiles.os.makedirs(abs_path.parent, exist_ok=True)
         async with aiofiles.open(abs_path, "w", encoding="utf-8") as f:
             await f.write(content)
+        # mtime and size may not change on a fast same-size rewrite
+        get_file_content_cache().discard(str(abs_path))
+        mark_file_indexes_stale(Path(project_root).resolve())
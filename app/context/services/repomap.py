@@ -1,12 +1,28 @@
+import asyncio
+import logging
 import os
+import time
+from collections.abc import Awaitable, Callable
 
-from app.context.repomap import RepoMap
+from app.context.repomap import RepoMap, get_tag_cache
+from app.context.repomap.graph import get_repo_graph
+from app.context.repomap.languages import get_language_registry
+from app.context.repomap.memo import (
+    get_repo_map_flights,
+    get_repo_map_memo,
+    project_fingerprint,
+)
+from app.context.repomap.mentions import get_mention_extractor
+from app.context.schemas import RepoMapResult
 from app.context.services.codebase import CodebaseService
 from app.context.services.context import WorkspaceService
 from app.core.enums import RepoMapMode
 from app.projects.exceptions import ActiveProjectRequiredException
+from app.projects.models import Project
 from app.projects.services import ProjectService
 
+logger = logging.getLogger(__name__)
+
 
 class RepoMapService:
     """
@@ -29,18 +45,19 @@ class RepoMapService:
             p.strip() for p in (ignore_patterns_str or "").splitlines() if p.strip()
         ]
 
-    # todo: refact mentioned filename and idents
     async def generate_repo_map(
         self,
         session_id: int,
         mentioned_filenames: set[str] | None = None,
         mentioned_idents: set[str] | None = None,
+        mention_text: str | None = None,
         include_active_content: bool = True,
         mode: RepoMapMode = RepoMapMode.AUTO,
         ignore_patterns_str: str | None = None,
         token_limit: int = 4096,
-    ) -> str:
-        """Generate a repository map string for the currently active project.
+        time_budget: float | None = None,
+    ) -> RepoMapResult:
+        """Generate a repository map for the currently active project.
 
         The Repo Map is a Tier-1 context artifact meant to give the LLM a compact overview
         of the repository structure and (in AUTO mode) important definitions/references.
@@ -50,6 +67,9 @@ class RepoMapService:
             mentioned_filenames: Optional set of project-relative paths mentioned by the
                 user/agent. These are resolved and used as ranking boosts.
             mentioned_idents: Optional set of identifiers to boost during ranking.
+            mention_text: Optional free text (typically the user's message) scanned for
+                project paths and defined identifiers, which are added to the
+                mentioned filenames and identifiers above.
             include_active_content: When True, includes full content of active context
                 files in the output.
             mode: Controls how the map is generated:
@@ -71,6 +91,14 @@ class RepoMapService:
                 - be searched/read explicitly by tools,
                 as long as they are not blocked by the hard/default ignores or .gitignore.
             token_limit: Approximate token budget for the repo map output.
+            time_budget: Optional seconds to spend. When exceeded, the map built so far
+                is returned (file structure plus the ranked definitions finished, over
+                the files processed so far) while extraction continues in the
+                background for the next turn. Partial maps are not memoized and
+                come back with `complete=False`.
+
+        Results are memoized per project fingerprint (paths, sizes and mtimes) and
+        inputs, so an unchanged repository returns the identical string.
         """
         project = await self.project_service.get_active_project()
         if not project:
@@ -90,6 +118,13 @@ class RepoMapService:
             session_id, project.path
         )
 
+        if mention_text:
+            found_filenames, found_idents = await self._extract_mentions(
+                project, all_files_rel, mention_text
+            )
+            mentioned_filenames = (mentioned_filenames or set()) | found_filenames
+            mentioned_idents = (mentioned_idents or set()) | found_idents
+
         if mentioned_filenames:
             mentioned_filenames = await self.codebase_service.filter_and_resolve_paths(
                 project.path, list(mentioned_filenames)
@@ -97,18 +132,163 @@ class RepoMapService:
         else:
             mentioned_filenames = set()
 
-        # todo: create a factory service for it (just like in agents)
-        repo_mapper = RepoMap(
-            all_files=all_files_abs,
-            active_context_files=active_files_abs,
+        deadline = None
+        if time_budget is not None:
+            deadline = asyncio.get_running_loop().time() + time_budget
+
+        return await self._generate_cached(
+            project,
+            deadline=deadline,
+            all_files_abs=all_files_abs,
+            active_files_abs=active_files_abs,
             mentioned_filenames=mentioned_filenames,
             mentioned_idents=mentioned_idents,
+            include_active_content=include_active_content,
+            mode=mode,
+            ignore_patterns=ignore_patterns,
+            token_limit=token_limit,
+        )
+
+    @staticmethod
+    async def _extract_mentions(
+        project: Project, all_files_rel: list[str], text: str
+    ) -> tuple[set[str], set[str]]:
+        """
+        Matches the text against the project's paths and the identifiers defined in
+        its graph. The graph is the one of the previous turn, which is current enough
+        for boosting and avoids refreshing it twice. Building the vocabulary and the
+        extractor is blocking, so it all runs in a worker thread.
+        """
+
+        def extract() -> tuple[set[str], set[str]]:
+            graph = get_repo_graph(project.path)
+            extractor = get_mention_extractor(
+                project.path, graph.vocabulary(), all_files_rel
+            )
+            return extractor.extract(text)
+
+        return await asyncio.to_thread(extract)
+
+    async def warm_up(
+        self,
+        project: Project,
+        mode: RepoMapMode = RepoMapMode.AUTO,
+        ignore_patterns_str: str | None = None,
+        token_limit: int = 4096,
+        on_progress: Callable[[str], Awaitable[None]] | None = None,
+    ) -> str:
+        """
+        Prepares the repo map of a project ahead of the first turn: lists files,
+        compiles tag queries, extracts tags into the project graph and renders the
+        default map (no active or mentioned files) into the memo.
+        Progress lines are logged and passed to `on_progress`.
+        Returns the rendered map.
+        """
+
+        async def progress(message: str) -> None:
+            logger.info(f"RepoMap: {message}")
+            if on_progress is not None:
+                await on_progress(message)
+
+        started = time.perf_counter()
+        await progress(f"Warming up the repo map of {project.name}...")
+
+        ignore_patterns = self._parse_ignore_patterns(ignore_patterns_str)
+        all_files_rel = await self.codebase_service.resolve_file_patterns(
+            project.path,
+            ignore_patterns=ignore_patterns,
+        )
+        await progress(f"{project.name}: {len(all_files_rel)} files listed.")
+
+        languages = await asyncio.to_thread(get_language_registry().warm, all_files_rel)
+        await progress(
+            f"{project.name}: queries ready for {', '.join(languages) or 'no languages'}."
+        )
+
+        result = await self._generate_cached(
+            project,
+            all_files_abs=[os.path.join(project.path, f) for f in all_files_rel],
+            active_files_abs=[],
+            mentioned_filenames=set(),
+            mentioned_idents=None,
+            include_active_content=False,
+            mode=mode,
+            ignore_patterns=ignore_patterns,
             token_limit=token_limit,
-            root=project.path,
-            include_definitions=(mode == RepoMapMode.AUTO),
         )
 
-        if mode == RepoMapMode.MANUAL:
-            return repo_mapper.format_top_level_structure()
+        await progress(
+            f"{project.name}: repo map warm-up done in {time.perf_counter() - started:.2f}s."
+        )
+        return result.content
+
+    async def _generate_cached(
+        self,
+        project: Project,
+        *,
+        all_files_abs: list[str],
+        active_files_abs: list[str],
+        mentioned_filenames: set[str],
+        mentioned_idents: set[str] | None,
+        include_active_content: bool,
+        mode: RepoMapMode,
+        ignore_patterns: list[str],
+        token_limit: int,
+        deadline: float | None = None,
+    ) -> RepoMapResult:
+        fingerprint = await asyncio.to_thread(
+            project_fingerprint,
+            [*all_files_abs, *active_files_abs, *mentioned_filenames],
+        )
+        memo_key = (
+            project.path,
+            fingerprint,
+            tuple(sorted(active_files_abs)),
+            tuple(sorted(mentioned_filenames)),
+            tuple(sorted(mentioned_idents or ())),
+            mode,
+            include_active_content,
+            tuple(ignore_patterns),
+            token_limit,
+        )
+        memo = get_repo_map_memo()
+        if (cached := memo.get(memo_key)) is not None:
+            return RepoMapResult(content=cached)
+
+        async def build() -> RepoMapResult:
+            # todo: create a factory service for it (just like in agents)
+            repo_mapper = RepoMap(
+                all_files=all_files_abs,
+                active_context_files=active_files_abs,
+                mentioned_filenames=mentioned_filenames,
+                mentioned_idents=mentioned_idents,
+                token_limit=token_limit,
+                root=project.path,
+                include_definitions=(mode == RepoMapMode.AUTO),
+                tag_cache=get_tag_cache(project.path),
+                graph=get_repo_graph(project.path),
+                deadline=deadline,
+            )
+
+            if mode == RepoMapMode.MANUAL:
+                repo_map = repo_mapper.format_top_level_structure()
+            else:
+                repo_map = await repo_mapper.generate(
+                    include_active_content=include_active_content
+                )
+
+            if repo_mapper.complete:
+                memo.set(memo_key, repo_map)
+            else:
+                logger.info(
+                    f"RepoMap: Returning a partial map for {project.name}, "
+                    f"indexing continues in the background."
+                )
+            return RepoMapResult(content=repo_map, complete=repo_mapper.complete)
 
-        return await repo_mapper.generate(include_active_content=include_active_content)
+        # Concurrent identical requests (e.g. two tabs) share one build; different
+        # inputs still share the project's graph and only re-rank and re-render.
+        # Time-bounded turns never join an unbounded build (a warm-up) and vice
+        # versa, so a turn keeps its budget and a warm-up never ends up partial.
+        flight_key = (memo_key, deadline is not None)
+        return await get_repo_map_flights().do(flight_key, build)
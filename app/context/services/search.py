@@ -1,8 +1,15 @@
+import asyncio
 import logging
+import os
+import re
 
 import tiktoken
 from grep_ast import TreeContext
 
+from app.context.repomap.generated import (
+    GeneratedFileDetector,
+    get_generated_file_cache,
+)
 from app.context.schemas import FileStatus
 from app.context.services.codebase import CodebaseService
 from app.projects.exceptions import ActiveProjectRequiredException
@@ -20,9 +27,11 @@ class SearchService:
         self,
         project_service: ProjectService,
         codebase_service: CodebaseService,
+        detector: GeneratedFileDetector | None = None,
     ):
         self.project_service = project_service
         self.codebase_service = codebase_service
+        self.detector = detector or GeneratedFileDetector.from_settings()
         self.encoding = tiktoken.get_encoding("cl100k_base")
 
     async def grep(
@@ -59,12 +68,19 @@ class SearchService:
                 continue
 
             try:
-                tc = TreeContext(result.file_path, result.content)
-                loi = tc.grep(search_pattern, ignore_case=ignore_case)
-                if loi:
-                    tc.add_lines_of_interest(loi)
-                    tc.add_context()
-                    formatted_output = f"{result.file_path}:\n{tc.format()}"
+                generated = await asyncio.to_thread(
+                    self._is_generated,
+                    os.path.join(project.path, result.file_path),
+                    result.content,
+                )
+                formatted_output = self._grep_file(
+                    result.file_path,
+                    result.content,
+                    search_pattern,
+                    ignore_case,
+                    generated=generated,
+                )
+                if formatted_output:
                     tokens = len(self.encoding.encode(formatted_output))
 
                     if current_tokens + tokens > token_limit:
@@ -80,3 +96,46 @@ class SearchService:
                 output.append(f"Error processing {result.file_path}: {e}")
 
         return "\n\n".join(output) if output else "No matches found."
+
+    def _is_generated(self, abs_path: str, content: str) -> bool:
+        """
+        Classifies a file once per (mtime, size) instead of on every grep.
+        Blocking (stat and content scan), run it in a worker thread.
+        """
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return self.detector.is_generated(abs_path, content)
+
+        version = (st.st_mtime_ns, st.st_size)
+        cache = get_generated_file_cache()
+        generated = cache.get(abs_path, version, self.detector)
+        if generated is None:
+            generated = self.detector.is_generated(abs_path, content, st.st_size)
+            cache.put(abs_path, version, self.detector, generated)
+        return generated
+
+    def _grep_file(
+        self,
+        file_path: str,
+        content: str,
+        search_pattern: str,
+        ignore_case: bool,
+        *,
+        generated: bool = False,
+    ) -> str | None:
+        """Returns the formatted matches of one file, None without matches."""
+        if generated:
+            # Parsing a bundle for context is slow and its lines are noise.
+            flags = re.IGNORECASE if ignore_case else 0
+            if re.search(search_pattern, content, flags):
+                return f"{file_path}: matches in generated file (content omitted)"
+            return None
+
+        tc = TreeContext(file_path, content)
+        loi = tc.grep(search_pattern, ignore_case=ignore_case)
+        if not loi:
+            return None
+        tc.add_lines_of_interest(loi)
+        tc.add_context()
+        return f"{file_path}:\n{tc.format()}"
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from app.context.factories import build_repo_map_service
+from app.core.db import sessionmanager
+from app.projects.factories import build_project_service
+from app.settings.factories import build_settings_service
+
+logger = logging.getLogger(__name__)
+
+# Receives (message, is_error) for every progress line of a warm-up.
+ProgressListener = Callable[[str, bool], Awaitable[None]]
+
+
+class RepoMapWarmer:
+    """
+    Runs repo map warm-ups in the background so the first turn after a restart or a
+    project switch does not pay the cold cost.
+
+    At most one warm-up per project runs at a time. Turns that arrive while it runs
+    join its work: they wait on the project graph instead of extracting again, and a
+    turn asking for the default map awaits the in-flight build.
+
+    Progress goes to the server log and to every registered listener (the open
+    sessions' logs panels). A listener added while a warm-up runs first receives
+    the lines already published by it.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[int | None, asyncio.Task] = {}
+        self._listeners: list[ProgressListener] = []
+        # progress of running warm-ups, replayed to late listeners
+        self._progress: dict[int | None, list[tuple[str, bool]]] = {}
+
+    async def add_listener(self, listener: ProgressListener) -> None:
+        for lines in list(self._progress.values()):
+            for message, is_error in list(lines):
+                await self._notify(listener, message, is_error)
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ProgressListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def _publish(
+        self, project_id: int | None, message: str, is_error: bool = False
+    ) -> None:
+        self._progress.setdefault(project_id, []).append((message, is_error))
+        for listener in list(self._listeners):
+            await self._notify(listener, message, is_error)
+
+    @staticmethod
+    async def _notify(listener: ProgressListener, message: str, is_error: bool) -> None:
+        try:
+            await listener(message, is_error)
+        except Exception as e:
+            # A closed websocket must not stop the warm-up.
+            logger.debug(f"RepoMap: Warm-up progress listener failed: {e}")
+
+    def schedule(self, project_id: int | None = None) -> asyncio.Task:
+        """
+        Starts warming `project_id` (the active project when None) unless a warm-up
+        for it is already running, in which case that one is returned.
+        """
+        task = self._tasks.get(project_id)
+        if task is not None and not task.done():
+            return task
+
+        task = asyncio.create_task(self._run(project_id))
+        self._tasks[project_id] = task
+        task.add_done_callback(lambda t: self._done(project_id, t))
+        return task
+
+    def _done(self, project_id: int | None, task: asyncio.Task) -> None:
+        if self._tasks.get(project_id) is task:
+            del self._tasks[project_id]
+            self._progress.pop(project_id, None)
+
+    async def _run(self, project_id: int | None) -> None:
+        try:
+            async with sessionmanager.session() as db:
+                project_service = await build_project_service(db)
+                if project_id is None:
+                    project = await project_service.get_active_project()
+                else:
+                    project = await project_service.get_project(project_id=project_id)
+                if not project:
+                    return
+
+                settings_service = await build_settings_service(db)
+                app_settings = await settings_service.get_settings()
+                options = {
+                    "mode": app_settings.repomap_mode,
+                    "ignore_patterns_str": app_settings.repomap_ignore_patterns,
+                    "token_limit": app_settings.ast_token_limit,
+                }
+                repo_map_service = await build_repo_map_service(db)
+                # Keep the loaded project usable after the session commits and
+                # closes; the warm-up itself must not hold a database transaction.
+                db.expunge(project)
+
+            async def on_progress(message: str) -> None:
+                await self._publish(project_id, message)
+
+            await repo_map_service.warm_up(project, on_progress=on_progress, **options)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"RepoMap: Warm-up failed: {e}")
+            await self._publish(project_id, f"Repo map warm-up failed: {e}", True)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._progress.clear()
+
+
+_warmer = RepoMapWarmer()
+
+
+def get_repo_map_warmer() -> RepoMapWarmer:
+    return _warmer
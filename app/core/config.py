@@ -17,6 +17,26 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///workspace/database.db"
     PROJECTS_ROOT_DIR: str = "workspace/projects"
     BLUEPRINTS_ROOT_DIR: str = "workspace/blueprints"
+    REPOMAP_CACHE_DIR: str = "workspace/cache/repomap"
+    # None uses one worker per CPU, 0 disables the process pool (extraction in-thread)
+    REPOMAP_EXTRACTION_WORKERS: int | None = None
+    REPOMAP_PARALLEL_MIN_FILES: int = 256
+    # Identifiers defined in more files than this are left out of the repo map graph
+    REPOMAP_MAX_DEFINERS_PER_IDENT: int = 25
+    # Seconds a turn waits for the repo map before using a partial one, None waits
+    REPOMAP_TIME_BUDGET: float | None = 5.0
+    # Files above either threshold are treated as generated/minified: the repo map
+    # lists them by name only and grep does not render their context
+    GENERATED_FILE_MAX_SIZE: int = 1_000_000
+    GENERATED_FILE_MAX_AVG_LINE_LENGTH: int = 250
+    # Seconds a project's file listing is trusted before directory mtimes are
+    # re-checked; files written through the app are visible immediately
+    FILE_INDEX_MAX_AGE: float = 1.0
+    # List files of git checkouts with `git ls-files` instead of walking the tree:
+    # honors nested .gitignore files, pays off on cold caches and network mounts
+    FILE_INDEX_USE_GIT: bool = False
+    # Memory for file contents kept between reads, validated by mtime and size
+    FILE_CONTENT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
     LOG_LEVEL: LogLevel = LogLevel.INFO
     OBSERVABILITY_ENABLED: bool = False
     AGENT_MAX_ITERATIONS: int = 50  # todo: safety until stable enough (change later)
@@ -26,7 +46,7 @@ class Settings(BaseSettings):
     def queries_dir(self) -> str:
         return str(BASE_DIR / "app/context/repomap/queries")
 
-    @field_validator("PROJECTS_ROOT_DIR", "BLUEPRINTS_ROOT_DIR")
+    @field_validator("PROJECTS_ROOT_DIR", "BLUEPRINTS_ROOT_DIR", "REPOMAP_CACHE_DIR")
     def make_absolute(cls, v: str) -> str:  # noqa
         if not Path(v).is_absolute():
             return str(BASE_DIR / v)
@@ -10,7 +10,10 @@ from app.coder.factories import build_turn_execution_registry
 from app.coder.routes.htmx import router as coder_htmx_router
 from app.coder.services.execution_registry import initialize_global_registry
 from app.commons.fastapi_htmx import htmx_init
+from app.context.repomap.cache import clear_tag_caches
+from app.context.repomap.extraction import shutdown_extraction_pool
 from app.context.routes.htmx import router as context_htmx_router
+from app.context.warmup import get_repo_map_warmer
 from app.core.config import settings
 from app.core.db import sessionmanager
 from app.core.observability import init_observability
@@ -52,9 +55,16 @@ async def lifespan(app: FastAPI):  # noqa
     async with sessionmanager.session() as session:
         await initialize_application_settings(session)
 
+    # Warm the active project's repo map in the background
+    repo_map_warmer = get_repo_map_warmer()
+    repo_map_warmer.schedule()
+
     yield
 
     price_updater.stop()
+    await repo_map_warmer.shutdown()
+    shutdown_extraction_pool()
+    clear_tag_caches()
     await sessionmanager.cleanup()
 
 
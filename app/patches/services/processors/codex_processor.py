@@ -5,7 +5,12 @@ from pathlib import Path
 from apply_patch_py import apply_patch
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.context.services.codebase import CodebaseService
+from app.context.repomap.trees import get_parse_tree_cache
+from app.context.services.codebase import (
+    CodebaseService,
+    get_file_content_cache,
+    mark_file_indexes_stale,
+)
 from app.core.db import DatabaseSessionManager
 from app.llms.services import LLMService
 from app.patches.repositories import DiffPatchRepository
@@ -44,3 +49,14 @@ class CodexProcessor(BasePatchProcessor):
             affected = await apply_patch(diff, workdir=Path(project.path))
             if not affected.success:
                 raise ValueError(f"Failed to apply patch: {affected}")
+            # Patched files are likely to be patched again: reparse them incrementally.
+            get_parse_tree_cache().mark_hot(
+                str(Path(project.path) / path)
+                for path in (*affected.added, *affected.modified)
+            )
+            # apply_patch writes outside CodebaseService.write_file: drop what
+            # the file index and content cache know about the patched files.
+            mark_file_indexes_stale(project.path)
+            contents = get_file_content_cache()
+            for path in (*affected.added, *affected.modified, *affected.deleted):
+                contents.discard(str((Path(project.path) / path).resolve()))
@@ -1,4 +1,5 @@
 import logging
+import os
 import re
 from collections.abc import Awaitable, Callable
 from decimal import Decimal
@@ -7,8 +8,9 @@ from typing import Any
 from llama_index.core.llms import ChatMessage
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.context.repomap.trees import get_parse_tree_cache
 from app.context.schemas import FileStatus
-from app.context.services.codebase import CodebaseService
+from app.context.services.codebase import CodebaseService, mark_file_indexes_stale
 from app.core.db import DatabaseSessionManager
 from app.llms.enums import LLMModel
 from app.llms.services import LLMService
@@ -91,6 +93,9 @@ class UDiffProcessor(BasePatchProcessor):
 
             project = await project_service.get_active_project()
             await codebase_service.write_file(project.path, file_path, patched_content)
+        # Patched files are likely to be patched again: reparse them incrementally.
+        get_parse_tree_cache().mark_hot([os.path.join(project.path, file_path)])
+        mark_file_indexes_stale(project.path)
         return patched_content
 
     async def _apply_via_llm(
@@ -4,6 +4,7 @@ from fastapi.responses import HTMLResponse
 from app.chat.dependencies import get_chat_service
 from app.chat.services import ChatService
 from app.commons.fastapi_htmx import htmx
+from app.context.warmup import get_repo_map_warmer
 from app.projects.dependencies import get_project_page_service, get_project_service
 from app.projects.exceptions import ProjectNotFoundException
 from app.projects.services import ProjectPageService, ProjectService
@@ -31,6 +32,7 @@ async def set_active_project(
 ):
     try:
         await service.set_active_project(project_id=project_id)
+        get_repo_map_warmer().schedule(project_id)
         session = await chat_service.get_or_create_session_for_project(
             project_id=project_id
         )
@@ -0,0 +1,116 @@
+"""
+Benchmarks ignore matching for codebase scans.
+
+Builds a synthetic tree in memory (no files on disk) with sources, build output and
+vendored node_modules, then matches every entry with PathSpec.match_file (one regex
+per pattern) and with IgnoreSpec (segment lookups plus one combined regex), and walks the tree with
+directory pruning to show how many entries a scan actually visits.
+
+    uv run python -m benchmarks.ignore_matcher --entries 200000
+"""
+
+import argparse
+import random
+import time
+
+from app.context.services.codebase import IgnoreSpec, _IgnoreMatcher
+
+GITIGNORE = [
+    "build/",
+    "dist/",
+    "*.egg-info/",
+    "coverage/",
+    "*.tmp",
+    "!keep.tmp",
+    ".cache/",
+    "docs/_build/",
+    "**/generated/",
+]
+EXTENSIONS = [".py", ".js", ".ts", ".md", ".tmp", ".log", ".json", ".pyc"]
+
+
+def build_tree(num_entries: int, seed: int) -> dict[str, list[tuple[str, bool]]]:
+    """Returns dir -> [(name, is_dir)], with about `num_entries` entries in total."""
+    rng = random.Random(seed)
+    tree: dict[str, list[tuple[str, bool]]] = {"": []}
+    dirs = [""]
+    count = 0
+    special = ["node_modules", "build", "generated", "src", "lib", "tests"]
+    while count < num_entries:
+        parent = rng.choice(dirs)
+        if rng.random() < 0.15:
+            name = rng.choice(special) if rng.random() < 0.3 else f"pkg{count}"
+            path = f"{parent}{name}/"
+            if path in tree:
+                continue
+            tree[path] = []
+            dirs.append(path)
+            tree[parent].append((name, True))
+        else:
+            tree[parent].append((f"file{count}{rng.choice(EXTENSIONS)}", False))
+        count += 1
+    return tree
+
+
+def entry_paths(tree: dict[str, list[tuple[str, bool]]]) -> list[str]:
+    return [
+        f"{parent}{name}/" if is_dir else f"{parent}{name}"
+        for parent, entries in tree.items()
+        for name, is_dir in entries
+    ]
+
+
+def walk(tree: dict[str, list[tuple[str, bool]]], match) -> tuple[int, int]:
+    """Walks with directory pruning. Returns (entries visited, files kept)."""
+    visited = kept = 0
+    stack = [""]
+    while stack:
+        parent = stack.pop()
+        for name, is_dir in tree[parent]:
+            visited += 1
+            path = f"{parent}{name}/" if is_dir else f"{parent}{name}"
+            if match(path):
+                continue
+            if is_dir:
+                stack.append(path)
+            else:
+                kept += 1
+    return visited, kept
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tree = build_tree(args.entries, args.seed)
+    paths = entry_paths(tree)
+    spec = IgnoreSpec([*_IgnoreMatcher.DEFAULT_PATTERNS, *GITIGNORE])
+
+    start = time.perf_counter()
+    legacy = [spec.spec.match_file(p) for p in paths]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    combined = [spec.match_file(p) for p in paths]
+    combined_time = time.perf_counter() - start
+
+    assert legacy == combined, "IgnoreSpec disagrees with PathSpec"
+
+    start = time.perf_counter()
+    visited, kept = walk(tree, spec.match_file)
+    walk_time = time.perf_counter() - start
+
+    print(f"{len(paths)} entries, {len(spec.spec.patterns)} patterns")
+    print(f"PathSpec.match_file, every entry:  {legacy_time * 1000:9.1f} ms")
+    print(f"IgnoreSpec.match_file, every entry:{combined_time * 1000:9.1f} ms")
+    print(f"speedup:                           {legacy_time / combined_time:9.1f}x")
+    print(
+        f"pruned walk: {visited} entries visited, {kept} files kept "
+        f"({walk_time * 1000:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
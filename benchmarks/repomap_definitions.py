@@ -0,0 +1,112 @@
+"""
+Benchmarks lines-of-interest lookup for repo map snippet assembly.
+
+Builds a synthetic repository graph (no files on disk, no parsing) and compares the
+previous approach, scanning the whole (file, ident) -> tags dict for every ranked
+file, with the per-file definition index maintained by RepoGraph.
+
+    uv run python -m benchmarks.repomap_definitions --files 10000
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+
+from app.context.repomap.extraction import RawTag
+from app.context.repomap.graph import RepoGraph
+
+
+def build_file_tags(
+    num_files: int, defs_per_file: int, refs_per_file: int, seed: int
+) -> dict[str, list[RawTag]]:
+    rng = random.Random(seed)
+    file_tags: dict[str, list[RawTag]] = {}
+    for i in range(num_files):
+        tags = [(f"ident_{i}_{j}", "def", j * 10) for j in range(defs_per_file)]
+        for k in range(refs_per_file):
+            target = rng.randrange(num_files)
+            tags.append(
+                (
+                    f"ident_{target}_{rng.randrange(defs_per_file)}",
+                    "ref",
+                    defs_per_file * 10 + k,
+                )
+            )
+        file_tags[f"pkg{i % 100}/module_{i}.py"] = tags
+    return file_tags
+
+
+def legacy_lois(
+    ranked_files: list[str], file_tags: dict[str, list[RawTag]]
+) -> dict[str, list[int]]:
+    definitions: dict[tuple[str, str], list[RawTag]] = defaultdict(list)
+    for rel_path, tags in file_tags.items():
+        for tag in tags:
+            if tag[1] == "def":
+                definitions[(rel_path, tag[0])].append(tag)
+
+    lois = {}
+    for rel_path in ranked_files:
+        tags = []
+        for (f, _name), def_tags in definitions.items():
+            if f == rel_path:
+                tags.extend(def_tags)
+        if tags:
+            lois[rel_path] = sorted({tag[2] for tag in tags})
+    return lois
+
+
+def indexed_lois(ranked_files: list[str], graph: RepoGraph) -> dict[str, list[int]]:
+    def_lines = graph.definition_lines()
+    return {f: def_lines[f] for f in ranked_files if f in def_lines}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--defs-per-file", type=int, default=20)
+    parser.add_argument("--refs-per-file", type=int, default=40)
+    parser.add_argument(
+        "--ranked",
+        type=int,
+        default=500,
+        help="Ranked files visited before the token budget runs out.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    file_tags = build_file_tags(
+        args.files, args.defs_per_file, args.refs_per_file, args.seed
+    )
+    ranked_files = random.Random(args.seed).sample(
+        list(file_tags), min(args.ranked, args.files)
+    )
+
+    graph = RepoGraph()
+    start = time.perf_counter()
+    graph.apply(file_tags, {})
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = legacy_lois(ranked_files, file_tags)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = indexed_lois(ranked_files, graph)
+    indexed_time = time.perf_counter() - start
+
+    assert legacy == indexed, "index disagrees with the legacy scan"
+
+    print(
+        f"{args.files} files, {args.files * args.defs_per_file} definitions, "
+        f"{len(ranked_files)} ranked files visited"
+    )
+    print(f"graph build (includes index):  {build * 1000:9.1f} ms")
+    print(f"legacy definitions scan:       {legacy_time * 1000:9.1f} ms")
+    print(f"per-file definition index:     {indexed_time * 1000:9.1f} ms")
+    print(f"speedup:                       {legacy_time / indexed_time:9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,7 @@ class TestAgentFactoryService:
             123,
             operational_mode=OperationalMode.CHAT,
             settings_snapshot=settings_snapshot,
+            user_message=None,
         )
         coder_agent_cls_mock.assert_called_once()
 
@@ -130,6 +131,7 @@ class TestAgentFactoryService:
             1,
             operational_mode=OperationalMode.PLANNER,
             settings_snapshot=settings_snapshot,
+            user_message=None,
         )
 
     @pytest.mark.parametrize(
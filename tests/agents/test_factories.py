@@ -210,6 +210,7 @@ class TestAgentsFactories:
             session_id=123,
             turn_id="t1",
             settings_snapshot=settings_snapshot,
+            user_message=None,
         )
 
     async def test_build_agent_propagates_error_from_agent_factory_service(
@@ -241,4 +242,5 @@ class TestAgentsFactories:
             session_id=123,
             turn_id=None,
             settings_snapshot=settings_snapshot,
+            user_message=None,
         )
@@ -8,7 +8,7 @@ from llama_index.core.workflow import Context
 from app.agents.models import WorkflowState
 from app.agents.services import AgentContextService, WorkflowService
 from app.context.models import ContextFile
-from app.context.schemas import FileReadResult, FileStatus
+from app.context.schemas import FileReadResult, FileStatus, RepoMapResult
 from app.core.enums import OperationalMode
 from app.projects.exceptions import ActiveProjectRequiredException
 from app.projects.models import Project
@@ -176,7 +176,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value="tree")
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="tree")
+        )
         workspace_service_mock.get_active_context = AsyncMock(
             return_value=[ContextFile(file_path="a.py")]
         )
@@ -197,6 +199,31 @@ class TestAgentContextService:
         assert "<ACTIVE_CONTEXT>" in prompt
         assert "tree" in prompt
         assert "code" in prompt
+        assert "PARTIAL MAP" not in prompt
+
+    async def test_build_system_prompt_flags_partial_repo_map(
+        self,
+        agent_context_service: AgentContextService,
+        project_service_mock: MagicMock,
+        repo_map_service_mock: MagicMock,
+        settings_snapshot,
+    ):
+        """A repo map cut short by the time budget should be flagged to the model."""
+        project_service_mock.get_active_project = AsyncMock(
+            return_value=Project(id=1, name="p", path="/")
+        )
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="tree", complete=False)
+        )
+
+        prompt = await agent_context_service.build_system_prompt(
+            session_id=1,
+            operational_mode=OperationalMode.CODING,
+            settings_snapshot=settings_snapshot,
+        )
+
+        assert "tree" in prompt
+        assert "PARTIAL MAP" in prompt
 
     async def test_build_system_prompt_includes_repo_map_in_ask_mode(
         self,
@@ -209,7 +236,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value="tree")
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="tree")
+        )
 
         prompt = await agent_context_service.build_system_prompt(
             session_id=1,
@@ -250,7 +279,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value="tree")
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="tree")
+        )
 
         prompt = await agent_context_service.build_system_prompt(
             session_id=1,
@@ -404,7 +435,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value=None)
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="")
+        )
 
         prompt = await agent_context_service.build_system_prompt(
             session_id=1,
@@ -467,7 +500,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value="MAP")
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="MAP")
+        )
         workspace_service_mock.get_active_context = AsyncMock(
             return_value=[ContextFile(file_path="f.py")]
         )
@@ -524,7 +559,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value="MAP")
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="MAP")
+        )
 
         prompt = await agent_context_service.build_system_prompt(
             session_id=1,
@@ -819,7 +856,9 @@ class TestAgentContextService:
         project_service_mock.get_active_project = AsyncMock(
             return_value=Project(id=1, name="p", path="/")
         )
-        repo_map_service_mock.generate_repo_map = AsyncMock(return_value=None)
+        repo_map_service_mock.generate_repo_map = AsyncMock(
+            return_value=RepoMapResult(content="")
+        )
 
         prompt = await agent_context_service.build_system_prompt(
             session_id=1, settings_snapshot=settings_snapshot
@@ -152,6 +152,17 @@ class TestWebSocketOrchestrator:
 
         handler.assert_awaited_once_with(event, turn=turn)
 
+    async def test_render_warm_up_progress_logs_to_panel(
+        self, orchestrator, mock_websocket_manager
+    ):
+        """Warm-up progress is rendered as log items, failures in red."""
+        await orchestrator.render_warm_up_progress("p: 3 files listed.", False)
+        await orchestrator.render_warm_up_progress("warm-up failed", True)
+
+        info_html, error_html = mock_websocket_manager.sent_html
+        assert "p: 3 files listed." in info_html
+        assert "red" in error_html and "warm-up failed" in error_html
+
     async def test_render_tool_call_renders_diff_patch_if_apply_patch(
         self, orchestrator, mock_websocket_manager
     ):
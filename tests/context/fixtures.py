@@ -1,3 +1,4 @@
+from collections.abc import Generator
 from dataclasses import dataclass
 from unittest.mock import AsyncMock, MagicMock
 
@@ -8,6 +9,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.context.dependencies import get_context_page_service, get_context_service
 from app.context.models import ContextFile
 from app.context.repomap import RepoMap
+from app.context.repomap.cache import clear_tag_caches
+from app.context.repomap.generated import get_generated_file_cache
+from app.context.repomap.graph import clear_repo_graphs
+from app.context.repomap.memo import clear_repo_map_memo
+from app.context.repomap.mentions import clear_mention_extractors
+from app.context.repomap.trees import get_parse_tree_cache
 from app.context.repositories import ContextRepository
 from app.context.services import (
     CodebaseService,
@@ -17,6 +24,12 @@ from app.context.services import (
     SearchService,
     WorkspaceService,
 )
+from app.context.services.codebase import (
+    clear_file_indexes,
+    clear_ignore_specs,
+    get_file_content_cache,
+)
+from app.core.config import settings
 from app.projects.services import ProjectService
 
 
@@ -468,6 +481,32 @@ def run():
     }
 
 
+@pytest.fixture(autouse=True)
+def repomap_cache_dir(tmp_path, monkeypatch) -> Generator[str]:
+    """Keeps persistent repo map caches out of the real workspace directory."""
+    cache_dir = str(tmp_path / "repomap_cache")
+    monkeypatch.setattr(settings, "REPOMAP_CACHE_DIR", cache_dir)
+    clear_tag_caches()
+    clear_repo_graphs()
+    clear_repo_map_memo()
+    get_parse_tree_cache().clear()
+    clear_mention_extractors()
+    clear_ignore_specs()
+    clear_file_indexes()
+    get_file_content_cache().clear()
+    get_generated_file_cache().clear()
+    yield cache_dir
+    clear_tag_caches()
+    clear_repo_graphs()
+    clear_repo_map_memo()
+    get_parse_tree_cache().clear()
+    clear_mention_extractors()
+    clear_ignore_specs()
+    clear_file_indexes()
+    get_file_content_cache().clear()
+    get_generated_file_cache().clear()
+
+
 @pytest.fixture
 def repomap_instance(repomap_tmp_project) -> RepoMap:
     root = repomap_tmp_project["root"]
@@ -502,6 +541,7 @@ def repomap_mock(mocker: MockerFixture) -> MagicMock:
     instance = MagicMock()
     instance.generate = AsyncMock(return_value="OUT")
     instance.format_top_level_structure = MagicMock(return_value="OUT")
+    instance.complete = True
     repomap_cls.return_value = instance
     instance.mock_class = repomap_cls
     return instance
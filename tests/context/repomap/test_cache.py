@@ -0,0 +1,179 @@
+import os
+import threading
+from pathlib import Path
+
+from app.context.repomap import RepoMap, extraction
+from app.context.repomap.cache import TagCache, clear_tag_caches, get_tag_cache
+from app.context.repomap.extraction import RawTag
+from app.core.config import settings
+
+
+def _tags() -> list[RawTag]:
+    return [("core", "def", 0), ("core", "ref", 4)]
+
+
+def test_tag_cache_miss_on_unknown_path(tmp_path):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    assert cache.get("src/a.py", 10, 1) is None
+
+
+def test_tag_cache_hit_on_matching_stat(tmp_path):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    cache.set("src/a.py", 10, 1, "h1", _tags())
+
+    assert cache.get("src/a.py", 10, 1) == _tags()
+
+
+def test_tag_cache_stat_mismatch_without_hash_is_a_miss(tmp_path):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    cache.set("src/a.py", 10, 1, "h1", _tags())
+
+    assert cache.get("src/a.py", 10, 2) is None
+    assert cache.get("src/a.py", 11, 1) is None
+
+
+def test_tag_cache_stat_mismatch_with_same_hash_refreshes_entry(tmp_path):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    cache.set("src/a.py", 10, 1, "h1", _tags())
+
+    assert cache.get("src/a.py", 10, 2, content_hash="h1") == _tags()
+    # The new stat is now trusted without a hash.
+    assert cache.get("src/a.py", 10, 2) == _tags()
+
+
+def test_tag_cache_stat_mismatch_with_different_hash_is_a_miss(tmp_path):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    cache.set("src/a.py", 10, 1, "h1", _tags())
+
+    assert cache.get("src/a.py", 10, 2, content_hash="h2") is None
+
+
+def test_tag_cache_set_many(tmp_path):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    cache.set_many([("src/a.py", 10, 1, "h1", _tags()), ("src/b.py", 20, 2, "h2", [])])
+
+    assert cache.get("src/a.py", 10, 1) == _tags()
+    assert cache.get("src/b.py", 20, 2) == []
+
+
+def test_tag_cache_survives_reopen(tmp_path):
+    db_path = str(tmp_path / "tags.sqlite3")
+    cache = TagCache(db_path)
+    cache.set("src/a.py", 10, 1, "h1", _tags())
+    cache.close()
+
+    reopened = TagCache(db_path)
+    assert reopened.get("src/a.py", 10, 1) == _tags()
+
+
+def test_tag_cache_misses_rows_written_under_other_generated_thresholds(
+    tmp_path, monkeypatch
+):
+    cache = TagCache(str(tmp_path / "tags.sqlite3"))
+    cache.set("src/a.py", 10, 1, "h1", [])
+
+    monkeypatch.setattr(
+        settings, "GENERATED_FILE_MAX_SIZE", settings.GENERATED_FILE_MAX_SIZE + 1
+    )
+
+    assert cache.get("src/a.py", 10, 1) is None
+    assert cache.get_hash("src/a.py") is None
+
+
+async def test_repomap_reextracts_generated_verdicts_when_thresholds_change(
+    repomap_tmp_project, monkeypatch
+):
+    root = repomap_tmp_project["root"]
+    defs = repomap_tmp_project["defs"]
+    cache = get_tag_cache(root)
+    rm = RepoMap(all_files=[defs], active_context_files=[], root=root, tag_cache=cache)
+
+    monkeypatch.setattr(settings, "GENERATED_FILE_MAX_SIZE", 1)
+    assert await rm.extract_tags(defs) == []
+
+    monkeypatch.setattr(settings, "GENERATED_FILE_MAX_SIZE", 1_000_000)
+    assert {t.kind for t in await rm.extract_tags(defs)} >= {"def"}
+
+
+def test_get_tag_cache_is_shared_per_project(tmp_path, repomap_cache_dir):
+    a = get_tag_cache(str(tmp_path / "a"))
+    assert get_tag_cache(str(tmp_path / "a")) is a
+    assert get_tag_cache(str(tmp_path / "b")) is not a
+    assert a.db_path.startswith(repomap_cache_dir)
+
+    clear_tag_caches()
+    assert get_tag_cache(str(tmp_path / "a")) is not a
+
+
+async def test_repomap_extract_tags_uses_cache_for_unchanged_files(
+    repomap_tmp_project, mocker
+):
+    root = repomap_tmp_project["root"]
+    defs = repomap_tmp_project["defs"]
+    cache = get_tag_cache(root)
+    rm = RepoMap(all_files=[defs], active_context_files=[], root=root, tag_cache=cache)
+
+    first = await rm.extract_tags(defs)
+    parse_spy = mocker.spy(extraction, "parse_tags")
+    second = await rm.extract_tags(defs)
+
+    assert second == first
+    parse_spy.assert_not_called()
+
+
+async def test_repomap_extract_tags_reparses_modified_files(repomap_tmp_project):
+    root = repomap_tmp_project["root"]
+    defs = repomap_tmp_project["defs"]
+    cache = get_tag_cache(root)
+    rm = RepoMap(all_files=[defs], active_context_files=[], root=root, tag_cache=cache)
+
+    await rm.extract_tags(defs)
+    Path(defs).write_text("def brand_new():\n    return 1\n", encoding="utf-8")
+    stat = os.stat(defs)
+    os.utime(defs, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    tags = await rm.extract_tags(defs)
+    assert {(t.name, t.kind) for t in tags} == {("brand_new", "def")}
+
+
+async def test_repomap_rank_files_populates_cache_across_instances(
+    repomap_instance, repomap_tmp_project, mocker
+):
+    root = repomap_tmp_project["root"]
+    repomap_instance.tag_cache = get_tag_cache(root)
+    ranked_cold, _ = await repomap_instance._rank_files()
+
+    clear_tag_caches()
+    rm = RepoMap(
+        all_files=repomap_instance.all_files,
+        active_context_files=[],
+        root=root,
+        tag_cache=get_tag_cache(root),
+    )
+    parse_spy = mocker.spy(extraction, "parse_tags")
+    ranked_warm, _ = await rm._rank_files()
+
+    assert ranked_warm == ranked_cold
+    parse_spy.assert_not_called()
+
+
+async def test_repomap_writes_tag_cache_off_the_event_loop(repomap_tmp_project, mocker):
+    root = repomap_tmp_project["root"]
+    defs = repomap_tmp_project["defs"]
+    cache = get_tag_cache(root)
+    rm = RepoMap(all_files=[defs], active_context_files=[], root=root, tag_cache=cache)
+    loop_thread = threading.get_ident()
+    writer_threads = []
+    set_many = cache.set_many
+    mocker.patch.object(
+        cache,
+        "set_many",
+        side_effect=lambda rows: (
+            writer_threads.append(threading.get_ident()),
+            set_many(rows),
+        ),
+    )
+
+    await rm.extract_tags(defs)
+
+    assert writer_threads and loop_thread not in writer_threads
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+from app.context.repomap import RepoGraph, RepoMap, extraction, get_tag_cache
+from app.context.repomap import repomap as repomap_module
+from app.context.repomap.extraction import extract_batch
+
+
+def _build(project: dict, graph: RepoGraph, deadline: float | None) -> RepoMap:
+    return RepoMap(
+        all_files=[project[k] for k in ("defs", "use1", "use2")],
+        active_context_files=[],
+        root=project["root"],
+        token_limit=10_000,
+        tag_cache=get_tag_cache(project["root"]),
+        graph=graph,
+        deadline=deadline,
+    )
+
+
+def _now() -> float:
+    return asyncio.get_running_loop().time()
+
+
+async def test_repomap_returns_partial_map_when_deadline_passes(
+    repomap_tmp_project, mocker
+):
+    graph = RepoGraph()
+    release = threading.Event()
+
+    def slow_extract_batch(queries_dir, batch, trees=None):
+        release.wait(5)
+        return extract_batch(queries_dir, batch, trees)
+
+    mocker.patch.object(repomap_module, "extract_batch", slow_extract_batch)
+
+    rm = _build(repomap_tmp_project, graph, deadline=_now())
+    out = await rm.generate(include_active_content=False)
+
+    assert rm.complete is False
+    assert "src/defs.py\n" in out
+    assert "#### Ranked Definitions" not in out
+    assert graph.background_extraction is not None
+
+    release.set()
+    await graph.background_extraction
+    # the background extraction applied its batches to the graph
+    assert "src/defs.py" in graph.files
+    assert graph.get_stat("src/defs.py") is not None
+
+    parse_spy = mocker.spy(extraction, "parse_tags")
+    rm = _build(repomap_tmp_project, graph, deadline=None)
+    out = await rm.generate(include_active_content=False)
+
+    assert rm.complete is True
+    assert "src/defs.py:\n" in out
+    # the background extraction filled the tag cache
+    parse_spy.assert_not_called()
+
+
+async def test_repomap_joins_running_background_extraction(repomap_tmp_project, mocker):
+    graph = RepoGraph()
+    started = threading.Event()
+    release = threading.Event()
+    extracted: list[str] = []
+
+    def slow_extract_batch(queries_dir, batch, trees=None):
+        extracted.extend(p.path for p in batch)
+        started.set()
+        release.wait(5)
+        return extract_batch(queries_dir, batch, trees)
+
+    mocker.patch.object(repomap_module, "extract_batch", slow_extract_batch)
+
+    await _build(repomap_tmp_project, graph, deadline=_now())._rank_files()
+    # the worker thread may not have picked up the batch yet
+    assert await asyncio.to_thread(started.wait, 5)
+    first_pass = list(extracted)
+
+    rm = _build(repomap_tmp_project, graph, deadline=_now())
+    await rm._rank_files()
+
+    assert rm.complete is False
+    assert extracted == first_pass
+
+    release.set()
+    rm = _build(repomap_tmp_project, graph, deadline=None)
+    ranked, _ = await rm._rank_files()
+
+    assert rm.complete is True
+    assert "src/defs.py" in ranked
+
+
+async def test_repomap_does_not_wait_past_deadline_for_busy_graph(
+    repomap_tmp_project,
+):
+    graph = RepoGraph()
+
+    async with graph.lock:
+        # e.g. a warm-up is refreshing the graph
+        rm = _build(repomap_tmp_project, graph, deadline=_now() + 0.05)
+        out = await asyncio.wait_for(rm.generate(include_active_content=False), 2)
+
+    assert rm.complete is False
+    assert "src/defs.py\n" in out
+    assert "#### Ranked Definitions" not in out
+    assert not graph.lock.locked()
+
+
+async def test_repomap_ranks_processed_files_while_graph_is_busy(
+    repomap_tmp_project,
+):
+    graph = RepoGraph()
+    await _build(repomap_tmp_project, graph, deadline=None).generate(
+        include_active_content=False
+    )
+
+    async with graph.lock:
+        # e.g. a warm-up is refreshing the graph after the first pass
+        rm = _build(repomap_tmp_project, graph, deadline=_now() + 0.05)
+        out = await asyncio.wait_for(rm.generate(include_active_content=False), 2)
+
+    assert rm.complete is False
+    assert "#### Ranked Definitions" in out
+    assert "src/defs.py:\n" in out
@@ -0,0 +1,138 @@
+import os
+
+from app.context.repomap import RepoMap, extraction
+from app.context.repomap.cache import get_tag_cache
+from app.context.repomap.extraction import (
+    PendingFile,
+    TagExtractionPool,
+    extract_batch,
+    get_extraction_pool,
+    hash_content,
+    make_batches,
+)
+from app.core.config import settings
+
+
+def test_make_batches_balances_total_size():
+    pending = [
+        PendingFile(path=f"f{i}.py", size=size)
+        for i, size in enumerate([100, 90, 10, 10, 10, 10, 50, 40])
+    ]
+
+    batches = make_batches(pending, 2)
+
+    totals = sorted(sum(p.size for p in batch) for batch in batches)
+    assert totals == [160, 160]
+    assert sorted(p.path for batch in batches for p in batch) == sorted(
+        p.path for p in pending
+    )
+
+
+def test_make_batches_never_returns_empty_batches():
+    pending = [PendingFile(path="a.py", size=1), PendingFile(path="b.py", size=1)]
+
+    assert len(make_batches(pending, 8)) == 2
+    assert make_batches([], 4) == []
+
+
+def test_extract_batch_returns_compact_tags(repomap_tmp_project):
+    (result,) = extract_batch(
+        settings.queries_dir,
+        [PendingFile(path=repomap_tmp_project["defs"], size=0)],
+    )
+
+    assert result.error is None
+    assert ("core", "def", 0) in result.tags
+    assert result.content_hash
+    assert result.mtime_ns == os.stat(repomap_tmp_project["defs"]).st_mtime_ns
+
+
+def test_extract_batch_skips_parsing_when_hash_matches(repomap_tmp_project, mocker):
+    defs = repomap_tmp_project["defs"]
+    with open(defs, encoding="utf-8") as f:
+        content_hash = hash_content(f.read())
+    parse_spy = mocker.spy(extraction, "parse_tags")
+
+    (result,) = extract_batch(
+        settings.queries_dir,
+        [PendingFile(path=defs, size=0, cached_hash=content_hash)],
+    )
+
+    assert result.error is None
+    assert result.tags is None
+    parse_spy.assert_not_called()
+
+
+def test_extract_batch_reports_errors_per_file(repomap_tmp_project, tmp_path):
+    results = extract_batch(
+        settings.queries_dir,
+        [
+            PendingFile(path=str(tmp_path / "missing.py"), size=0),
+            PendingFile(path=repomap_tmp_project["use1"], size=0),
+        ],
+    )
+
+    assert results[0].error
+    assert results[1].error is None
+    assert results[1].tags
+
+
+def test_get_extraction_pool_disabled_with_zero_workers(monkeypatch):
+    monkeypatch.setattr(settings, "REPOMAP_EXTRACTION_WORKERS", 0)
+
+    assert get_extraction_pool() is None
+
+
+async def test_tag_extraction_pool_matches_in_process_results(repomap_tmp_project):
+    pending = [
+        PendingFile(path=repomap_tmp_project[key], size=0)
+        for key in ("defs", "use1", "use2", "refs_equal")
+    ]
+    pool = TagExtractionPool(max_workers=2)
+    try:
+        parallel = await pool.extract(settings.queries_dir, pending)
+    finally:
+        pool.shutdown()
+
+    sequential = extract_batch(settings.queries_dir, pending)
+    assert {r.path: r.tags for r in parallel} == {r.path: r.tags for r in sequential}
+
+
+async def test_repomap_uses_pool_above_threshold(
+    repomap_instance, repomap_tmp_project, monkeypatch, mocker
+):
+    monkeypatch.setattr(settings, "REPOMAP_PARALLEL_MIN_FILES", 1)
+    calls = []
+
+    async def extract_iter(queries_dir, pending):
+        calls.append(pending)
+        yield extract_batch(queries_dir, pending)
+
+    pool = mocker.MagicMock()
+    pool.extract_iter = extract_iter
+    mocker.patch("app.context.repomap.repomap.get_extraction_pool", return_value=pool)
+
+    ranked, _ = await repomap_instance._rank_files()
+
+    assert len(calls) == 1
+    defs_rel = os.path.relpath(repomap_tmp_project["defs"], repomap_tmp_project["root"])
+    assert ranked[defs_rel] == max(ranked.values())
+
+
+async def test_repomap_touched_file_reuses_cached_tags(repomap_tmp_project, mocker):
+    root = repomap_tmp_project["root"]
+    defs = repomap_tmp_project["defs"]
+    rm = RepoMap(
+        all_files=[defs],
+        active_context_files=[],
+        root=root,
+        tag_cache=get_tag_cache(root),
+    )
+    first = await rm.extract_tags(defs)
+
+    stat = os.stat(defs)
+    os.utime(defs, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    parse_spy = mocker.spy(extraction, "parse_tags")
+
+    assert await rm.extract_tags(defs) == first
+    parse_spy.assert_not_called()
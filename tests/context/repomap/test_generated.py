@@ -0,0 +1,55 @@
+from app.context.repomap import extraction
+from app.context.repomap.extraction import PendingFile, extract_batch
+from app.context.repomap.generated import GeneratedFileCache, GeneratedFileDetector
+from app.core.config import settings
+
+
+def test_detector_flags_generated_names():
+    detector = GeneratedFileDetector()
+
+    assert detector.is_generated("static/app.min.js", "var a=1;\n")
+    assert detector.is_generated("proto/user_pb2.py", "x = 1\n")
+    assert not detector.is_generated("src/app.js", "var a = 1;\n")
+
+
+def test_detector_flags_size_line_length_and_headers():
+    detector = GeneratedFileDetector(max_file_size=1000, max_avg_line_length=80)
+
+    assert detector.is_generated("a.py", "x = 1\n", size=1001)
+    assert detector.is_generated("a.js", "var a=1;" * 50)
+    assert detector.is_generated("a.go", "// Code generated by protoc. DO NOT EDIT.\n")
+    assert detector.is_generated("a.py", "# @generated\nx = 1\n")
+    assert not detector.is_generated("a.py", "def f():\n    return 1\n" * 40)
+    assert not detector.is_generated("a.py", "")
+
+
+def test_generated_file_cache_checks_version_and_detector():
+    cache = GeneratedFileCache(max_entries=2)
+    detector = GeneratedFileDetector()
+
+    cache.put("/p/a.js", (1, 10), detector, True)
+
+    assert cache.get("/p/a.js", (1, 10), detector) is True
+    assert cache.get("/p/a.js", (2, 10), detector) is None
+    assert cache.get("/p/a.js", (1, 10), GeneratedFileDetector(max_file_size=5)) is None
+
+    cache.put("/p/b.js", (1, 10), detector, False)
+    cache.put("/p/c.js", (1, 10), detector, False)
+
+    assert len(cache) == 2
+    assert cache.get("/p/a.js", (1, 10), detector) is None
+
+
+def test_extract_batch_returns_no_tags_for_generated_files(tmp_path, mocker):
+    generated = tmp_path / "models.py"
+    generated.write_text("# Auto-generated, do not edit.\nclass Model:\n    pass\n")
+    parse_spy = mocker.spy(extraction, "parse_tags")
+
+    (result,) = extract_batch(
+        settings.queries_dir, [PendingFile(path=str(generated), size=0)]
+    )
+
+    assert result.error is None
+    assert result.tags == []
+    assert result.content_hash
+    parse_spy.assert_not_called()
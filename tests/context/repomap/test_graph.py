@@ -0,0 +1,322 @@
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.context.repomap import RepoMap, extraction
+from app.context.repomap.extraction import RawTag
+from app.context.repomap.graph import RepoGraph, clear_repo_graphs, get_repo_graph
+from app.context.schemas import Tag
+
+
+def _def(name: str, line: int = 0) -> RawTag:
+    return name, "def", line
+
+
+def _ref(name: str, line: int = 0) -> RawTag:
+    return name, "ref", line
+
+
+def _edge_weights(graph: RepoGraph, mentioned=None) -> dict[tuple[str, str], float]:
+    nodes, sources, targets, weights = graph.edges(mentioned)
+    result: dict[tuple[str, str], float] = {}
+    for s, t, w in zip(
+        sources.tolist(), targets.tolist(), weights.tolist(), strict=True
+    ):
+        key = (nodes[s], nodes[t])
+        result[key] = result.get(key, 0.0) + w
+    return result
+
+
+def _touch(path: str) -> None:
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_repo_graph_builds_reference_edges():
+    graph = RepoGraph()
+    graph.apply(
+        {"a.py": [_def("core")], "b.py": [_ref("core"), _ref("core")]},
+        {},
+    )
+
+    assert _edge_weights(graph) == {("a.py", "a.py"): 0.1, ("b.py", "a.py"): 2.0}
+
+
+def test_repo_graph_applies_private_and_mentioned_multipliers():
+    graph = RepoGraph()
+    graph.apply(
+        {
+            "a.py": [_def("_hidden"), _def("public")],
+            "b.py": [_ref("_hidden"), _ref("public")],
+        },
+        {},
+    )
+
+    base = _edge_weights(graph)
+    assert np.isclose(base[("b.py", "a.py")], 0.1 + 1.0)
+
+    mentioned = _edge_weights(graph, {"public"})
+    assert np.isclose(mentioned[("b.py", "a.py")], 0.1 + 10.0)
+    # self-edges are not boosted by mentions
+    assert mentioned[("a.py", "a.py")] == base[("a.py", "a.py")]
+
+
+def test_repo_graph_retracts_removed_and_replaced_files():
+    graph = RepoGraph()
+    graph.apply(
+        {
+            "a.py": [_def("core")],
+            "b.py": [_ref("core")],
+            "c.py": [_def("util"), _ref("core")],
+        },
+        {},
+    )
+
+    graph.apply({"c.py": [_def("util")]}, {}, removed={"b.py"})
+
+    assert graph.files == {"a.py", "c.py"}
+    # unreferenced definitions keep their self-edges
+    assert _edge_weights(graph) == {("a.py", "a.py"): 0.1, ("c.py", "c.py"): 0.1}
+
+    graph.apply({"b.py": [_ref("util")]}, {})
+    weights = _edge_weights(graph)
+    assert set(weights) == {("a.py", "a.py"), ("c.py", "c.py"), ("b.py", "c.py")}
+    assert weights[("c.py", "c.py")] == 0.1
+    # 3 files, util used by 2 of them
+    assert np.isclose(weights[("b.py", "c.py")], np.log(4 / 3) + 1)
+
+
+def test_repo_graph_weights_rare_identifiers_above_common_ones():
+    graph = RepoGraph()
+    graph.apply(
+        {
+            "a.py": [_def("rare"), _def("common")],
+            "b.py": [_ref("rare"), _ref("common")],
+            "c.py": [_ref("common")],
+            "d.py": [_ref("common")],
+            "e.py": [],
+        },
+        {},
+    )
+
+    nodes, sources, targets, weights = graph.edges()
+    by_edge = {}
+    for s, t, w in zip(
+        sources.tolist(), targets.tolist(), weights.tolist(), strict=True
+    ):
+        by_edge.setdefault((nodes[s], nodes[t]), []).append(w)
+
+    rare, common = sorted(by_edge[("b.py", "a.py")], reverse=True)
+    assert np.isclose(rare, np.log(6 / 3) + 1)
+    assert np.isclose(common, np.log(6 / 5) + 1)
+    assert np.isclose(_edge_weights(graph)[("c.py", "a.py")], common)
+
+
+def test_repo_graph_skips_identifiers_with_too_many_definers():
+    files = {f"impl{i}.py": [_def("run")] for i in range(4)}
+    files["main.py"] = [_ref("run"), _ref("setup")]
+    files["setup.py"] = [_def("setup")]
+
+    capped = RepoGraph(max_definers=3)
+    capped.apply(files, {})
+    # the definers of the capped name keep their self-edges
+    assert set(_edge_weights(capped)) == {
+        ("setup.py", "setup.py"),
+        ("main.py", "setup.py"),
+        *((f"impl{i}.py", f"impl{i}.py") for i in range(4)),
+    }
+
+    uncapped = RepoGraph(max_definers=4)
+    uncapped.apply(files, {})
+    assert ("main.py", "impl0.py") in _edge_weights(uncapped)
+
+
+def test_repo_graph_incremental_updates_match_full_rebuild():
+    incremental = RepoGraph()
+    incremental.apply(
+        {
+            "a.py": [_def("core"), _ref("util")],
+            "b.py": [_ref("core")],
+            "c.py": [_def("util")],
+        },
+        {},
+    )
+    incremental.edges()
+    incremental.apply(
+        {"b.py": [_ref("core"), _ref("util")], "d.py": [_def("core")]},
+        {},
+        removed={"c.py"},
+    )
+    incremental.apply({"c.py": [_def("util")]}, {})
+
+    rebuilt = RepoGraph()
+    rebuilt.apply(
+        {
+            "a.py": [_def("core"), _ref("util")],
+            "b.py": [_ref("core"), _ref("util")],
+            "c.py": [_def("util")],
+            "d.py": [_def("core")],
+        },
+        {},
+    )
+
+    assert _edge_weights(incremental) == _edge_weights(rebuilt)
+    assert incremental.definition_lines() == rebuilt.definition_lines()
+
+
+def test_repo_graph_diff_reports_changed_and_removed_files(tmp_path):
+    a = tmp_path / "a.py"
+    b = tmp_path / "b.py"
+    a.write_text("x = 1\n", encoding="utf-8")
+    b.write_text("y = 1\n", encoding="utf-8")
+    graph = RepoGraph()
+
+    changed, removed = graph.diff({"a.py": str(a), "b.py": str(b)})
+    assert set(changed) == {"a.py", "b.py"}
+    assert removed == set()
+    graph.apply({"a.py": [], "b.py": []}, changed)
+
+    _touch(str(a))
+    b.unlink()
+    changed, removed = graph.diff({"a.py": str(a), "b.py": str(b)})
+    assert set(changed) == {"a.py"}
+    assert removed == {"b.py"}
+
+    changed, removed = graph.diff({})
+    assert removed == {"a.py", "b.py"}
+
+
+def test_get_repo_graph_is_shared_per_project(tmp_path):
+    a = get_repo_graph(str(tmp_path / "a"))
+    assert get_repo_graph(str(tmp_path / "a")) is a
+    assert get_repo_graph(str(tmp_path / "b")) is not a
+
+    clear_repo_graphs()
+    assert get_repo_graph(str(tmp_path / "a")) is not a
+
+
+async def test_repomap_unchanged_turn_extracts_nothing(repomap_tmp_project, mocker):
+    root = repomap_tmp_project["root"]
+    graph = RepoGraph()
+    all_files = [repomap_tmp_project[k] for k in ("defs", "use1", "use2", "unknown")]
+
+    first = RepoMap(
+        all_files=all_files, active_context_files=[], root=root, graph=graph
+    )
+    ranked_first, _ = await first._rank_files()
+
+    extract_spy = mocker.spy(extraction, "extract_file")
+    second = RepoMap(
+        all_files=all_files, active_context_files=[], root=root, graph=graph
+    )
+    ranked_second, _ = await second._rank_files()
+
+    extract_spy.assert_not_called()
+    assert ranked_second.keys() == ranked_first.keys()
+
+
+async def test_repomap_reextracts_only_modified_files(repomap_tmp_project, mocker):
+    root = repomap_tmp_project["root"]
+    graph = RepoGraph()
+    all_files = [repomap_tmp_project[k] for k in ("defs", "use1", "use2")]
+    rm = RepoMap(all_files=all_files, active_context_files=[], root=root, graph=graph)
+    await rm._rank_files()
+
+    use2 = repomap_tmp_project["use2"]
+    Path(use2).write_text("def standalone():\n    return 1\n", encoding="utf-8")
+    _touch(use2)
+    extract_spy = mocker.spy(extraction, "extract_file")
+
+    ranked, def_lines = await rm._rank_files()
+
+    assert [call.args[1].path for call in extract_spy.call_args_list] == [use2]
+    # ranked through the self-edge of its (unreferenced) definition
+    assert "src/use2.py" in ranked
+    assert def_lines["src/use2.py"] == [0]
+
+
+async def test_repomap_ranks_files_with_only_unreferenced_definitions(
+    repomap_tmp_project,
+):
+    root = repomap_tmp_project["root"]
+    lonely = Path(root) / "src" / "lonely.py"
+    lonely.write_text(
+        "def lonely_helper():\n    return 1\n\n\nclass Standalone:\n    pass\n",
+        encoding="utf-8",
+    )
+    all_files = [repomap_tmp_project[k] for k in ("defs", "use1", "use2")]
+    rm = RepoMap(
+        all_files=[*all_files, str(lonely)],
+        active_context_files=[],
+        root=root,
+        token_limit=10_000,
+        graph=RepoGraph(),
+    )
+
+    out = await rm.generate(include_active_content=False)
+
+    ranked_section = out.split("#### Ranked Definitions\n", 1)[1]
+    assert "src/lonely.py:\n" in ranked_section
+    assert "lonely_helper" in ranked_section
+
+
+async def test_repomap_updates_and_ranks_the_graph_off_the_event_loop(
+    repomap_tmp_project, mocker
+):
+    root = repomap_tmp_project["root"]
+    graph = RepoGraph()
+    threads: dict[str, threading.Thread] = {}
+
+    def record(name, method):
+        def wrapper(*args, **kwargs):
+            threads[name] = threading.current_thread()
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    mocker.patch.object(graph, "apply", record("apply", graph.apply))
+    mocker.patch.object(graph, "edges", record("edges", graph.edges))
+    mocker.patch.object(graph.ranker, "rank", record("rank", graph.ranker.rank))
+    all_files = [repomap_tmp_project[k] for k in ("defs", "use1", "use2")]
+
+    ranked, _ = await RepoMap(
+        all_files=all_files, active_context_files=[], root=root, graph=graph
+    )._rank_files()
+
+    assert "src/defs.py" in ranked
+    assert set(threads) == {"apply", "edges", "rank"}
+    assert threading.main_thread() not in threads.values()
+
+
+async def test_repomap_drops_files_no_longer_listed(repomap_tmp_project):
+    root = repomap_tmp_project["root"]
+    graph = RepoGraph()
+    all_files = [repomap_tmp_project[k] for k in ("defs", "use1", "use2")]
+    await RepoMap(
+        all_files=all_files, active_context_files=[], root=root, graph=graph
+    )._rank_files()
+
+    ranked, def_lines = await RepoMap(
+        all_files=all_files[:2], active_context_files=[], root=root, graph=graph
+    )._rank_files()
+
+    assert "src/use2.py" not in ranked
+    assert "src/use2.py" not in graph.files
+    assert "src/use2.py" not in def_lines
+
+
+def test_repo_graph_stores_interned_tag_columns():
+    graph = RepoGraph()
+    graph.apply(
+        {"a.py": [_def("core", 3), _ref("util", 5)], "b.py": [_def("util", 1)]},
+        {},
+    )
+
+    assert len(graph.idents) == 2
+    assert graph.get_tags("a.py") == [
+        Tag(name="core", kind="def", line=3),
+        Tag(name="util", kind="ref", line=5),
+    ]
+    assert graph.get_tags("missing.py") == []
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from app.context.repomap.languages import LanguageRegistry, get_language_registry
+from app.core.config import settings
+
+
+def test_language_registry_compiles_query_once():
+    registry = LanguageRegistry(Path(settings.queries_dir))
+
+    query = registry.get_query("python")
+
+    assert query is not None
+    assert registry.get_query("python") is query
+
+
+def test_language_registry_returns_none_without_scm(tmp_path):
+    registry = LanguageRegistry(tmp_path)
+
+    assert registry.get_query("python") is None
+
+
+def test_language_registry_reuses_parser_per_thread():
+    registry = LanguageRegistry(Path(settings.queries_dir))
+
+    assert registry.get_parser("python") is registry.get_parser("python")
+
+
+def test_language_registry_warm_returns_languages_with_queries(tmp_path):
+    registry = LanguageRegistry(Path(settings.queries_dir))
+
+    warmed = registry.warm(["src/a.py", "src/b.py", "notes.unknown", "web/app.js"])
+
+    assert warmed == ["javascript", "python"]
+
+
+def test_get_language_registry_is_shared_per_queries_dir(tmp_path):
+    default = get_language_registry()
+
+    assert get_language_registry(settings.queries_dir) is default
+    assert get_language_registry(tmp_path) is not default
+
+
+async def test_repomap_extract_tags_does_not_recompile_query(
+    repomap_instance, repomap_tmp_project, mocker
+):
+    await repomap_instance.extract_tags(repomap_tmp_project["defs"])
+    query_cls = mocker.patch("app.context.repomap.languages.Query")
+
+    tags = await repomap_instance.extract_tags(repomap_tmp_project["use1"])
+
+    assert tags
+    query_cls.assert_not_called()
+
+
+async def test_repomap_languages_follows_queries_dir(tmp_path, repomap_instance):
+    repomap_instance.queries_dir = tmp_path
+
+    assert isinstance(repomap_instance.languages, LanguageRegistry)
+    assert repomap_instance.languages.queries_dir == tmp_path
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.context.repomap.memo import RepoMapMemo, SingleFlight, project_fingerprint
+
+
+def test_project_fingerprint_tracks_stat_and_file_set(tmp_path):
+    a = tmp_path / "a.py"
+    a.write_text("x = 1\n", encoding="utf-8")
+    missing = str(tmp_path / "missing.py")
+
+    base = project_fingerprint([str(a)])
+    assert project_fingerprint([str(a), str(a)]) == base
+    assert project_fingerprint([str(a), missing]) != base
+
+    a.write_text("x = 10\n", encoding="utf-8")
+    assert project_fingerprint([str(a)]) != base
+
+
+def test_repo_map_memo_evicts_least_recently_used():
+    memo = RepoMapMemo(max_entries=2)
+    memo.set("a", "A")
+    memo.set("b", "B")
+    memo.get("a")
+    memo.set("c", "C")
+
+    assert memo.get("b") is None
+    assert memo.get("a") == "A"
+    assert memo.get("c") == "C"
+
+
+async def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def build() -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "map"
+
+    waiters = [asyncio.create_task(flights.do("key", build)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["map", "map", "map"]
+    assert calls == 1
+    assert len(flights) == 0
+
+
+async def test_single_flight_propagates_errors_to_every_caller():
+    flights = SingleFlight()
+
+    async def build() -> str:
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flights.do("key", build), flights.do("key", build), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(flights) == 0
+
+
+async def test_single_flight_survives_a_cancelled_caller():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def build() -> str:
+        await release.wait()
+        return "map"
+
+    first = asyncio.create_task(flights.do("key", build))
+    second = asyncio.create_task(flights.do("key", build))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "map"
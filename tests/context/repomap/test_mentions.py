@@ -0,0 +1,61 @@
+from app.context.repomap.graph import RepoGraph
+from app.context.repomap.mentions import MentionExtractor, get_mention_extractor
+
+
+def _extractor() -> MentionExtractor:
+    return MentionExtractor(
+        idents={"parse_config", "RepoMap", "run", "id"},
+        rel_paths=[
+            "app/config.py",
+            "app/services/repo_map.py",
+            "app/__init__.py",
+            "tests/__init__.py",
+            "lib/__init__.py",
+            "web/__init__.py",
+        ],
+    )
+
+
+def test_mention_extractor_finds_identifiers_as_whole_words():
+    _, idents = _extractor().extract(
+        "Why does parse_config() fail when RepoMap runs? See parse_configs too."
+    )
+
+    # "run" is a prefix of "runs", "id" is too short to be trusted
+    assert idents == {"parse_config", "RepoMap"}
+
+
+def test_mention_extractor_finds_paths_and_distinctive_basenames():
+    filenames, _ = _extractor().extract(
+        "Compare ./app/config.py with repo_map.py. Is lib/__init__.py needed?"
+    )
+
+    assert filenames == {
+        "app/config.py",
+        "app/services/repo_map.py",
+        "lib/__init__.py",
+    }
+
+
+def test_mention_extractor_ignores_ambiguous_basenames():
+    filenames, _ = _extractor().extract("Check __init__.py")
+
+    assert filenames == set()
+
+
+def test_get_mention_extractor_reuses_extractor_until_vocabulary_changes():
+    graph = RepoGraph()
+    graph.apply({"a.py": [("core", "def", 0)]}, {})
+
+    first = get_mention_extractor("/p", graph.vocabulary(), ["a.py"])
+    assert get_mention_extractor("/p", graph.vocabulary(), ["a.py"]) is first
+    assert (
+        get_mention_extractor("/p", graph.vocabulary(), ["a.py", "b.py"]) is not first
+    )
+
+    graph.apply({"b.py": [("util", "def", 0)]}, {})
+    assert graph.vocabulary() == {"core", "util"}
+    assert get_mention_extractor("/p", graph.vocabulary(), ["a.py", "b.py"]).idents == {
+        "core",
+        "util",
+    }
@@ -0,0 +1,101 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.context.repomap.ranking import PageRanker
+
+
+def _edges(nodes, edges):
+    index = {n: i for i, n in enumerate(nodes)}
+    sources = np.array([index[s] for s, _, _ in edges], dtype=np.int64)
+    targets = np.array([index[t] for _, t, _ in edges], dtype=np.int64)
+    weights = np.array([w for _, _, w in edges], dtype=np.float64)
+    return sources, targets, weights
+
+
+EDGES = [
+    ("a.py", "b.py", 2.0),
+    ("a.py", "c.py", 1.0),
+    ("b.py", "c.py", 1.0),
+    ("c.py", "c.py", 0.1),
+    ("d.py", "c.py", 3.0),
+    ("d.py", "c.py", 1.0),  # parallel edges are summed
+]
+NODES = ["a.py", "b.py", "c.py", "d.py", "e.py"]  # e.py is dangling
+
+
+def test_page_ranker_matches_networkx():
+    ranks = PageRanker(tol=1e-10).rank(NODES, *_edges(NODES, EDGES))
+
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(NODES)
+    for s, t, w in EDGES:
+        graph.add_edge(s, t, weight=w)
+    expected = nx.pagerank(graph, weight="weight", tol=1e-10)
+
+    for node in NODES:
+        assert ranks[node] == pytest.approx(expected[node], abs=1e-8)
+    assert sum(ranks.values()) == pytest.approx(1.0)
+
+
+def test_page_ranker_personalization_matches_networkx():
+    personalization = PageRanker.personalization(NODES, ["a.py", "a.py", "b.py"])
+    ranks = PageRanker(tol=1e-10).rank(
+        NODES, *_edges(NODES, EDGES), personalization=personalization
+    )
+
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(NODES)
+    for s, t, w in EDGES:
+        graph.add_edge(s, t, weight=w)
+    expected = nx.pagerank(
+        graph,
+        weight="weight",
+        tol=1e-10,
+        personalization=dict(zip(NODES, personalization, strict=True)),
+    )
+
+    for node in NODES:
+        assert ranks[node] == pytest.approx(expected[node], abs=1e-8)
+
+
+def test_personalization_is_none_without_boosted_nodes_in_graph():
+    assert PageRanker.personalization(NODES, []) is None
+    assert PageRanker.personalization(NODES, ["other.py"]) is None
+
+
+def test_personalization_gives_boosted_nodes_the_requested_share():
+    vector = PageRanker.personalization(NODES, ["a.py"], share=0.5)
+
+    assert vector.sum() == pytest.approx(1.0)
+    assert vector[0] == pytest.approx(0.5 + 0.5 / len(NODES))
+    assert vector[1] == pytest.approx(0.5 / len(NODES))
+
+
+def test_page_ranker_warm_starts_from_previous_ranks(mocker):
+    ranker = PageRanker(tol=1e-10)
+    edges = _edges(NODES, EDGES)
+    cold = ranker.rank(NODES, *edges)
+
+    start_spy = mocker.spy(ranker, "_start_vector")
+    warm = ranker.rank(NODES, *edges)
+
+    start = start_spy.spy_return
+    assert start == pytest.approx([cold[n] for n in NODES])
+    for node in NODES:
+        assert warm[node] == pytest.approx(cold[node], abs=1e-8)
+
+
+def test_page_ranker_warm_start_handles_new_nodes():
+    ranker = PageRanker()
+    ranker.rank(NODES[:2], *_edges(NODES[:2], [("a.py", "b.py", 1.0)]))
+
+    ranks = ranker.rank(NODES, *_edges(NODES, EDGES))
+
+    assert set(ranks) == set(NODES)
+    assert sum(ranks.values()) == pytest.approx(1.0)
+
+
+def test_page_ranker_empty_graph():
+    empty = np.array([], dtype=np.int64)
+    assert PageRanker().rank([], empty, empty, np.array([])) == {}
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+from app.context.repomap import RepoGraph, RepoMap
+from app.context.repomap import repomap as repomap_module
+from app.context.repomap.snippets import SnippetCache, render_snippet
+
+
+def test_snippet_cache_key_depends_on_stat_and_lines_of_interest():
+    key = SnippetCache.key("a.py", (10, 1), [0, 4])
+
+    assert SnippetCache.key("a.py", (10, 1), [0, 4]) == key
+    assert SnippetCache.key("a.py", (10, 2), [0, 4]) != key
+    assert SnippetCache.key("a.py", (10, 1), [0, 5]) != key
+    assert SnippetCache.key("b.py", (10, 1), [0, 4]) != key
+
+
+def test_snippet_cache_evicts_least_recently_used():
+    cache = SnippetCache(max_entries=2)
+    a, b, c = (SnippetCache.key(f, (1, 1), [0]) for f in ("a.py", "b.py", "c.py"))
+
+    cache.set(a, "a", 1)
+    cache.set(b, "b", 1)
+    assert cache.get(a) == ("a", 1)
+    cache.set(c, "c", 1)
+
+    assert cache.get(b) is None
+    assert cache.get(a) == ("a", 1)
+    assert len(cache) == 2
+
+
+def test_render_snippet_shows_lines_of_interest():
+    code = "def foo():\n    return 1\n\n\ndef bar():\n    return 2\n"
+
+    snippet = render_snippet("a.py", code, [4])
+
+    assert "def bar():" in snippet
+
+
+async def test_repomap_reuses_rendered_snippets_until_file_changes(
+    repomap_tmp_project, mocker
+):
+    root = repomap_tmp_project["root"]
+    all_files = [repomap_tmp_project[k] for k in ("defs", "use1", "use2")]
+    graph = RepoGraph()
+
+    def build() -> RepoMap:
+        return RepoMap(
+            all_files=all_files,
+            active_context_files=[],
+            root=root,
+            token_limit=10_000,
+            graph=graph,
+        )
+
+    first = await build().generate(include_active_content=False)
+    render_spy = mocker.spy(repomap_module, "render_snippet")
+
+    assert await build().generate(include_active_content=False) == first
+    render_spy.assert_not_called()
+
+    defs = repomap_tmp_project["defs"]
+    Path(defs).write_text(Path(defs).read_text() + "\n# trailing\n")
+    stat = os.stat(defs)
+    os.utime(defs, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    await build().generate(include_active_content=False)
+    assert [call.args[0] for call in render_spy.call_args_list] == ["src/defs.py"]
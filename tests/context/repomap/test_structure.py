@@ -0,0 +1,72 @@
+from app.context.repomap.structure import FileStructureRenderer, build_tree
+
+
+def _lines(text: str) -> int:
+    """One token per line keeps budgets easy to reason about."""
+    return text.count("\n")
+
+
+FILES = [
+    "README.md",
+    "app/main.py",
+    "app/core/config.py",
+    "app/core/db.py",
+    "app/api/routes/users.py",
+    "app/api/routes/items.py",
+    "tests/test_main.py",
+]
+
+
+def test_build_tree_counts_files_per_directory():
+    root = build_tree(FILES)
+
+    assert root.total_files == 7
+    assert root.dirs["app"].total_files == 5
+    assert root.dirs["app"].dirs["api"].dirs["routes"].summary == (
+        "app/api/routes/ (2 files)\n"
+    )
+    assert root.dirs["tests"].summary == "tests/ (1 file)\n"
+
+
+def test_renderer_lists_every_path_when_it_fits():
+    lines, tokens = FileStructureRenderer(FILES, _lines).render(100)
+
+    assert sorted(lines) == sorted(f"{f}\n" for f in FILES)
+    # directories come before files
+    assert lines[-1] == "README.md\n"
+    assert tokens == len(FILES)
+
+
+def test_renderer_collapses_deep_folders_over_budget():
+    lines, tokens = FileStructureRenderer(FILES, _lines).render(5)
+
+    assert lines == [
+        # a folder with a single subfolder expands for free
+        "app/api/routes/ (2 files)\n",
+        "app/core/ (2 files)\n",
+        "app/main.py\n",
+        "tests/test_main.py\n",
+        "README.md\n",
+    ]
+    assert tokens == 5
+
+
+def test_renderer_keeps_top_level_visible_on_tiny_budget():
+    lines, tokens = FileStructureRenderer(FILES, _lines).render(3)
+
+    assert lines == ["app/ (5 files)\n", "tests/test_main.py\n", "README.md\n"]
+    assert tokens == 3
+
+
+def test_renderer_truncates_top_level_files_when_even_top_level_overflows():
+    files = [f"f{i}.py" for i in range(10)] + ["src/a.py"]
+
+    lines, tokens = FileStructureRenderer(files, _lines).render(4)
+
+    assert lines == [
+        "src/ (1 file)\n",
+        "f0.py\n",
+        "f1.py\n",
+        "... (file list truncated, 8 more files)\n",
+    ]
+    assert tokens == 4
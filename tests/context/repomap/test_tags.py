@@ -0,0 +1,46 @@
+import numpy as np
+
+from app.context.repomap.tags import KIND_DEF, KIND_REF, FileTags, IdentTable
+
+
+def test_ident_table_interns_names_once():
+    table = IdentTable()
+
+    assert table.intern("core") == 0
+    assert table.intern("util") == 1
+    assert table.intern("core") == 0
+    assert table.get("util") == 1
+    assert table.get("missing") is None
+    assert table.name(1) == "util"
+    assert len(table) == 2
+
+
+def test_file_tags_from_raw_builds_columns():
+    table = IdentTable()
+    tags = FileTags.from_raw(
+        [
+            ("core", "def", 2),
+            ("util", "ref", 4),
+            ("util", "ref", 7),
+            ("core", "def", 2),
+        ],
+        table,
+    )
+
+    assert tags.idents.dtype == np.int32
+    assert tags.kinds.tolist() == [KIND_DEF, KIND_REF, KIND_REF, KIND_DEF]
+    assert tags.lines.tolist() == [2, 4, 7, 2]
+    assert tags.defined().tolist() == [table.get("core")]
+    idents, counts = tags.referenced()
+    assert (idents.tolist(), counts.tolist()) == ([table.get("util")], [2])
+    assert tags.definition_lines() == [2]
+
+
+def test_file_tags_compare_by_content():
+    table = IdentTable()
+    raw = [("core", "def", 0), ("core", "ref", 3)]
+
+    assert FileTags.from_raw(raw, table) == FileTags.from_raw(list(raw), table)
+    assert FileTags.from_raw(raw, table) != FileTags.from_raw(raw[:1], table)
+    assert FileTags.from_raw([], table) == FileTags.from_raw([], table)
+    assert len(FileTags.from_raw([], table)) == 0
@@ -0,0 +1,119 @@
+import threading
+
+from app.context.repomap import RepoMap
+from app.context.repomap.tokens import (
+    INLINE_COUNT_CHARS,
+    TokenCounter,
+    get_token_counter,
+)
+
+
+class _WordEncoding:
+    """One token per whitespace separated word."""
+
+    def __init__(self):
+        self.calls = 0
+        self.threads: list[int] = []
+
+    def encode(self, text, **kwargs):
+        self.calls += 1
+        self.threads.append(threading.get_ident())
+        return text.split()
+
+
+def test_token_counter_uses_encoding_and_caches_by_content():
+    encoding = _WordEncoding()
+    counter = TokenCounter(encoding=encoding)
+
+    assert counter.count("def foo(): pass") == 3
+    assert counter.count("def foo(): pass") == 3
+    assert counter.count("") == 0
+    assert encoding.calls == 1
+
+
+def test_token_counter_evicts_least_recently_used():
+    encoding = _WordEncoding()
+    counter = TokenCounter(encoding=encoding, max_entries=2)
+
+    counter.count("a")
+    counter.count("b")
+    counter.count("a")
+    counter.count("c")  # evicts "b"
+    counter.count("a")
+    assert encoding.calls == 3
+
+    counter.count("b")
+    assert encoding.calls == 4
+
+
+def test_token_counter_falls_back_to_length_estimate(mocker):
+    mocker.patch("tiktoken.get_encoding", side_effect=RuntimeError("offline"))
+    counter = TokenCounter()
+
+    assert counter.count("abcde") == 2
+    assert counter.count("abcd") == 1
+
+
+async def test_token_counter_acount_encodes_large_texts_off_the_event_loop():
+    encoding = _WordEncoding()
+    counter = TokenCounter(encoding=encoding)
+    large = "word " * INLINE_COUNT_CHARS
+
+    assert await counter.acount("def foo(): pass") == 3
+    assert encoding.threads == [threading.get_ident()]
+
+    assert await counter.acount(large) == INLINE_COUNT_CHARS
+    assert encoding.threads[1] != threading.get_ident()
+
+    assert await counter.acount(large) == INLINE_COUNT_CHARS
+    assert encoding.calls == 2
+
+
+async def test_token_counter_acount_loads_the_encoding_off_the_event_loop(mocker):
+    encoding = _WordEncoding()
+    load_threads = []
+    mocker.patch(
+        "tiktoken.get_encoding",
+        side_effect=lambda name: load_threads.append(threading.get_ident()) or encoding,
+    )
+    counter = TokenCounter()
+
+    assert not counter.loaded
+    assert await counter.acount("def foo(): pass") == 3
+    assert counter.loaded
+    assert load_threads and load_threads[0] != threading.get_ident()
+
+
+def test_get_token_counter_is_shared():
+    assert get_token_counter() is get_token_counter()
+
+
+async def test_repomap_packs_smaller_snippets_after_one_overflows(tmp_path):
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    big = "\n".join(f"def big_{i}():\n    return {i}\n" for i in range(60))
+    (root / "src" / "big.py").write_text(big, encoding="utf-8")
+    (root / "src" / "small.py").write_text("def small():\n    return 1\n")
+    calls = "\n".join(f"big_{i}()" for i in range(60))
+    (root / "main.py").write_text(
+        f"from src.big import *\nfrom src.small import small\n{calls}\nsmall()\n"
+    )
+    files = [str(root / "src" / "big.py"), str(root / "src" / "small.py")]
+    files.append(str(root / "main.py"))
+
+    rm = RepoMap(
+        all_files=files,
+        active_context_files=[],
+        root=str(root),
+        token_limit=120,
+        token_counter=TokenCounter(encoding=_WordEncoding()),
+    )
+    ranked, _ = await rm._rank_files()
+    assert ranked["src/big.py"] > ranked["src/small.py"]
+
+    out = await rm.generate(include_active_content=False)
+
+    assert "src/big.py:\n" not in out.split("#### Ranked Definitions\n", 1)[1]
+    assert "src/small.py:\n" in out
+    assert out.endswith(RepoMap.DEFINITIONS_TRUNCATED_NOTICE)
+    assert rm.token_counter.count(out) <= 120
@@ -0,0 +1,122 @@
+import os
+
+from tree_sitter import Point
+
+from app.context.repomap import RepoMap, extraction, get_tag_cache
+from app.context.repomap.extraction import PendingFile, extract_batch
+from app.context.repomap.languages import get_language_registry
+from app.context.repomap.trees import ParseTreeCache, compute_edit, get_parse_tree_cache
+from app.core.config import settings
+
+SOURCE = b"def core():\n    return 1\n\n\ndef helper():\n    return core()\n"
+
+
+def test_compute_edit_finds_changed_span():
+    new = SOURCE.replace(b"return 1", b"return 42")
+
+    edit = compute_edit(SOURCE, new)
+
+    assert edit.start_byte == SOURCE.index(b"1\n")
+    assert edit.old_end_byte == edit.start_byte + 1
+    assert edit.new_end_byte == edit.start_byte + 2
+    assert edit.start_point == Point(1, 11)
+    assert edit.old_end_point == Point(1, 12)
+    assert edit.new_end_point == Point(1, 13)
+    assert compute_edit(SOURCE, SOURCE) is None
+
+
+def test_compute_edit_handles_pure_insertions_and_deletions():
+    insertion = compute_edit(b"ab", b"aXb")
+    assert (insertion.start_byte, insertion.old_end_byte, insertion.new_end_byte) == (
+        1,
+        1,
+        2,
+    )
+
+    deletion = compute_edit(b"a\nXb", b"a\nb")
+    assert (deletion.start_byte, deletion.old_end_byte, deletion.new_end_byte) == (
+        2,
+        3,
+        2,
+    )
+    assert deletion.start_point == Point(1, 0)
+
+
+class RecordingParser:
+    def __init__(self, parser):
+        self.parser = parser
+        self.calls = []
+
+    def parse(self, *args):
+        self.calls.append(args)
+        return self.parser.parse(*args)
+
+
+def test_parse_tree_cache_reparses_hot_files_incrementally(tmp_path):
+    parser = RecordingParser(
+        get_language_registry(settings.queries_dir).get_parser("python")
+    )
+    path = str(tmp_path / "a.py")
+    trees = ParseTreeCache()
+
+    trees.parse(parser, path, SOURCE)
+    assert len(trees) == 0
+
+    trees.mark_hot([path])
+    first = trees.parse(parser, path, SOURCE)
+
+    new = SOURCE.replace(b"return 1", b"return 42")
+    second = trees.parse(parser, path, new)
+
+    assert parser.calls[-1][1] is first
+    assert str(second.root_node) == str(parser.parse(new).root_node)
+
+
+def test_parse_tree_cache_evicts_least_recently_hot_files():
+    trees = ParseTreeCache(max_entries=2)
+    trees.mark_hot(["a.py", "b.py"])
+    trees.mark_hot(["c.py"])
+
+    assert not trees.is_hot("a.py")
+    assert trees.is_hot("b.py") and trees.is_hot("c.py")
+
+
+def test_extract_batch_keeps_tags_correct_across_incremental_edits(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_bytes(SOURCE)
+    trees = get_parse_tree_cache()
+    trees.mark_hot([str(path)])
+
+    extract_batch(settings.queries_dir, [PendingFile(path=str(path), size=0)], trees)
+    path.write_bytes(SOURCE.replace(b"def helper", b"def renamed"))
+    (incremental,) = extract_batch(
+        settings.queries_dir, [PendingFile(path=str(path), size=0)], trees
+    )
+    (full,) = extract_batch(settings.queries_dir, [PendingFile(path=str(path), size=0)])
+
+    assert incremental.tags == full.tags
+    assert ("renamed", "def", 4) in incremental.tags
+
+
+async def test_repomap_marks_active_files_hot(repomap_tmp_project, mocker):
+    defs = repomap_tmp_project["defs"]
+    rm = RepoMap(
+        all_files=[defs, repomap_tmp_project["use1"]],
+        active_context_files=[defs],
+        root=repomap_tmp_project["root"],
+        tag_cache=get_tag_cache(repomap_tmp_project["root"]),
+    )
+    await rm._rank_files()
+    assert get_parse_tree_cache().is_hot(defs)
+
+    with open(defs, "a", encoding="utf-8") as f:
+        f.write("\ndef added():\n    pass\n")
+    stat = os.stat(defs)
+    os.utime(defs, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    trees_spy = mocker.spy(extraction, "parse_tags")
+
+    await rm._rank_files()
+
+    (call,) = trees_spy.call_args_list
+    assert call.args[4] is get_parse_tree_cache()
+    assert any(t.name == "added" for t in rm.graph.get_tags("src/defs.py"))
@@ -1,8 +1,12 @@
+import os
+import shutil
+import sys
 from pathlib import Path
 
 import pytest
 
 from app.context.schemas import FileStatus
+from app.context.services import codebase as codebase_module
 from app.context.services.codebase import CodebaseService
 
 
@@ -385,3 +389,263 @@ async def test_resolve_file_patterns_supports_deep_wildcard_segments(temp_codeba
 
     files = await service.resolve_file_patterns(root, ["src/**/utils.py"])
     assert files == ["src/utils.py"]
+
+
+async def test_get_spec_is_cached_until_gitignore_changes(tmp_path, mocker):
+    gitignore = tmp_path / ".gitignore"
+    gitignore.write_text("*.tmp\n", encoding="utf-8")
+    service = CodebaseService()
+    compile_spy = mocker.spy(codebase_module.PathSpec, "from_lines")
+
+    assert await service.is_ignored(str(tmp_path), "a.tmp") is True
+    assert await service.is_ignored(str(tmp_path), "b.tmp") is True
+    assert compile_spy.call_count == 1
+
+    gitignore.write_text("*.tmp\n*.bak\n", encoding="utf-8")
+    stat = gitignore.stat()
+    os.utime(gitignore, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert await service.is_ignored(str(tmp_path), "c.bak") is True
+    assert compile_spy.call_count == 2
+
+    # extra patterns get their own entry
+    await service.matcher.get_spec(str(tmp_path), extra_patterns=["docs/"])
+    await service.matcher.get_spec(str(tmp_path), extra_patterns=["docs/"])
+    assert compile_spy.call_count == 3
+
+
+async def test_filter_and_resolve_paths_looks_up_spec_once(temp_codebase, mocker):
+    service = CodebaseService()
+    get_spec = mocker.spy(service.matcher, "get_spec")
+
+    result = await service.filter_and_resolve_paths(
+        temp_codebase.root, ["src/main.py", "ignore_me.txt", "README.md"]
+    )
+
+    assert result == {
+        str(Path(temp_codebase.root).resolve() / "src/main.py"),
+        str(Path(temp_codebase.root).resolve() / "README.md"),
+    }
+    assert get_spec.call_count == 1
+
+
+def test_ignore_spec_matches_like_pathspec():
+    lines = [
+        *codebase_module._IgnoreMatcher.DEFAULT_PATTERNS,
+        "# comment",
+        "",
+        "build/",
+        "/dist",
+        "*.tmp",
+        "!keep.tmp",
+        "docs/**/draft.md",
+        "src/**/generated/",
+        "!src/core/generated/",
+    ]
+    spec = codebase_module.IgnoreSpec(lines)
+    paths = [
+        "a.tmp",
+        "keep.tmp",
+        "nested/keep.tmp",
+        "build/",
+        "pkg/build/",
+        "pkg/build",
+        "dist/",
+        "pkg/dist/",
+        "docs/a/b/draft.md",
+        "docs/draft.md",
+        "src/x/generated/",
+        "src/core/generated/",
+        "node_modules/",
+        "web/node_modules/",
+        "app.log",
+        ".git",
+        "src/main.py",
+        "./src/main.py",
+    ]
+
+    for path in paths:
+        assert spec.match_file(path) == spec.spec.match_file(path), path
+    assert codebase_module.IgnoreSpec([]).match_file("a.py") is False
+
+
+def test_scan_project_prunes_ignored_dirs_and_skips_symlinks(tmp_path, mocker):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "index.js").write_text("", encoding="utf-8")
+    (tmp_path / "app.log").write_text("", encoding="utf-8")
+    (tmp_path / "linked").symlink_to(tmp_path / "src", target_is_directory=True)
+    spec = codebase_module.IgnoreSpec(codebase_module._IgnoreMatcher.DEFAULT_PATTERNS)
+    scandir = mocker.spy(codebase_module.os, "scandir")
+
+    entries = codebase_module.scan_project(tmp_path, tmp_path, spec)
+
+    assert sorted(entries) == [
+        codebase_module.ScanEntry("linked", True, True),
+        codebase_module.ScanEntry("src", True, False),
+        codebase_module.ScanEntry("src/pkg", True, False),
+        codebase_module.ScanEntry("src/pkg/mod.py", False, False),
+    ]
+    # root, src and src/pkg: neither node_modules nor the symlink are entered
+    assert scandir.call_count == 3
+
+    shallow = codebase_module.scan_project(tmp_path, tmp_path / "src", spec, False)
+    assert shallow == [codebase_module.ScanEntry("src/pkg", True, False)]
+
+
+def test_file_index_rescans_only_changed_dirs(tmp_path, mocker):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "mod.py").write_text("", encoding="utf-8")
+    spec = codebase_module.IgnoreSpec([])
+    index = codebase_module.FileIndex(str(tmp_path), spec, max_age=60)
+    assert {e.path for e in index.entries(tmp_path)} == {
+        "a",
+        "a/mod.py",
+        "b",
+        "b/mod.py",
+        "c",
+        "c/mod.py",
+    }
+
+    (tmp_path / "b" / "new.py").write_text("", encoding="utf-8")
+    shutil.rmtree(tmp_path / "c")
+    scan_dir = mocker.spy(codebase_module, "_scan_dir")
+
+    # trusted until max_age elapses or it is marked stale
+    assert "b/new.py" not in {e.path for e in index.entries(tmp_path)}
+    assert scan_dir.call_count == 0
+
+    index.mark_stale()
+    assert {e.path for e in index.entries(tmp_path)} == {
+        "a",
+        "a/mod.py",
+        "b",
+        "b/mod.py",
+        "b/new.py",
+    }
+    # root (c removed) and b (new.py added); a is left alone
+    assert scan_dir.call_count == 2
+    assert {e.path for e in index.entries(tmp_path / "b", recursive=False)} == {
+        "b/mod.py",
+        "b/new.py",
+    }
+
+
+async def test_write_file_is_visible_to_the_next_listing(temp_codebase, mocker):
+    mocker.patch.object(codebase_module.settings, "FILE_INDEX_MAX_AGE", 60)
+    service = CodebaseService()
+    root = temp_codebase.root
+    assert "src/added.py" not in await service.resolve_file_patterns(root)
+
+    await service.write_file(root, "src/added.py", "x = 1\n")
+
+    assert "src/added.py" in await service.resolve_file_patterns(root)
+
+
+async def test_resolve_file_patterns_matches_all_patterns_in_one_pass(
+    temp_codebase, mocker
+):
+    service = CodebaseService()
+    root = temp_codebase.root
+    glob_spy = mocker.spy(codebase_module.glob, "glob")
+    entries_spy = mocker.spy(codebase_module.FileIndex, "entries")
+
+    files = await service.resolve_file_patterns(
+        root, ["src", "src/**/*.py", "src/main.py", "src/glob_cases/*"]
+    )
+
+    assert files == await service.resolve_file_patterns(root, ["src"])
+    assert "src/glob_cases/.hidden" in files
+    assert entries_spy.call_count == 2
+    glob_spy.assert_not_called()
+
+
+async def test_resolve_file_patterns_globs_skip_files_under_ignored_directories(
+    tmp_path,
+):
+    # As in git, a negation cannot re-include a file below an excluded directory:
+    # globs never enter the directory, only literal paths reach the file.
+    (tmp_path / ".gitignore").write_text("logs/\n!logs/app.log\n", encoding="utf-8")
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "logs" / "app.log").write_text("app\n", encoding="utf-8")
+    (tmp_path / "logs" / "debug.log").write_text("debug\n", encoding="utf-8")
+    (tmp_path / "main.py").write_text("x = 1\n", encoding="utf-8")
+    service = CodebaseService()
+    root = str(tmp_path)
+
+    for patterns in (None, ["**"], ["logs/*"], ["*/app.log"]):
+        files = await service.resolve_file_patterns(root, patterns)
+        assert not any(f.startswith("logs/") for f in files), patterns
+    assert "main.py" in await service.resolve_file_patterns(root)
+
+    for literal in ("logs/app.log", "logs"):
+        assert await service.resolve_file_patterns(root, [literal]) == ["logs/app.log"]
+    assert await service.resolve_file_patterns(root, ["logs/debug.log"]) == []
+
+
+async def test_read_file_serves_unchanged_files_from_cache(temp_codebase, mocker):
+    service = CodebaseService()
+    root = temp_codebase.root
+    first = await service.read_file(root, "src/main.py")
+    open_spy = mocker.spy(codebase_module.aiofiles, "open")
+
+    second = await service.read_file(root, "src/main.py")
+    assert second.content == first.content
+    assert open_spy.call_count == 0
+
+    main_py = Path(temp_codebase.main_py)
+    main_py.write_text(first.content + "# edited\n", encoding="utf-8")
+    third = await service.read_file(root, "src/main.py")
+    assert third.content.endswith("# edited\n")
+    assert open_spy.call_count == 1
+
+
+def test_file_content_cache_evicts_by_bytes():
+    entry = sys.getsizeof("aaaa")
+    cache = codebase_module.FileContentCache(max_bytes=2 * entry + 2)
+    cache.put("/a", (1, 4), "aaaa")
+    cache.put("/b", (1, 4), "bbbb")
+    assert cache.get("/a", (1, 4)) == "aaaa"  # /b is now least recently used
+
+    cache.put("/c", (1, 4), "cccc")
+    cache.put("/big", (1, 11), "x" * 2 * entry)
+
+    assert cache.get("/b", (1, 4)) is None
+    assert cache.get("/a", (1, 4)) == "aaaa"
+    assert cache.get("/a", (2, 4)) is None
+    assert cache.get("/big", (1, 11)) is None
+    assert (len(cache), cache.total_bytes) == (2, 2 * entry)
+
+
+def test_file_content_cache_budgets_decoded_strings():
+    # 304 bytes on disk, but the emoji stores every character in 4 bytes
+    content = "a" * 300 + "\U0001f600"
+    cache = codebase_module.FileContentCache(max_bytes=1000)
+    cache.put("/wide", (1, len(content.encode())), content)
+
+    assert cache.get("/wide", (1, len(content.encode()))) is None
+    assert (len(cache), cache.total_bytes) == (0, 0)
+
+    cache.put("/narrow", (1, 300), "a" * 300)
+    assert cache.total_bytes == sys.getsizeof("a" * 300)
+    cache.discard("/narrow")
+    assert cache.total_bytes == 0
+
+
+async def test_read_files_keeps_order_and_looks_up_spec_once(temp_codebase, mocker):
+    service = CodebaseService()
+    get_spec = mocker.spy(service.matcher, "get_spec")
+    paths = ["src/utils.py", "ignore_me.txt", "src/main.py", "ghost.py"]
+
+    results = await service.read_files(temp_codebase.root, paths)
+
+    assert [r.file_path for r in results] == paths
+    assert [r.status for r in results] == [
+        FileStatus.SUCCESS,
+        FileStatus.ERROR,
+        FileStatus.SUCCESS,
+        FileStatus.ERROR,
+    ]
+    assert get_spec.call_count == 1
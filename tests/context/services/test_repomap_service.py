@@ -1,11 +1,15 @@
+import asyncio
 import os
+import threading
 from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 
 from app.context.exceptions import RepoMapExtractionException
+from app.context.repomap.graph import get_repo_graph
 from app.context.repomap.repomap import RepoMap
+from app.context.schemas import RepoMapResult
 from app.core.enums import RepoMapMode
 from app.projects.exceptions import ActiveProjectRequiredException
 from app.projects.models import Project
@@ -67,7 +71,7 @@ async def test_generate_repo_map_success(
     )
 
     # 3. Assert
-    assert result == "Repo Map Content"
+    assert result == RepoMapResult(content="Repo Map Content")
 
     # Check constructor call
     repomap_mock.mock_class.assert_called_once()
@@ -258,7 +262,7 @@ async def test_repomap_generate_include_active_content_false_omits_active_contex
     assert "#### Active Context" not in out
 
 
-async def test_repomap_generate_does_not_truncate_file_structure_by_token_limit(
+async def test_repomap_generate_truncates_file_structure_to_token_limit(
     repomap_tmp_project,
 ):
     root = repomap_tmp_project["root"]
@@ -275,7 +279,10 @@ async def test_repomap_generate_does_not_truncate_file_structure_by_token_limit(
         token_limit=25,
     )
     out = await rm.generate(include_active_content=False)
-    assert "... (file list truncated" not in out
+    assert "#### File Structure\n" in out
+    assert "f0.py\n" in out
+    assert "more files)" in out
+    assert rm.token_counter.count(out) <= 25
 
 
 async def test_repomap_format_top_level_structure_includes_repo_map_and_file_structure_headers(
@@ -321,12 +328,14 @@ async def test_repomap_service_manual_mode_returns_only_top_level_structure_from
     )
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.MANUAL,
-        include_active_content=False,
-        token_limit=10_000,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.MANUAL,
+            include_active_content=False,
+            token_limit=10_000,
+        )
+    ).content
 
     assert out.startswith("### Repository Map\n#### File Structure\n")
 
@@ -393,13 +402,15 @@ async def test_repomap_service_manual_mode_returns_top_level_structure_and_respe
         "### Repository Map\n#### File Structure\nREADME.md\nsrc/\n"
     )
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.MANUAL,
-        include_active_content=False,
-        ignore_patterns_str="node_modules/\nlogs/\n*.log\n",
-        token_limit=100,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.MANUAL,
+            include_active_content=False,
+            ignore_patterns_str="node_modules/\nlogs/\n*.log\n",
+            token_limit=100,
+        )
+    ).content
 
     assert out.startswith("### Repository Map\n#### File Structure\n")
     assert "src/" in out
@@ -443,13 +454,15 @@ async def test_repomap_service_manual_mode_top_level_is_filtered_by_ignore_patte
         "### Repository Map\n#### File Structure\nREADME.md\nsrc/\n"
     )
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.MANUAL,
-        include_active_content=False,
-        ignore_patterns_str="node_modules/\n",
-        token_limit=1000,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.MANUAL,
+            include_active_content=False,
+            ignore_patterns_str="node_modules/\n",
+            token_limit=1000,
+        )
+    ).content
 
     assert out.startswith("### Repository Map\n#### File Structure\n")
     assert "src/\n" in out
@@ -482,13 +495,15 @@ async def test_repomap_service_ignore_patterns_are_passed_to_codebase(
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
     codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["README.md"])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.AUTO,
-        include_active_content=False,
-        ignore_patterns_str="  node_modules/  \n\n*.log\n",
-        token_limit=200,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.AUTO,
+            include_active_content=False,
+            ignore_patterns_str="  node_modules/  \n\n*.log\n",
+            token_limit=200,
+        )
+    ).content
     assert out == "OUT"
     codebase_service_mock.resolve_file_patterns.assert_awaited_once_with(
         "/tmp/proj", ignore_patterns=["node_modules/", "*.log"]
@@ -523,12 +538,14 @@ async def test_repomap_service_tree_mode_excludes_ranked_definitions_and_lists_a
 
     repomap_mock.generate = repomap_generate
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.TREE,
-        include_active_content=False,
-        token_limit=200,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.TREE,
+            include_active_content=False,
+            token_limit=200,
+        )
+    ).content
 
     assert "### Repository Map" in out
     assert "#### File Structure" in out
@@ -563,12 +580,14 @@ async def test_repomap_service_tree_mode_returns_full_file_list_including_nested
     )
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.TREE,
-        include_active_content=False,
-        token_limit=10_000,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.TREE,
+            include_active_content=False,
+            token_limit=10_000,
+        )
+    ).content
 
     assert "### Repository Map" in out
     assert "#### File Structure" in out
@@ -603,12 +622,14 @@ async def test_repomap_service_auto_mode_returns_ranked_definitions_for_real_rep
     )
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.AUTO,
-        include_active_content=False,
-        token_limit=10_000,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.AUTO,
+            include_active_content=False,
+            token_limit=10_000,
+        )
+    ).content
 
     assert "### Repository Map" in out
     assert "#### File Structure" in out
@@ -642,13 +663,15 @@ async def test_repomap_service_tree_mode_still_applies_ignore_patterns(
     )
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.TREE,
-        include_active_content=False,
-        ignore_patterns_str="node_modules/\n",
-        token_limit=200,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.TREE,
+            include_active_content=False,
+            ignore_patterns_str="node_modules/\n",
+            token_limit=200,
+        )
+    ).content
 
     assert out == "OUT"
     codebase_service_mock.resolve_file_patterns.assert_awaited_once_with(
@@ -673,12 +696,14 @@ async def test_repomap_service_auto_mode_includes_ranked_definitions_when_possib
     )
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.AUTO,
-        include_active_content=False,
-        token_limit=123,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.AUTO,
+            include_active_content=False,
+            token_limit=123,
+        )
+    ).content
 
     assert out == "OUT"
 
@@ -704,13 +729,15 @@ async def test_repomap_service_auto_mode_applies_ignore_patterns_before_building
     )
     workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
 
-    out = await repomap_service.generate_repo_map(
-        session_id=1,
-        mode=RepoMapMode.AUTO,
-        include_active_content=False,
-        ignore_patterns_str="logs/\n*.log\n",
-        token_limit=200,
-    )
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1,
+            mode=RepoMapMode.AUTO,
+            include_active_content=False,
+            ignore_patterns_str="logs/\n*.log\n",
+            token_limit=200,
+        )
+    ).content
 
     assert out == "OUT"
     assert out == "OUT"
@@ -856,7 +883,13 @@ async def test_repomap_rank_files_active_context_referencer_boost_changes_rank(
     ranked_boosted, _ = await rm_boosted._rank_files()
 
     defs_rel = os.path.relpath(repomap_tmp_project["defs"], repomap_tmp_project["root"])
-    assert ranked_boosted[defs_rel] > ranked_base[defs_rel]
+    use1_rel = os.path.relpath(repomap_tmp_project["use1"], repomap_tmp_project["root"])
+    # Boosted files receive teleport mass themselves, so compare against a file the
+    # boosted referencer does not point to.
+    assert (
+        ranked_boosted[defs_rel] / ranked_boosted[use1_rel]
+        > ranked_base[defs_rel] / ranked_base[use1_rel]
+    )
 
 
 async def test_repomap_rank_files_mentioned_filenames_referencer_boost_changes_rank(
@@ -889,7 +922,13 @@ async def test_repomap_rank_files_mentioned_filenames_referencer_boost_changes_r
     ranked_boosted, _ = await rm_boosted._rank_files()
 
     defs_rel = os.path.relpath(repomap_tmp_project["defs"], repomap_tmp_project["root"])
-    assert ranked_boosted[defs_rel] > ranked_base[defs_rel]
+    use1_rel = os.path.relpath(repomap_tmp_project["use1"], repomap_tmp_project["root"])
+    # Boosted files receive teleport mass themselves, so compare against a file the
+    # boosted referencer does not point to.
+    assert (
+        ranked_boosted[defs_rel] / ranked_boosted[use1_rel]
+        > ranked_base[defs_rel] / ranked_base[use1_rel]
+    )
 
 
 async def test_repomap_add_active_files_content_continues_on_missing_file(
@@ -942,3 +981,257 @@ async def test_repomap_ranked_definitions_excludes_files_without_definitions(
     # But not in Ranked Definitions
     ranked_section = out.split("#### Ranked Definitions\n", 1)[1]
     assert f"{script_rel}:\n" not in ranked_section
+
+
+async def test_repomap_service_memoizes_unchanged_repository(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    repomap_mock,
+    tmp_path,
+):
+    (tmp_path / "main.py").write_text("x = 1\n", encoding="utf-8")
+    project = Project(id=1, name="p", path=str(tmp_path))
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["main.py"])
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+
+    first = await repomap_service.generate_repo_map(session_id=1, token_limit=200)
+    second = await repomap_service.generate_repo_map(session_id=1, token_limit=200)
+
+    assert first == second == RepoMapResult(content="OUT")
+    repomap_mock.mock_class.assert_called_once()
+
+
+async def test_repomap_service_memo_misses_on_changed_inputs_or_files(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    repomap_mock,
+    tmp_path,
+):
+    main = tmp_path / "main.py"
+    main.write_text("x = 1\n", encoding="utf-8")
+    project = Project(id=1, name="p", path=str(tmp_path))
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["main.py"])
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+
+    await repomap_service.generate_repo_map(session_id=1, token_limit=200)
+    await repomap_service.generate_repo_map(session_id=1, token_limit=300)
+    await repomap_service.generate_repo_map(
+        session_id=1, token_limit=200, mentioned_idents={"x"}
+    )
+    assert repomap_mock.mock_class.call_count == 3
+
+    main.write_text("x = 2\nvalue = 3\n", encoding="utf-8")
+    await repomap_service.generate_repo_map(session_id=1, token_limit=200)
+    assert repomap_mock.mock_class.call_count == 4
+
+
+async def test_repomap_service_concurrent_identical_requests_share_one_build(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    repomap_mock,
+    tmp_path,
+):
+    (tmp_path / "main.py").write_text("x = 1\n", encoding="utf-8")
+    project = Project(id=1, name="p", path=str(tmp_path))
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["main.py"])
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+
+    async def slow_generate(**kwargs):
+        await asyncio.sleep(0.01)
+        return "OUT"
+
+    repomap_mock.generate = AsyncMock(side_effect=slow_generate)
+
+    results = await asyncio.gather(
+        repomap_service.generate_repo_map(session_id=1, token_limit=200),
+        repomap_service.generate_repo_map(session_id=2, token_limit=200),
+        repomap_service.generate_repo_map(session_id=3, token_limit=300),
+    )
+
+    assert [r.content for r in results] == ["OUT", "OUT", "OUT"]
+    # the third request has different inputs and builds on its own
+    assert repomap_mock.mock_class.call_count == 2
+
+
+async def test_repomap_service_warm_up_prerenders_default_map(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    repomap_tmp_project,
+    mocker,
+):
+    root = repomap_tmp_project["root"]
+    project = Project(id=1, name="p", path=root)
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(
+        return_value=["src/defs.py", "src/use1.py", "src/use2.py"]
+    )
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+
+    progress = []
+
+    async def on_progress(message):
+        progress.append(message)
+
+    warmed = await repomap_service.warm_up(
+        project, token_limit=2000, on_progress=on_progress
+    )
+    assert "#### Ranked Definitions" in warmed
+    assert "p: 3 files listed." in progress
+    assert progress[-1].startswith("p: repo map warm-up done")
+
+    generate_spy = mocker.spy(RepoMap, "generate")
+    out = (
+        await repomap_service.generate_repo_map(
+            session_id=1, include_active_content=False, token_limit=2000
+        )
+    ).content
+
+    assert out == warmed
+    generate_spy.assert_not_called()
+
+
+async def test_repomap_service_does_not_memoize_partial_maps(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    repomap_tmp_project,
+    mocker,
+):
+    project = Project(id=1, name="p", path=repomap_tmp_project["root"])
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(
+        return_value=["src/defs.py", "src/use1.py", "src/use2.py"]
+    )
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+    generate_spy = mocker.spy(RepoMap, "generate")
+
+    partial = await repomap_service.generate_repo_map(
+        session_id=1, include_active_content=False, time_budget=0
+    )
+    full = await repomap_service.generate_repo_map(
+        session_id=1, include_active_content=False
+    )
+
+    # The partial map may already rank files whose extraction batch finished.
+    assert not partial.complete
+    assert full.complete
+    assert "#### Ranked Definitions" in full.content
+    assert generate_spy.call_count == 2
+
+
+async def test_repomap_service_boosts_mentions_found_in_text(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    mocker,
+    tmp_path,
+):
+    project = Project(id=1, name="p", path=str(tmp_path))
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(
+        return_value=["src/defs.py", "src/use.py"]
+    )
+    codebase_service_mock.filter_and_resolve_paths = AsyncMock(
+        side_effect=lambda root, paths: {os.path.join(root, p) for p in paths}
+    )
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+    get_repo_graph(str(tmp_path)).apply({"src/defs.py": [("core", "def", 0)]}, {})
+    generate = mocker.patch.object(
+        repomap_service, "_generate_cached", new=AsyncMock(return_value="OUT")
+    )
+
+    await repomap_service.generate_repo_map(
+        session_id=1, mention_text="Why is core slow in defs.py?"
+    )
+
+    kwargs = generate.await_args.kwargs
+    assert kwargs["mentioned_idents"] == {"core"}
+    assert kwargs["mentioned_filenames"] == {str(tmp_path / "src/defs.py")}
+
+
+async def test_repomap_service_extracts_mentions_off_the_event_loop(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    mocker,
+    tmp_path,
+):
+    project = Project(id=1, name="p", path=str(tmp_path))
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(
+        return_value=["src/defs.py"]
+    )
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+    graph = get_repo_graph(str(tmp_path))
+    graph.apply({"src/defs.py": [("core", "def", 0)]}, {})
+    loop_thread = threading.get_ident()
+    vocabulary_threads = []
+    vocabulary = graph.vocabulary
+    mocker.patch.object(
+        graph,
+        "vocabulary",
+        side_effect=lambda: vocabulary_threads.append(threading.get_ident())
+        or vocabulary(),
+    )
+    generate = mocker.patch.object(
+        repomap_service, "_generate_cached", new=AsyncMock(return_value="OUT")
+    )
+
+    await repomap_service.generate_repo_map(session_id=1, mention_text="core")
+
+    assert generate.await_args.kwargs["mentioned_idents"] == {"core"}
+    assert vocabulary_threads and loop_thread not in vocabulary_threads
+
+
+async def test_repomap_service_time_bounded_turn_does_not_join_unbounded_build(
+    repomap_service,
+    workspace_service_mock,
+    codebase_service_mock,
+    project_service_mock,
+    repomap_mock,
+    tmp_path,
+):
+    (tmp_path / "main.py").write_text("x = 1\n", encoding="utf-8")
+    project = Project(id=1, name="p", path=str(tmp_path))
+    project_service_mock.get_active_project = AsyncMock(return_value=project)
+    codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["main.py"])
+    workspace_service_mock.get_active_file_paths_abs = AsyncMock(return_value=[])
+    release = asyncio.Event()
+
+    async def generate(**kwargs):
+        if repomap_mock.mock_class.call_args.kwargs["deadline"] is None:
+            await release.wait()
+        return "OUT"
+
+    repomap_mock.generate = AsyncMock(side_effect=generate)
+
+    # e.g. a warm-up, no deadline
+    unbounded = asyncio.ensure_future(
+        repomap_service.generate_repo_map(session_id=1, token_limit=200)
+    )
+    await asyncio.sleep(0.01)
+    bounded = await asyncio.wait_for(
+        repomap_service.generate_repo_map(session_id=1, token_limit=200, time_budget=5),
+        1,
+    )
+
+    assert bounded.content == "OUT"
+    assert not unbounded.done()
+    assert repomap_mock.mock_class.call_count == 2
+
+    release.set()
+    assert (await unbounded).content == "OUT"
@@ -1,3 +1,4 @@
+import threading
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock
 
@@ -487,3 +488,102 @@ async def test_grep_unknown_language_reports_error_per_file(
     )
     assert "Error processing src/regex_cases.txt:" in result
     assert "Unknown language" in result
+
+
+async def test_grep_lists_generated_files_by_name_only(
+    service, project_service_mock, codebase_service_mock, mocker, settings_snapshot
+):
+    project_service_mock.get_active_project = AsyncMock(
+        return_value=Project(id=1, name="p", path="/tmp")
+    )
+    codebase_service_mock.resolve_file_patterns = AsyncMock(
+        return_value=["dist/app.min.js", "dist/other.min.js"]
+    )
+    contents = {
+        "dist/app.min.js": "function needle(){return 1};" * 10,
+        "dist/other.min.js": "function hay(){return 1};",
+    }
+    codebase_service_mock.read_file = AsyncMock(
+        side_effect=lambda root, path: FileReadResult(
+            file_path=path, content=contents[path], status=FileStatus.SUCCESS
+        )
+    )
+    tree_cls = mocker.patch("app.context.services.search.TreeContext")
+    service.encoding = MagicMock()
+    service.encoding.encode = MagicMock(return_value=[1])
+
+    result = await service.grep(
+        "NEEDLE", token_limit=settings_snapshot.grep_token_limit
+    )
+
+    assert result == "dist/app.min.js: matches in generated file (content omitted)"
+    tree_cls.assert_not_called()
+
+
+async def test_grep_classifies_unchanged_files_once(
+    project_service_mock, codebase_service_mock, mocker, settings_snapshot, tmp_path
+):
+    mocker.patch("tiktoken.get_encoding")
+    detector = MagicMock()
+    detector.is_generated = MagicMock(return_value=False)
+    service = SearchService(project_service_mock, codebase_service_mock, detector)
+    service.encoding = MagicMock()
+    service.encoding.encode = MagicMock(return_value=[1])
+
+    source = tmp_path / "app.py"
+    source.write_text("needle = 1\n", encoding="utf-8")
+    project_service_mock.get_active_project = AsyncMock(
+        return_value=Project(id=1, name="p", path=str(tmp_path))
+    )
+    codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["app.py"])
+    codebase_service_mock.read_file = AsyncMock(
+        side_effect=lambda root, path: FileReadResult(
+            file_path=path,
+            content=(tmp_path / path).read_text(encoding="utf-8"),
+            status=FileStatus.SUCCESS,
+        )
+    )
+
+    for _ in range(2):
+        result = await service.grep(
+            "needle", token_limit=settings_snapshot.grep_token_limit
+        )
+        assert "app.py:" in result
+    assert detector.is_generated.call_count == 1
+
+    source.write_text("needle = 2\n# changed\n", encoding="utf-8")
+    await service.grep("needle", token_limit=settings_snapshot.grep_token_limit)
+    assert detector.is_generated.call_count == 2
+
+
+async def test_grep_classifies_files_off_the_event_loop(
+    project_service_mock, codebase_service_mock, mocker, settings_snapshot, tmp_path
+):
+    mocker.patch("tiktoken.get_encoding")
+    loop_thread = threading.get_ident()
+    threads = []
+    detector = MagicMock()
+    detector.is_generated = MagicMock(
+        side_effect=lambda *args: threads.append(threading.get_ident()) or False
+    )
+    service = SearchService(project_service_mock, codebase_service_mock, detector)
+    service.encoding = MagicMock()
+    service.encoding.encode = MagicMock(return_value=[1])
+
+    (tmp_path / "app.py").write_text("needle = 1\n", encoding="utf-8")
+    project_service_mock.get_active_project = AsyncMock(
+        return_value=Project(id=1, name="p", path=str(tmp_path))
+    )
+    codebase_service_mock.resolve_file_patterns = AsyncMock(return_value=["app.py"])
+    codebase_service_mock.read_file = AsyncMock(
+        return_value=FileReadResult(
+            file_path="app.py", content="needle = 1\n", status=FileStatus.SUCCESS
+        )
+    )
+
+    result = await service.grep(
+        "needle", token_limit=settings_snapshot.grep_token_limit
+    )
+
+    assert "app.py:" in result
+    assert threads and loop_thread not in threads
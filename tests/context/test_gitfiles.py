@@ -0,0 +1,117 @@
+import os
+import subprocess
+
+import pytest
+
+from app.context.gitfiles import (
+    MODE_SYMLINK,
+    GitFile,
+    is_git_checkout,
+    list_git_files,
+)
+from app.context.schemas import FileStatus
+from app.context.services import CodebaseService
+from app.context.services import codebase as codebase_module
+from app.core.config import settings
+
+
+def _git(root, *args):
+    subprocess.run(
+        ["git", "-C", str(root), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_project(tmp_path):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "main.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("y = 2\n", encoding="utf-8")
+    (tmp_path / "gone.py").write_text("", encoding="utf-8")
+    (tmp_path / "link.py").symlink_to(tmp_path / "src" / "main.py")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / ".gitignore").write_text("drafts/\n", encoding="utf-8")
+    (tmp_path / "docs" / "drafts").mkdir()
+    (tmp_path / "docs" / "drafts" / "wip.md").write_text("", encoding="utf-8")
+    (tmp_path / ".gitignore").write_text("*.tmp\n", encoding="utf-8")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "init")
+
+    (tmp_path / "gone.py").unlink()
+    (tmp_path / "untracked.py").write_text("", encoding="utf-8")
+    (tmp_path / "scratch.tmp").write_text("", encoding="utf-8")
+    return tmp_path
+
+
+def test_list_git_files(git_project):
+    assert is_git_checkout(str(git_project))
+    files = {f.path: f for f in list_git_files(str(git_project))}
+
+    assert set(files) == {
+        ".gitignore",
+        "docs/.gitignore",
+        "link.py",
+        "src/main.py",
+        "src/pkg/mod.py",
+        "untracked.py",
+    }
+    assert files["link.py"].mode == MODE_SYMLINK
+    assert files["untracked.py"] == GitFile("untracked.py", "")
+
+
+def test_list_git_files_outside_a_checkout(tmp_path):
+    assert not is_git_checkout(str(tmp_path))
+    assert list_git_files(str(tmp_path / "missing")) is None
+
+
+def test_git_file_index_matches_walker(git_project):
+    (git_project / "docs" / "drafts").rename(git_project / "docs" / "old")
+    spec = codebase_module.IgnoreSpec(
+        [*codebase_module._IgnoreMatcher.DEFAULT_PATTERNS, "*.tmp"]
+    )
+    walked = codebase_module.FileIndex(str(git_project), spec)
+    listed = codebase_module.FileIndex(str(git_project), spec, use_git=True)
+
+    assert sorted(listed.entries(git_project)) == sorted(walked.entries(git_project))
+    assert sorted(listed.entries(git_project / "src", recursive=False)) == [
+        codebase_module.ScanEntry("src/main.py", False, False),
+        codebase_module.ScanEntry("src/pkg", True, False),
+    ]
+
+    # a directory change relists from git
+    (git_project / "src" / "pkg" / "new.py").write_text("", encoding="utf-8")
+    listed.mark_stale()
+    assert "src/pkg/new.py" in {e.path for e in listed.entries(git_project)}
+
+
+def test_git_file_index_honors_nested_gitignore(git_project):
+    spec = codebase_module.IgnoreSpec(codebase_module._IgnoreMatcher.DEFAULT_PATTERNS)
+    listed = codebase_module.FileIndex(str(git_project), spec, use_git=True)
+
+    paths = {e.path for e in listed.entries(git_project)}
+
+    assert "docs/.gitignore" in paths
+    assert not any(p.startswith("docs/drafts") for p in paths)
+    assert os.path.exists(git_project / "docs" / "drafts" / "wip.md")
+
+
+async def test_codebase_service_applies_git_ignores_to_literal_paths(
+    git_project, monkeypatch
+):
+    monkeypatch.setattr(settings, "FILE_INDEX_USE_GIT", True)
+    service = CodebaseService()
+    root = str(git_project)
+
+    assert await service.resolve_file_patterns(root, ["docs/drafts/wip.md"]) == []
+    assert await service.resolve_file_patterns(root, ["docs/drafts"]) == []
+    assert await service.resolve_file_patterns(root, ["src/main.py"]) == ["src/main.py"]
+    assert await service.list_dir(root, "docs/drafts") == []
+
+    result = await service.read_file(root, "docs/drafts/wip.md")
+    assert result.status == FileStatus.ERROR
+    assert "ignored" in result.error_message
+    # new files are not in the listing yet and can still be written
+    await service.write_file(root, "docs/new.md", "text")
+    assert await service.resolve_file_patterns(root, ["docs/new.md"]) == ["docs/new.md"]
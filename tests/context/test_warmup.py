@@ -0,0 +1,156 @@
+import asyncio
+from unittest.mock import ANY, AsyncMock, MagicMock
+
+import pytest
+
+from app.context.services import RepoMapService
+from app.context.warmup import RepoMapWarmer
+from app.core.enums import RepoMapMode
+from app.projects.models import Project
+from app.projects.services import ProjectService
+
+
+@pytest.fixture
+def warmup_deps(mocker, db_sessionmanager_mock):
+    mocker.patch("app.context.warmup.sessionmanager", db_sessionmanager_mock)
+
+    project_service = mocker.create_autospec(ProjectService, instance=True)
+    mocker.patch(
+        "app.context.warmup.build_project_service",
+        new=AsyncMock(return_value=project_service),
+    )
+
+    settings_service = MagicMock()
+    settings_service.get_settings = AsyncMock(
+        return_value=MagicMock(
+            repomap_mode=RepoMapMode.AUTO,
+            repomap_ignore_patterns="*.log",
+            ast_token_limit=1234,
+        )
+    )
+    mocker.patch(
+        "app.context.warmup.build_settings_service",
+        new=AsyncMock(return_value=settings_service),
+    )
+
+    repo_map_service = mocker.create_autospec(RepoMapService, instance=True)
+    mocker.patch(
+        "app.context.warmup.build_repo_map_service",
+        new=AsyncMock(return_value=repo_map_service),
+    )
+    return project_service, repo_map_service
+
+
+async def test_warmer_warms_active_project_with_app_settings(
+    warmup_deps, db_session_mock
+):
+    project_service, repo_map_service = warmup_deps
+    project = Project(id=1, name="p", path="/tmp/proj")
+    project_service.get_active_project = AsyncMock(return_value=project)
+
+    await RepoMapWarmer().schedule()
+
+    repo_map_service.warm_up.assert_awaited_once_with(
+        project,
+        mode=RepoMapMode.AUTO,
+        ignore_patterns_str="*.log",
+        token_limit=1234,
+        on_progress=ANY,
+    )
+    db_session_mock.expunge.assert_called_once_with(project)
+
+
+async def test_warmer_warms_given_project(warmup_deps):
+    project_service, repo_map_service = warmup_deps
+    project = Project(id=7, name="p", path="/tmp/proj")
+    project_service.get_project = AsyncMock(return_value=project)
+
+    await RepoMapWarmer().schedule(7)
+
+    project_service.get_project.assert_awaited_once_with(project_id=7)
+    repo_map_service.warm_up.assert_awaited_once()
+
+
+async def test_warmer_skips_without_active_project(warmup_deps):
+    project_service, repo_map_service = warmup_deps
+    project_service.get_active_project = AsyncMock(return_value=None)
+
+    await RepoMapWarmer().schedule()
+
+    repo_map_service.warm_up.assert_not_awaited()
+
+
+async def test_warmer_logs_failures(warmup_deps, caplog):
+    project_service, repo_map_service = warmup_deps
+    project_service.get_active_project = AsyncMock(
+        return_value=Project(id=1, name="p", path="/tmp/proj")
+    )
+    repo_map_service.warm_up.side_effect = RuntimeError("boom")
+
+    await RepoMapWarmer().schedule()
+
+    assert "Warm-up failed: boom" in caplog.text
+
+
+async def test_warmer_reuses_running_warm_up(warmup_deps):
+    project_service, repo_map_service = warmup_deps
+    project_service.get_project = AsyncMock(
+        return_value=Project(id=1, name="p", path="/tmp/proj")
+    )
+    release = asyncio.Event()
+
+    async def wait_for_release(*args, **kwargs):
+        await release.wait()
+
+    repo_map_service.warm_up.side_effect = wait_for_release
+
+    warmer = RepoMapWarmer()
+    first = warmer.schedule(1)
+    await asyncio.sleep(0.01)
+    assert not first.done()
+    assert warmer.schedule(1) is first
+    assert warmer.schedule(2) is not first
+
+    release.set()
+    await asyncio.gather(first, warmer.schedule(2))
+    await warmer.shutdown()
+
+
+async def test_warmer_sends_progress_to_listeners(warmup_deps):
+    project_service, repo_map_service = warmup_deps
+    project_service.get_project = AsyncMock(
+        return_value=Project(id=1, name="p", path="/tmp/proj")
+    )
+    release = asyncio.Event()
+
+    async def warm_up(project, on_progress, **kwargs):
+        await on_progress("files listed")
+        await release.wait()
+        await on_progress("done")
+
+    repo_map_service.warm_up.side_effect = warm_up
+    early, late = [], []
+
+    async def early_listener(message, is_error):
+        early.append((message, is_error))
+
+    async def late_listener(message, is_error):
+        late.append((message, is_error))
+
+    warmer = RepoMapWarmer()
+    await warmer.add_listener(early_listener)
+    task = warmer.schedule(1)
+    await asyncio.sleep(0.01)
+    # joining mid-way replays what was already published
+    await warmer.add_listener(late_listener)
+    release.set()
+    await task
+
+    assert early == late == [("files listed", False), ("done", False)]
+
+    warmer.remove_listener(late_listener)
+    repo_map_service.warm_up.side_effect = RuntimeError("boom")
+    await warmer.schedule(1)
+
+    assert early[-1] == ("Repo map warm-up failed: boom", True)
+    assert len(late) == 2
@@ -1,9 +1,14 @@
+import os
 from decimal import Decimal
+from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
+from apply_patch_py.models import AffectedPaths
 
+from app.context.repomap.trees import get_parse_tree_cache
 from app.context.schemas import FileReadResult, FileStatus
+from app.context.services.codebase import get_file_content_cache
 from app.llms.enums import LLMModel
 from app.patches.services.processors.codex_processor import CodexProcessor
 from app.patches.services.processors.udiff_processor import UDiffProcessor
@@ -218,6 +223,9 @@ class TestUDiffProcessor:
         )
         llm_service_mock.get_client = AsyncMock(return_value=llm_client_mock)
 
+        mark_stale = mocker.patch(
+            "app.patches.services.processors.udiff_processor.mark_file_indexes_stale"
+        )
         processor = UDiffProcessor(
             db=db_sessionmanager_mock,
             diff_patch_repo_factory=mocker.MagicMock(),
@@ -231,6 +239,8 @@ class TestUDiffProcessor:
         codebase_service_mock.write_file.assert_awaited_once_with(
             project.path, "a.txt", "patched"
         )
+        assert get_parse_tree_cache().is_hot(os.path.join(project.path, "a.txt"))
+        mark_stale.assert_called_once_with(project.path)
 
     async def test_apply_file_diff_reads_file_with_must_exist_false(
         self,
@@ -369,6 +379,45 @@ class TestCodexProcessor:
         assert apply_patch_mock.await_args.args[0] == "RAW"
         assert str(apply_patch_mock.await_args.kwargs["workdir"]) == str(project.path)
 
+    async def test_apply_patch_invalidates_file_index_and_contents(
+        self,
+        mocker,
+        db_sessionmanager_mock,
+        project_service_mock,
+        project,
+    ):
+        """apply_patch bypasses write_file, so the processor refreshes the caches."""
+        project_service_mock.get_active_project = AsyncMock(return_value=project)
+        affected = AffectedPaths(
+            added=[Path("new.py")], modified=[Path("a.py")], deleted=[Path("old.py")]
+        )
+        affected.success = True
+        mocker.patch(
+            "app.patches.services.processors.codex_processor.apply_patch",
+            new=AsyncMock(return_value=affected),
+        )
+        mark_stale = mocker.patch(
+            "app.patches.services.processors.codex_processor.mark_file_indexes_stale"
+        )
+        contents = get_file_content_cache()
+        for name in ("new.py", "a.py", "old.py", "untouched.py"):
+            contents.put(str((Path(project.path) / name).resolve()), (1, 1), "x")
+
+        processor = CodexProcessor(
+            db=db_sessionmanager_mock,
+            diff_patch_repo_factory=mocker.MagicMock(),
+            llm_service_factory=AsyncMock(),
+            project_service_factory=AsyncMock(return_value=project_service_mock),
+            codebase_service_factory=AsyncMock(),
+        )
+
+        await processor.apply_patch("RAW")
+
+        mark_stale.assert_called_once_with(project.path)
+        assert get_parse_tree_cache().is_hot(str(Path(project.path) / "a.py"))
+        assert len(contents) == 1
+        contents.clear()
+
     async def test_apply_patch_raises_when_apply_patch_returns_success_false(
         self,
         mocker,